@@ -13,6 +13,7 @@ from common.agent.my_logging import log, log_exception
 from common.chat.message.types import ChatMessage
 from common.database.connection_manager import AbstractConnectionManager
 from common.database.json_convertible import AbstractJsonConvertible
+from common.database.user.platform_user_identity import PlatformUserIdentity
 
 logger = logging.getLogger(__name__)
 
@@ -35,18 +36,18 @@ class AbstractDoctorAgent(AbstractBaseFSMAgent, ABC):
     def create_fsm_behaviour_message_template(self) -> Optional[Template]:
         all_gateways_template = None
         for a_gateway_agent_jid in self.gateway_agents_jids:
-            current_agent_template = Template(to=self.jid_str)
-            current_agent_template.metadata[MasMessageMetadataFields.PERFORMATIVE.value] = \
-                MasMessagePerformatives.REQUEST.value
-            current_agent_template.metadata[MasMessageMetadataFields.SENDER.value] = a_gateway_agent_jid
-
-            if all_gateways_template is None:
-                all_gateways_template = current_agent_template
-            else:
-                all_gateways_template = ORTemplate(
-                    all_gateways_template,
-                    current_agent_template
-                )
+            for performative in [MasMessagePerformatives.REQUEST, MasMessagePerformatives.RESOLVE_PLATFORM_ID]:
+                current_agent_template = Template(to=self.jid_str)
+                current_agent_template.metadata[MasMessageMetadataFields.PERFORMATIVE.value] = performative.value
+                current_agent_template.metadata[MasMessageMetadataFields.SENDER.value] = a_gateway_agent_jid
+
+                if all_gateways_template is None:
+                    all_gateways_template = current_agent_template
+                else:
+                    all_gateways_template = ORTemplate(
+                        all_gateways_template,
+                        current_agent_template
+                    )
 
         return all_gateways_template
 
@@ -60,7 +61,13 @@ class AbstractDoctorAgent(AbstractBaseFSMAgent, ABC):
             reply_message = mas_message.make_reply()
             try:
                 connection_manager: AbstractConnectionManager = self.get_connection_manager()
-                found_data: AbstractJsonConvertible = await self.retrieve_requested_data(
+                if (mas_message.metadata.get(MasMessageMetadataFields.PERFORMATIVE.value, None) ==
+                        MasMessagePerformatives.RESOLVE_PLATFORM_ID.value):
+                    retrieve_data = self.resolve_platform_user_identity
+                else:
+                    retrieve_data = self.retrieve_requested_data
+
+                found_data: Optional[AbstractJsonConvertible] = await retrieve_data(
                     mas_message,
                     chat_message,
                     connection_manager
@@ -71,8 +78,8 @@ class AbstractDoctorAgent(AbstractBaseFSMAgent, ABC):
                         MasMessagePerformatives.FAILURE.value
                     reply_message.metadata[MasMessageMetadataFields.FAIL_MESSAGE.value] = "Data not found"
                 else:
-                    log(self.agent, f"Successfully retrieved data: {found_data.to_json_string()}", logger)
                     reply_message.body = found_data.to_json_string()
+                    log(self.agent, f"Successfully retrieved data: {reply_message.body}", logger)
                     reply_message.metadata[MasMessageMetadataFields.PERFORMATIVE.value] = \
                         MasMessagePerformatives.INFORM_RESULT.value
             except:
@@ -99,6 +106,21 @@ class AbstractDoctorAgent(AbstractBaseFSMAgent, ABC):
             """Template method to retrieve the requested data, from DB"""
             pass
 
+        async def resolve_platform_user_identity(
+                self,
+                mas_message: Message,
+                chat_message: ChatMessage,
+                connection_manager: AbstractConnectionManager
+        ) -> Optional[PlatformUserIdentity]:
+            """
+            Method to retrieve only the identity of the user sending the chat message, from DB
+
+            Defaults retrieving the whole requested data, so it should be overridden to load only needed fields
+            """
+
+            user = await self.retrieve_requested_data(mas_message, chat_message, connection_manager)
+            return PlatformUserIdentity(user.id, user.registration_completed) if user else None
+
     @abstractmethod
     def create_default_fsm_state(self) -> AbstractHandleGatewayDataRequestState:
         """Template method to create the State which will answers to gateway agents, asking for user information"""
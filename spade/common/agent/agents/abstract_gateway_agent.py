@@ -1,5 +1,8 @@
 import asyncio
+import datetime
 import logging
+import os
+import time
 import uuid
 from abc import abstractmethod, ABC
 from asyncio import Future
@@ -9,7 +12,6 @@ from typing import Optional, Callable, Awaitable, Mapping
 from spade.agent import Agent
 from spade.message import Message
 from spade.presence import PresenceManager
-from spade.template import Template
 
 from common.agent.agents.custom_metadata_fields import MasMessageMetadataFields, MasMessagePerformatives
 from common.agent.agents.interaction_texts import (
@@ -18,23 +20,49 @@ from common.agent.agents.interaction_texts import (
 )
 from common.agent.agents.my_abstract_agent import AbstractBaseFSMAgent
 from common.agent.behaviour.abstract_fsm_state_behaviours import AbstractWaitForChatMessageState
-from common.agent.behaviour.behaviours import WaitForMessageFSMBehaviour
-from common.agent.my_logging import log
+from common.agent.behaviour.behaviours import ResponseRouterBehaviour
+from common.agent.my_logging import log, log_exception
 from common.agent.presence_utils import find_contact_by_partial_jid, is_agent_available, find_contact_by_partial_name
 from common.chat.language_enum import Language
 from common.chat.message.types import ChatMessage
 from common.chat.platform.mixins import AbstractMessagingPlatformMixin
+from common.database.user.platform_user_identity import PlatformUserIdentity
+from common.database.user_id_mapping.abstract_user_id_mapping_dao import AbstractUserIDMappingDAO
+from common.utils.caching import TTLCache
 
 logger = logging.getLogger(__name__)
 
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", "10000"))
+"""The maximum number of messaging platform senders whose user ID is kept in memory by gateways"""
+
+USER_CACHE_TTL_HOURS = float(os.environ.get("USER_CACHE_TTL_HOURS", "168"))
+"""The hours after which a cached user ID is asked again to the doctor"""
+
+USER_ID_MAPPING_TOUCH_INTERVAL_MINUTES = float(os.environ.get("USER_ID_MAPPING_TOUCH_INTERVAL_MINUTES", "60"))
+"""The minutes after which a cached user ID, used again, is persisted as recently used"""
+
+USER_DATA_RESPONSE_TIMEOUT_SECONDS = float(os.environ.get("USER_DATA_RESPONSE_TIMEOUT_SECONDS", "300"))
+"""The seconds after which the responses to a user data request are not waited anymore"""
+
 
 class AbstractGatewayAgent(AbstractBaseFSMAgent, ABC):
     """A class implementing an abstract Gateway Agent between a messaging platform and the Spade Multi-Agent System"""
 
-    def __init__(self, jid, password):
+    def __init__(self, jid, password, user_id_mapping_dao: Optional[AbstractUserIDMappingDAO] = None):
         super().__init__(jid, password)
 
-        self.user_cache_manager: UserCacheManager = UserCacheManager()
+        self.user_cache_manager: UserCacheManager = UserCacheManager(user_id_mapping_dao=user_id_mapping_dao)
+        self.response_router = ResponseRouterBehaviour(MasMessageMetadataFields.REQUEST_UNIQUE_CODE.value)
+
+    async def setup(self):
+        await super().setup()
+
+        self.add_behaviour(self.response_router)
+
+        try:
+            self.user_cache_manager.warm_up()
+        except:
+            log_exception(self, logger)
 
 
 @dataclass
@@ -47,12 +75,45 @@ class CachedUser:
     user_agent_future: Optional[Future] = None
     """The future which will be completed once user UserAgent completes the start-up"""
 
+    user_agent: Optional[Agent] = None
+    """The started UserAgent, to create it again only once stopped, like upon hibernation"""
+
+    mapping_used_at: float = 0.0
+    """The time when the mapping was last persisted as used, to persist its use again only after a while"""
+
 
 class UserCacheManager:
-    """A class to manage user cache"""
+    """
+    A class to manage user cache, bounded in size and entries age
+
+    If a DAO is provided, mappings are also persisted, so that a restarted gateway can warm up its cache with the
+    most recently used ones; their use is persisted at most once per touch interval, to limit database writes
+    """
+
+    def __init__(self, max_size: int = USER_CACHE_SIZE, ttl_seconds: Optional[float] = USER_CACHE_TTL_HOURS * 3600,
+                 user_id_mapping_dao: Optional[AbstractUserIDMappingDAO] = None,
+                 touch_interval_seconds: float = USER_ID_MAPPING_TOUCH_INTERVAL_MINUTES * 60):
+        self._user_cache: TTLCache[str, CachedUser] = TTLCache(max_size, ttl_seconds)
+        self._user_id_mapping_dao = user_id_mapping_dao
+        self._touch_interval_seconds = touch_interval_seconds
 
-    def __init__(self):
-        self._user_cache = {}
+    def warm_up(self):
+        """Loads in cache the most recently used persisted mappings, if a DAO was provided"""
+
+        if self._user_id_mapping_dao is None:
+            return
+
+        used_after = datetime.datetime.min
+        if self._user_cache.ttl_seconds is not None:
+            used_after = datetime.datetime.now() - datetime.timedelta(seconds=self._user_cache.ttl_seconds)
+
+        recent_mappings = self._user_id_mapping_dao.find_recent(self._user_cache.max_size, used_after)
+
+        # Least recently used are put first, so that they are the first ones to be evicted
+        for key, user_id in reversed(list(recent_mappings.items())):
+            self._user_cache.put(key, CachedUser(user_id=user_id))
+
+        logger.info(f" Warmed up user cache with {len(recent_mappings)} users")
 
     def add_user(self, user_id: str, originating_message: ChatMessage) -> CachedUser:
         """
@@ -60,13 +121,34 @@ class UserCacheManager:
 
         :returns: The newly added Cached user
         """
+        key = self._compose_key(originating_message)
+
         cached_user = CachedUser(user_id=user_id)
-        self._user_cache[self._compose_key(originating_message)] = cached_user
+        self._user_cache.put(key, cached_user)
+
+        if self._user_id_mapping_dao is not None:
+            try:
+                self._user_id_mapping_dao.save(key, user_id)
+                cached_user.mapping_used_at = time.time()
+            except:
+                logger.exception(f" Cannot persist the user ID of `{key}`, it will be kept only in memory")
+
         return cached_user
 
     def get_user(self, received_message: ChatMessage) -> Optional[CachedUser]:
-        """Retrieves the CachedUser if present with the sender_id of the message"""
-        return self._user_cache.get(self._compose_key(received_message), None)
+        """Retrieves the CachedUser if present with the sender_id of the message, persisting its use if due"""
+
+        key = self._compose_key(received_message)
+        cached_user = self._user_cache.get(key)[1]
+        if (cached_user is not None and self._user_id_mapping_dao is not None and
+                time.time() - cached_user.mapping_used_at >= self._touch_interval_seconds):
+            try:
+                self._user_id_mapping_dao.touch(key)
+                cached_user.mapping_used_at = time.time()
+            except:
+                logger.exception(f" Cannot persist the use of the user ID of `{key}`")
+
+        return cached_user
 
     @staticmethod
     def _compose_key(message: ChatMessage):
@@ -167,10 +249,9 @@ class AbstractUserDataResponseHandlingState(
 
         self.should_set_next_state = False  # This behaviour should be like a OneShotBehaviour, dies once executed
 
-    @abstractmethod
     def extract_user_id(self, other_agent_message: Message) -> str:
-        """Template method called when, upon receiving other agent response, we need to extract the user id"""
-        pass
+        """Method called when, upon receiving other agent response, we need to extract the user id"""
+        return PlatformUserIdentity.from_json_string(other_agent_message.body).user_id
 
     @abstractmethod
     async def handle_user_data_response(self, cached_user: CachedUser, mas_message: Message, chat_message: ChatMessage):
@@ -243,18 +324,17 @@ class AbstractAskForUserDataAboutMessageState(
                 metadata=chat_message.strings_dictionary  # transmits the entire received message, as metadata
             )
 
-            msg.metadata[MasMessageMetadataFields.PERFORMATIVE.value] = MasMessagePerformatives.REQUEST.value
+            msg.metadata[MasMessageMetadataFields.PERFORMATIVE.value] = \
+                MasMessagePerformatives.RESOLVE_PLATFORM_ID.value
             msg.metadata[MasMessageMetadataFields.SENDER.value] = self.agent.jid_str
 
             unique_request_code = str(uuid.uuid4())
             msg.metadata[MasMessageMetadataFields.REQUEST_UNIQUE_CODE.value] = unique_request_code
 
-            response_template = Template()
-            response_template.metadata[MasMessageMetadataFields.REQUEST_UNIQUE_CODE.value] = unique_request_code
-
-            self.agent.add_behaviour(
-                self.create_response_handling_behaviour(),
-                template=response_template
+            self.agent.response_router.expect_response(
+                unique_request_code,
+                self.create_response_handling_state(),
+                USER_DATA_RESPONSE_TIMEOUT_SECONDS
             )
             await self.send(msg)
 
@@ -278,8 +358,8 @@ class AbstractAskForUserDataAboutMessageState(
         )
 
     @abstractmethod
-    def create_response_handling_behaviour(self) -> WaitForMessageFSMBehaviour:
-        """Template method to create the response handing behaviour"""
+    def create_response_handling_state(self) -> AbstractUserDataResponseHandlingState:
+        """Template method to create the state handling the responses to the request"""
         pass
 
 
@@ -311,11 +391,17 @@ class UserAgentStartupHandler:
         else:
             await on_before_create_agent()
 
-            if cached_user.user_agent_future is not None:
-                logger.info(f"The agent with jid {agent_jid} is already being created, wait for it to be started")
+            # An agent still alive may be only not available yet, like during its subscription or a reconnection;
+            # a started agent not alive anymore means it hibernated or stopped, so it is created again
+            if cached_user.user_agent_future is not None and (
+                    not cached_user.user_agent_future.done() or
+                    (cached_user.user_agent is not None and cached_user.user_agent.is_alive())
+            ):
+                logger.info(f"The agent with jid {agent_jid} is already created, wait for it to be started")
 
             else:
                 agent = create_agent(agent_jid, cached_user)
+                cached_user.user_agent = agent
 
                 cached_user.user_agent_future = asyncio.wrap_future(
                     asyncio.run_coroutine_threadsafe(
@@ -1,20 +1,27 @@
 import datetime
 import logging
+import os
+import time
 from abc import abstractmethod, ABC
-from typing import List, Optional, Mapping
+from typing import List, Optional, Mapping, MutableMapping
 
+from spade.message import Message
 from spade.template import Template
 
 from common.agent.agents.custom_metadata_fields import MasMessageMetadataFields
 from common.agent.agents.my_abstract_agent import AbstractBaseAgent
 from common.agent.behaviour.abstract_fsm_state_behaviours import AbstractWaitForChatMessageOrQuickReplyState
-from common.agent.behaviour.behaviours import TrySubscriptionToAgentBehaviour, WaitForMessageFSMBehaviour
+from common.agent.behaviour.behaviours import (
+    TrySubscriptionToAgentBehaviour, WaitForMessageFSMBehaviour, IdleHibernationBehaviour
+)
+from common.agent.my_logging import log
 from common.agent.strategies.abstract_handling_strategies import AbstractHandlingStrategies
 from common.chat.message.types import ChatMessage, ChatActualMessage
 from common.chat.platform.abstract_messaging_platform import AbstractMessagingPlatform, ChatAction
 from common.chat.platform.factory import MessagingPlatformFactory
 from common.chat.platform.types import ChatPlatform
 from common.custom_chat.message_dao import AbstractMessageDAO
+from common.database.hibernation.abstract_hibernation_dao import AbstractAgentHibernationDAO, HibernatedFSMState
 from common.database.user.abstract_user import AbstractBasicUser
 from echo.common.database.user.daos import AbstractUnreadMessageDAO
 
@@ -23,6 +30,9 @@ logger = logging.getLogger(__name__)
 MESSAGING_PLATFORM_API_TOKEN_METADATA_FIELD = 'messaging_platform_api_token'
 """The name of metadata field, which will contain the API token to communicate with the message origin platform"""
 
+IDLE_HIBERNATION_MINUTES = float(os.environ.get("IDLE_HIBERNATION_MINUTES", "60"))
+"""The minutes without messages after which users are hibernated, saving their state to free memory; 0 disables it"""
+
 
 class AbstractUserAgent(AbstractBaseAgent, ABC):
     """An abstract base class for agents representing users"""
@@ -36,19 +46,47 @@ class AbstractUserAgent(AbstractBaseAgent, ABC):
         self.user: Optional[AbstractBasicUser] = None
         self.messaging_platforms: Mapping[ChatPlatform, AbstractMessagingPlatform] = {}
 
+        self.message_behaviours: MutableMapping[str, WaitForMessageFSMBehaviour] = {}
+        """The behaviours managing messaging platform messages, by the JID of the gateway they come from"""
+
+        self.last_activity: float = time.monotonic()
+        """The monotonic time of the last received message"""
+
     async def setup(self):
         await super().setup()
 
+        self.user = await self.retrieve_current_user()
+
+        hibernated_states = pop_hibernated_states(self.get_hibernation_dao(), self.user_id)
         for gateway_jid in self.gateway_agents_jids:
             msg_template = Template(to=self.jid_str)
             msg_template.metadata[MasMessageMetadataFields.SENDER.value] = gateway_jid
-            self.add_behaviour(
-                self.create_messaging_platform_receive_message_behaviour(),
-                template=msg_template
-            )
+
+            message_behaviour = self.create_messaging_platform_receive_message_behaviour()
+            if gateway_jid in hibernated_states:
+                message_behaviour.restore_hibernation_state(hibernated_states[gateway_jid])
+
+            self.add_behaviour(message_behaviour, template=msg_template)
+            self.message_behaviours[gateway_jid] = message_behaviour
             self.add_behaviour(TrySubscriptionToAgentBehaviour(period=2, to_subscribe_agent_jid=gateway_jid))
 
-        self.user = await self.retrieve_current_user()
+        if IDLE_HIBERNATION_MINUTES > 0 and self.get_hibernation_dao() is not None:
+            self.add_behaviour(IdleHibernationBehaviour(IDLE_HIBERNATION_MINUTES * 60))
+
+    def dispatch(self, msg: Message):
+        self.last_activity = time.monotonic()
+        return super().dispatch(msg)
+
+    async def hibernate(self):
+        """Saves the state of the messaging platform behaviours and stops the agent, to be restarted when needed"""
+
+        log(self, f"Hibernating after {IDLE_HIBERNATION_MINUTES} minutes of inactivity.", logger)
+        await self.stop()  # saved only once stopped, so that no message is received by an agent already saved
+        save_hibernated_states(self.get_hibernation_dao(), self.user_id, self.message_behaviours)
+
+    def get_hibernation_dao(self) -> Optional[AbstractAgentHibernationDAO]:
+        """Returns the DAO where to save the agent state upon hibernation, or None to never hibernate. Defaults None"""
+        return None
 
     @abstractmethod
     def create_messaging_platform_receive_message_behaviour(self) -> WaitForMessageFSMBehaviour:
@@ -56,6 +94,8 @@ class AbstractUserAgent(AbstractBaseAgent, ABC):
         pass
 
     async def refresh_current_user(self):
+        if self.user is not None:
+            self.user.invalidate_cached_data()
         self.user = await self.retrieve_current_user()
 
     @abstractmethod
@@ -64,6 +104,30 @@ class AbstractUserAgent(AbstractBaseAgent, ABC):
         pass
 
 
+def save_hibernated_states(hibernation_dao: AbstractAgentHibernationDAO, user_id: str,
+                           message_behaviours: Mapping[str, WaitForMessageFSMBehaviour]):
+    """Utility function to save the states of the behaviours managing messages of the user"""
+
+    hibernation_dao.save(user_id, {
+        gateway_jid: message_behaviour.hibernation_state()
+        for gateway_jid, message_behaviour in message_behaviours.items()
+    })
+
+
+def pop_hibernated_states(hibernation_dao: Optional[AbstractAgentHibernationDAO],
+                          user_id: str) -> Mapping[str, HibernatedFSMState]:
+    """Utility function to retrieve the saved states of the behaviours managing messages of the user, if any"""
+
+    if hibernation_dao is None:
+        return {}
+
+    hibernated_states = hibernation_dao.pop(user_id)
+    if hibernated_states:
+        logger.info(f" Resuming user `{user_id}` from hibernation")
+
+    return hibernated_states
+
+
 class AbstractMessagingPlatformReceiveMessageState(AbstractWaitForChatMessageOrQuickReplyState, ABC):
     """The abstract FSM initial state in charge of managing messages coming from messaging platforms"""
 
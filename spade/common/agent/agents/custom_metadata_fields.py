@@ -16,6 +16,9 @@ class MasMessageMetadataFields(ValuesMixin):
     FAIL_MESSAGE = "fail_message"
     """Used to specify a message in case of failure"""
 
+    USER_ID = "user_id"
+    """Used to specify the system user a message is about, to route it when many users are served by one agent"""
+
 
 class MasMessagePerformatives(ValuesMixin):
     """A class containing performative legal values"""
@@ -23,6 +26,9 @@ class MasMessagePerformatives(ValuesMixin):
     REQUEST = "request"
     """Performative to ask other agent some information, or to do some action"""
 
+    RESOLVE_PLATFORM_ID = "resolve-platform-id"
+    """Performative to ask only the ID of the user with some messaging platform ID, and whether it is registered"""
+
     INFORM = "inform"
     """Performative to communicate an information to another agent, and the information is inside the message"""
 
@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import List, Optional, Mapping, MutableMapping, Any
+
+from spade.behaviour import FSMBehaviour, CyclicBehaviour, PeriodicBehaviour
+from spade.message import Message
+
+from common.agent.agents.abstract_user_agent import (
+    IDLE_HIBERNATION_MINUTES, save_hibernated_states, pop_hibernated_states
+)
+from common.agent.agents.custom_metadata_fields import MasMessageMetadataFields
+from common.agent.agents.my_abstract_agent import AbstractBaseAgent
+from common.agent.behaviour.behaviours import TrySubscriptionToAgentBehaviour, WaitForMessageFSMBehaviour
+from common.agent.my_logging import log, log_exception
+from common.chat.platform.abstract_messaging_platform import AbstractMessagingPlatform
+from common.chat.platform.types import ChatPlatform
+from common.database.hibernation.abstract_hibernation_dao import AbstractAgentHibernationDAO
+from common.database.user.abstract_user import AbstractBasicUser
+
+logger = logging.getLogger(__name__)
+
+
+class AbstractUserSession(ABC):
+    """
+    A lightweight replacement of the agent representing a user, hosted together with many others by a single agent
+
+    Behaviours added to the session see it as their agent: it has the fields of user agents, while everything else
+    (XMPP client, event loop, presence) is taken from the hosting agent; they are run by the session, not being
+    behaviours of the hosting agent, which delivers them messages only through the session
+    """
+
+    def __init__(self, host_agent: 'AbstractUserSessionHostAgent', user_id: str, gateway_agents_jids: List[str]):
+        self.host_agent = host_agent
+        self.name = f"{host_agent.name}/{user_id}"
+
+        self.user_id = user_id
+        self.gateway_agents_jids = gateway_agents_jids
+
+        self.user: Optional[AbstractBasicUser] = None
+        self.messaging_platforms: Mapping[ChatPlatform, AbstractMessagingPlatform] = {}
+
+        self.message_behaviours: MutableMapping[str, WaitForMessageFSMBehaviour] = {}
+        """The behaviours managing messaging platform messages, by the JID of the gateway they come from"""
+
+        self.last_activity: float = time.monotonic()
+        """The monotonic time of the last received message"""
+
+        self._behaviours: List[CyclicBehaviour] = []
+
+    def __getattr__(self, attribute_name: str) -> Any:
+        # Called only for attributes missing in the session, which are the ones of the hosting agent
+        if attribute_name == "host_agent":
+            raise AttributeError(attribute_name)
+
+        return getattr(self.host_agent, attribute_name)
+
+    async def setup(self):
+        """Sets up the session, like an agent set up would do"""
+
+        self.user = await self.retrieve_current_user()
+
+        hibernated_states = pop_hibernated_states(self.get_hibernation_dao(), self.user_id)
+        for gateway_jid in self.gateway_agents_jids:
+            message_behaviour = self.create_messaging_platform_receive_message_behaviour()
+            if gateway_jid in hibernated_states:
+                message_behaviour.restore_hibernation_state(hibernated_states[gateway_jid])
+
+            self.add_behaviour(message_behaviour)
+            self.message_behaviours[gateway_jid] = message_behaviour
+
+    async def hibernate(self):
+        """Saves the state of the messaging platform behaviours and closes the session, to be reopened when needed"""
+
+        log(self, f"Hibernating after {IDLE_HIBERNATION_MINUTES} minutes of inactivity.", logger)
+        save_hibernated_states(self.get_hibernation_dao(), self.user_id, self.message_behaviours)
+
+        self.kill_behaviours()
+        self.host_agent.close_session(self.user_id)
+
+    def get_hibernation_dao(self) -> Optional[AbstractAgentHibernationDAO]:
+        """Returns the DAO where to save the session state upon hibernation, or None to never hibernate"""
+        return None
+
+    def add_behaviour(self, behaviour: CyclicBehaviour):
+        """
+        Adds and starts the behaviour in the session, which is its agent
+
+        The behaviour has no template, as the hosting agent routes messages to the session behaviours by sender
+        """
+
+        behaviour.set_agent(self)
+        if isinstance(behaviour, FSMBehaviour):
+            for state in behaviour.get_states().values():
+                state.set_agent(self)
+
+        self._behaviours.append(behaviour)
+        if self.host_agent.is_alive():
+            behaviour.start()
+
+    def kill_behaviours(self):
+        """Stops the behaviours of the session"""
+
+        for behaviour in self._behaviours:
+            behaviour.kill()
+        self._behaviours.clear()
+
+    @abstractmethod
+    def create_messaging_platform_receive_message_behaviour(self) -> WaitForMessageFSMBehaviour:
+        """Template method to create the behaviour managing the messaging platform messages, coming from gateway"""
+        pass
+
+    async def refresh_current_user(self):
+        if self.user is not None:
+            self.user.invalidate_cached_data()
+        self.user = await self.retrieve_current_user()
+
+    @abstractmethod
+    async def retrieve_current_user(self) -> AbstractBasicUser:
+        """Template method to retrieve the represented user"""
+        pass
+
+
+class AbstractUserSessionHostAgent(AbstractBaseAgent, ABC):
+    """
+    An agent hosting the sessions of many users, instead of having an agent for each user
+
+    Messages are routed to sessions through the user ID in their metadata; sessions are opened on the first message.
+    Session behaviours are not behaviours of this agent, so the other messages are matched only against its own ones
+    """
+
+    def __init__(self, jid, password, gateway_agents_jids: List[str]):
+        super().__init__(jid, password)
+
+        self.gateway_agents_jids = gateway_agents_jids
+
+        self._sessions: MutableMapping[str, asyncio.Task] = {}
+
+    async def setup(self):
+        await super().setup()
+
+        for gateway_jid in self.gateway_agents_jids:
+            self.add_behaviour(TrySubscriptionToAgentBehaviour(period=2, to_subscribe_agent_jid=gateway_jid))
+
+        if IDLE_HIBERNATION_MINUTES > 0:
+            self.add_behaviour(IdleSessionsHibernationBehaviour(IDLE_HIBERNATION_MINUTES * 60))
+
+    @abstractmethod
+    def create_session(self, user_id: str) -> AbstractUserSession:
+        """Template method to create the session of a user"""
+        pass
+
+    @property
+    def sessions_count(self) -> int:
+        """The number of hosted sessions"""
+        return len(self._sessions)
+
+    @property
+    def open_sessions(self) -> List[AbstractUserSession]:
+        """The sessions already set up"""
+        return [
+            session_task.result() for session_task in self._sessions.values()
+            if session_task.done() and not session_task.cancelled() and session_task.exception() is None
+        ]
+
+    async def _async_stop(self):
+        for session in self.open_sessions:
+            session.kill_behaviours()
+
+        await super()._async_stop()
+
+    def close_session(self, user_id: str):
+        """Forgets the session of the user, whose behaviours should be already stopped"""
+
+        self._sessions.pop(user_id, None)
+        log(self, f"Closed the session of user `{user_id}`, now hosting {self.sessions_count} sessions", logger)
+
+    async def _open_session(self, user_id: str) -> AbstractUserSession:
+        """Utility method to create and set up the session of a user"""
+
+        session = self.create_session(user_id)
+        await session.setup()
+
+        log(self, f"Opened the session of user `{user_id}`, now hosting {self.sessions_count} sessions", logger)
+        return session
+
+    async def get_session(self, user_id: str) -> AbstractUserSession:
+        """Gets the session of the user, opening it if needed"""
+
+        session_task = self._sessions.get(user_id, None)
+        if session_task is None:
+            session_task = asyncio.ensure_future(self._open_session(user_id))
+            self._sessions[user_id] = session_task  # stored before awaiting, so that the session is opened only once
+
+        try:
+            return await asyncio.shield(session_task)
+        except:
+            if self._sessions.get(user_id, None) is session_task:
+                del self._sessions[user_id]  # the next message will try to open the session again
+            raise
+
+    def dispatch(self, msg: Message):
+        user_id: Optional[str] = msg.metadata.get(MasMessageMetadataFields.USER_ID.value, None)
+        if user_id is None:
+            return super().dispatch(msg)
+
+        return [self.submit(self._route_to_session(user_id, msg))]
+
+    async def _route_to_session(self, user_id: str, msg: Message):
+        """Utility method to deliver the message to the behaviour of the user session, handling the gateway sender"""
+
+        try:
+            session = await self.get_session(user_id)
+        except:
+            log_exception(self, logger)
+            return
+
+        message_behaviour = session.message_behaviours.get(
+            msg.metadata.get(MasMessageMetadataFields.SENDER.value, None), None
+        )
+        session.last_activity = time.monotonic()
+        if message_behaviour is None:
+            log(self, f"No behaviour of user `{user_id}` session handles messages from `{msg.sender}`", logger,
+                logging.WARNING)
+        else:
+            await message_behaviour.enqueue(msg)
+
+
+class IdleSessionsHibernationBehaviour(PeriodicBehaviour):
+    """Behaviour to hibernate the sessions of the hosting agent, once idle for the provided time"""
+
+    def __init__(self, idle_seconds: float):
+        super().__init__(max(idle_seconds / 4, 1))
+        self.idle_seconds = idle_seconds
+
+    async def run(self):
+        host_agent: AbstractUserSessionHostAgent = self.agent
+
+        now = time.monotonic()
+        for session in host_agent.open_sessions:
+            if now - session.last_activity >= self.idle_seconds and session.get_hibernation_dao() is not None:
+                try:
+                    await session.hibernate()
+                except:
+                    log_exception(host_agent, logger)
@@ -1,6 +1,7 @@
 import logging
 import sys
 from abc import ABC, abstractmethod
+from typing import Mapping
 
 from spade.behaviour import State
 from spade.message import Message
@@ -47,6 +48,14 @@ class AbstractWaitForMessageState(State, ABC):
         """Template method called upon MAS message receiving, to handle it"""
         pass
 
+    def hibernation_data(self) -> Mapping[str, str]:
+        """The data needed to resume this state after its agent hibernation. Defaults to no data"""
+        return {}
+
+    def restore_hibernation_data(self, hibernation_data: Mapping[str, str]):
+        """Restores the data saved upon agent hibernation, before this state is resumed. Defaults doing nothing"""
+        pass
+
 
 class AbstractWaitForChatMessageState(AbstractWaitForMessageState, ABC):
     """A behaviour waiting for raw chat messages arrival, with a hook for when they arrive"""
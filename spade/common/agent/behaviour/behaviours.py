@@ -1,12 +1,17 @@
+import asyncio
 import datetime
 import logging
-from typing import Optional, Callable, List
+import time
+from dataclasses import dataclass
+from typing import Optional, Callable, List, MutableMapping
 
-from spade.behaviour import PeriodicBehaviour, FSMBehaviour
+from spade.behaviour import PeriodicBehaviour, FSMBehaviour, CyclicBehaviour
+from spade.message import Message
 
 from common.agent.behaviour.abstract_fsm_state_behaviours import AbstractWaitForMessageState
-from common.agent.my_logging import log
+from common.agent.my_logging import log, log_exception
 from common.agent.presence_utils import find_contact_by_partial_jid, subscribe_to
+from common.database.hibernation.abstract_hibernation_dao import HibernatedFSMState
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +33,19 @@ class TrySubscriptionToAgentBehaviour(PeriodicBehaviour):
             self.kill(f"The {self.to_subscribe_agent_jid} contact is present in roaster.")
 
 
+class IdleHibernationBehaviour(PeriodicBehaviour):
+    """Behaviour to hibernate the agent, once it has been idle for the provided time"""
+
+    def __init__(self, idle_seconds: float, start_at: datetime.datetime = None):
+        super().__init__(max(idle_seconds / 4, 1), start_at)
+        self.idle_seconds = idle_seconds
+
+    async def run(self):
+        if time.monotonic() - self.agent.last_activity >= self.idle_seconds:
+            self.kill("The agent is idle, and will hibernate.")
+            await self.agent.hibernate()
+
+
 class WaitForMessageFSMBehaviour(FSMBehaviour):
     """The main FSM agent behaviour, by default will wait for messages to handle cyclically"""
 
@@ -58,6 +76,27 @@ class WaitForMessageFSMBehaviour(FSMBehaviour):
             dest=initial_default_state.STATE_NAME
         )
 
+    def hibernation_state(self) -> HibernatedFSMState:
+        """The current state of the FSM, with its data, to be saved upon agent hibernation"""
+
+        current_state = self.get_state(self.current_state)
+        return HibernatedFSMState(
+            self.current_state,
+            current_state.hibernation_data() if isinstance(current_state, AbstractWaitForMessageState) else {}
+        )
+
+    def restore_hibernation_state(self, hibernated_state: HibernatedFSMState):
+        """Makes the FSM resume from the state saved upon agent hibernation; to be called before starting it"""
+
+        to_resume_state = self.get_states().get(hibernated_state.state_name, None)
+        if to_resume_state is None:
+            logger.warning(f" Cannot resume unknown state `{hibernated_state.state_name}`, starting from initial one")
+            return
+
+        self.current_state = hibernated_state.state_name
+        if isinstance(to_resume_state, AbstractWaitForMessageState):
+            to_resume_state.restore_hibernation_data(hibernated_state.state_data)
+
     def add_transitions_from_list(self, ordered_state_names: List[str]):
         """Utility method to quickly add transitions, specifying the path of states."""
 
@@ -91,3 +130,101 @@ class WaitForMessageFSMBehaviour(FSMBehaviour):
 
         if last_to_initial_state_transition:
             self.add_transition(ordered_state_names[-1], initial_state_name)
+
+
+@dataclass
+class _PendingRequest:
+    """A request waiting for its responses"""
+
+    response_state: AbstractWaitForMessageState
+    """The state handling the responses to the request"""
+
+    deadline: float
+    """The monotonic time after which the request is forgotten"""
+
+    last_handling: Optional[asyncio.Future] = None
+    """The handling of the last received response, to be completed before handling the next one"""
+
+
+class ResponseRouterBehaviour(CyclicBehaviour):
+    """
+    Behaviour receiving the responses to all the requests of its agent, routing them by request code
+
+    Each response is handled by the state registered with its request, as if it was running in a FSM of its own:
+    the request is completed when the state stops setting its next state; requests expire after their timeout
+    """
+
+    IDLE_RECEIVE_TIMEOUT_SECONDS = 60
+    """The maximum time to wait for a response, before checking again for expired requests"""
+
+    def __init__(self, request_code_field: str):
+        super().__init__()
+        self.request_code_field = request_code_field
+
+        self._pending_requests: MutableMapping[str, _PendingRequest] = {}
+
+    @property
+    def pending_requests_count(self) -> int:
+        """The number of requests waiting for responses"""
+        return len(self._pending_requests)
+
+    def expect_response(self, request_code: str, response_state: AbstractWaitForMessageState, timeout_seconds: float):
+        """Registers the state which will handle responses to the request; to be called before sending it"""
+
+        response_state.set_agent(self.agent)
+        self._pending_requests[request_code] = _PendingRequest(response_state, time.monotonic() + timeout_seconds)
+
+    def match(self, message: Message) -> bool:
+        # A dictionary lookup replaces the template matching, whatever the number of pending requests
+        return message.metadata.get(self.request_code_field, None) in self._pending_requests
+
+    async def run(self):
+        now = time.monotonic()
+        receive_timeout = min([
+            self.IDLE_RECEIVE_TIMEOUT_SECONDS,
+            *[request.deadline - now for request in self._pending_requests.values()]
+        ])
+
+        msg = await self.receive(timeout=max(receive_timeout, 0.1))
+        if msg:
+            request_code = msg.metadata.get(self.request_code_field, None)
+            pending_request = self._pending_requests.get(request_code, None)
+            if pending_request is None:
+                log(self.agent, f"Discarding response to expired request `{request_code}`", logger, logging.WARNING)
+            else:
+                pending_request.last_handling = asyncio.ensure_future(
+                    self._handle_response(request_code, pending_request, pending_request.last_handling, msg)
+                )
+
+        self._forget_expired_requests()
+
+    async def _handle_response(self, request_code: str, pending_request: _PendingRequest,
+                               previous_handling: Optional[asyncio.Future], msg: Message):
+        """Utility method to handle a response, after the previous ones to the same request"""
+
+        if previous_handling is not None:
+            await asyncio.wait([previous_handling])
+
+        response_state = pending_request.response_state
+        try:
+            await response_state.on_message_received(msg)
+        except:
+            log_exception(self.agent, logger)
+
+        if not response_state.should_set_next_state:
+            if self._pending_requests.get(request_code, None) is pending_request:
+                del self._pending_requests[request_code]
+        response_state.should_set_next_state = True
+
+    def _forget_expired_requests(self):
+        """Utility method to forget requests expired, and not being handled"""
+
+        now = time.monotonic()
+        expired_request_codes = [
+            request_code for request_code, request in self._pending_requests.items()
+            if request.deadline <= now and (request.last_handling is None or request.last_handling.done())
+        ]
+        for request_code in expired_request_codes:
+            del self._pending_requests[request_code]
+            log(self.agent, f"No complete response to request `{request_code}` before its timeout", logger,
+                logging.WARNING)
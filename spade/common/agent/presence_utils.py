@@ -1,5 +1,6 @@
 import logging
-from typing import Optional
+import weakref
+from typing import Optional, MutableMapping
 
 from aioxmpp import JID, Presence, PresenceType
 from spade.agent import Agent
@@ -26,18 +27,94 @@ def setup_presence_manager(agent: Agent, _logger=logger):
     agent.presence.on_subscribed = on_subscribed
 
 
+class RosterIndex:
+    """
+    An index of the contacts of an agent, kept updated by roster and presence events
+
+    It finds contacts by bare JID, and remembers the contact matching each partial name, so that lookups don't scan
+    the whole roster, which grows with the number of users
+    """
+
+    def __init__(self, presence_manager: PresenceManager):
+        self._contacts_by_bare_jid: MutableMapping[str, JID] = {}
+        self._contacts_by_partial_name: MutableMapping[str, JID] = {}
+
+        for jid in presence_manager.get_contacts().keys():
+            self._add(jid)
+
+        presence_manager.roster.on_entry_added.connect(lambda item: self._add(item.jid))
+        presence_manager.roster.on_entry_removed.connect(lambda item: self._remove(item.jid))
+        presence_manager.presenceclient.on_available.connect(lambda full_jid, stanza: self._add(full_jid))
+
+    def _add(self, jid: JID):
+        """Utility method to index a contact, also for already searched partial names matching it"""
+
+        bare_jid = jid.bare()
+        self._contacts_by_bare_jid[str(bare_jid).lower()] = bare_jid
+
+        for partial_name in self._contacts_by_partial_name.keys():
+            if self._contacts_by_partial_name[partial_name] is None and partial_name in bare_jid.localpart.lower():
+                self._contacts_by_partial_name[partial_name] = bare_jid
+
+    def _remove(self, jid: JID):
+        """Utility method to forget a contact, searching again partial names it was matching"""
+
+        bare_jid = jid.bare()
+        self._contacts_by_bare_jid.pop(str(bare_jid).lower(), None)
+
+        for partial_name, matching_jid in list(self._contacts_by_partial_name.items()):
+            if matching_jid == bare_jid:
+                del self._contacts_by_partial_name[partial_name]
+
+    def find_by_jid(self, jid: str) -> Optional[JID]:
+        """Finds the contact with the bare part of provided JID"""
+        return self._contacts_by_bare_jid.get(jid.split("/", 1)[0].lower(), None)
+
+    def find_by_partial_name(self, partial_name: str) -> Optional[JID]:
+        """Finds a contact whose name contains the provided one; only the first search of a name scans contacts"""
+
+        partial_name = partial_name.lower()
+        if partial_name not in self._contacts_by_partial_name:
+            self._contacts_by_partial_name[partial_name] = next(
+                (jid for jid in self._contacts_by_bare_jid.values() if partial_name in jid.localpart.lower()),
+                None
+            )
+
+        return self._contacts_by_partial_name[partial_name]
+
+
+_roster_indexes: 'weakref.WeakKeyDictionary[PresenceManager, RosterIndex]' = weakref.WeakKeyDictionary()
+"""The roster index of each presence manager, created on first use"""
+
+
+def get_roster_index(presence_manager: PresenceManager) -> RosterIndex:
+    """Retrieves the index of the contacts of provided presence manager, creating it if needed"""
+
+    roster_index = _roster_indexes.get(presence_manager, None)
+    if roster_index is None:
+        roster_index = RosterIndex(presence_manager)
+        _roster_indexes[presence_manager] = roster_index
+
+    return roster_index
+
+
 def find_contact_by_partial_name(partial_name: str, presence_manager: PresenceManager) -> Optional[str]:
     """Utility function to take a JID which matches the given partial name, from the agent contact list"""
 
-    for (jid, __) in presence_manager.get_contacts().items():
-        if partial_name.lower() in jid.localpart.lower():
-            return str(jid)
+    jid = get_roster_index(presence_manager).find_by_partial_name(partial_name)
+    return str(jid) if jid is not None else None
 
 
 def find_contact_by_partial_jid(to_search_jid: str, presence_manager: PresenceManager) -> Optional[str]:
     """Utility function to take a JID which matches the given jid, from the agent contact list"""
 
     search_jid_str = str(to_search_jid).lower()
+    if "@" in search_jid_str:  # a complete JID, which can be searched in the index
+        jid = get_roster_index(presence_manager).find_by_jid(search_jid_str)
+        if jid is not None and not _last_subscription_failed(_get_contact_info(jid, presence_manager)):
+            return str(jid)
+        return None
+
     for (jid, info_dict) in presence_manager.get_contacts().items():
 
         # I've found that the most complete representation of the JID "obscurely" resides in presence "from_" field
@@ -55,7 +132,8 @@ def get_presence(jid: str, presence_manager: PresenceManager) -> Presence:
     """Utility method to gather the presence of an Agent"""
 
     actual_jid = JID.fromstr(str(jid))
-    return presence_manager.get_contact(actual_jid).get('presence', Presence(type_=PresenceType.UNAVAILABLE))
+    presence = presence_manager.presenceclient.get_most_available_stanza(actual_jid)
+    return presence if presence is not None else Presence(type_=PresenceType.UNAVAILABLE)
 
 
 def is_agent_available(jid: Optional[str], presence_manager: PresenceManager) -> bool:
@@ -68,19 +146,25 @@ def subscribe_to(agent: Agent, jid: str, _logger=logger):
     """Utility function to subscribe to an Agent JID if not already subscribed to"""
 
     string_jid = str(jid)
-    for (already_present_jid, info_dict) in agent.presence.get_contacts().items():  # foreach contact
-        if str(already_present_jid) == string_jid:  # if found the JID
-            if not _last_subscription_failed(info_dict):  # if last subscription successful
-                log(agent, f"The contact {string_jid} is already present in roaster", _logger)
-                return  # do nothing
-            else:  # if last subscription failed
-                agent.presence.unsubscribe(jid)  # unsubscribe, to delete the failed contact subscription
-                break  # continue to subscription
+    already_present_jid = get_roster_index(agent.presence).find_by_jid(string_jid)
+    if already_present_jid is not None and str(already_present_jid) == string_jid:  # if found the JID
+        if not _last_subscription_failed(_get_contact_info(already_present_jid, agent.presence)):
+            log(agent, f"The contact {string_jid} is already present in roaster", _logger)
+            return  # do nothing
+        else:  # if last subscription failed
+            agent.presence.unsubscribe(jid)  # unsubscribe, to delete the failed contact subscription
 
     log(agent, f"Trying to subscribe to {string_jid}", _logger)
     agent.presence.subscribe(jid)
 
 
+def _get_contact_info(jid: JID, presence_manager: PresenceManager) -> dict:
+    """Utility function to get the roster information about a contact, without building the whole contact list"""
+
+    roster_item = presence_manager.roster.items.get(jid.bare(), None)
+    return roster_item.export_as_json() if roster_item is not None else {}
+
+
 def _last_subscription_failed(contact_info_dict: dict) -> bool:
     """Returns true if the subscription failed, false otherwise"""
 
@@ -9,8 +9,8 @@ from aiohttp.web_exceptions import HTTPFound, HTTPNotFound
 from aiohttp.web_request import Request
 from aiohttp.web_response import Response
 
-from common.agent.web.mime_type_utils import get_mime_type_from_extension
-from common.data_analysis.aggregation import aggregate_objects_by_field
+from common.agent.web.static_assets import StaticAssetCache
+from common.data_analysis.aggregation import aggregate_dao_objects_by_fields
 from common.database.abstract_dao import AbstractDAO
 from common.database.cache.abstract_cache_dao import AbstractCacheDAO
 from common.database.cache.factory import CacheDataFactory
@@ -21,6 +21,9 @@ logger = logging.getLogger(__name__)
 CORS_HEADER = {"Access-Control-Allow-Origin": "*"}
 """The header used to allow requests from other hostname, w.r.t. the hostname where the web page is hosted"""
 
+CACHED_TIME_WINDOW_QUANTUM_MILLISECONDS = int(os.environ.get("CACHED_TIME_WINDOW_QUANTUM_MILLISECONDS", "300000"))
+"""The granularity to which time windows of cached requests are enlarged, so that near requests share the cache"""
+
 
 def create_redirection_controller_to(web_path: str) -> coroutine:
     """Function which returns a controller that redirects to the provided path, raising an HTTPFound exception"""
@@ -33,18 +36,25 @@ def create_redirection_controller_to(web_path: str) -> coroutine:
     return redirect
 
 
-def create_static_file_controller(file_path: str) -> coroutine:
-    """Factory to create a controller which always returns the provided file, without watching inside the Request"""
+def create_static_file_controller(file_path: str, asset_cache: Optional[StaticAssetCache] = None) -> coroutine:
+    """
+    Factory to create a controller which always returns the provided file, without watching inside the Request
+
+    The file is read from disk, and compressed, at the first request and whenever it is modified, then served from
+    memory with its ETag
+    """
+
+    if asset_cache is None:
+        asset_cache = StaticAssetCache(max_size=1)
 
-    async def static_file_controller(_: Request):
+    async def static_file_controller(request: Request):
         """Coroutine which returns a predefined raw file in response"""
 
-        norm_path = os.path.normpath(file_path)
-        try:
-            with open(norm_path, "rb") as file:
-                return Response(body=file.read(), content_type=get_mime_type_from_extension(norm_path))
-        except FileNotFoundError:
-            raise HTTPNotFound(reason=f"File not found: `{norm_path}`", headers=CORS_HEADER)
+        asset = asset_cache.get(file_path)
+        if asset is None:
+            raise HTTPNotFound(reason=f"File not found: `{os.path.normpath(file_path)}`", headers=CORS_HEADER)
+
+        return asset.response_to(request)
 
     return static_file_controller
 
@@ -70,55 +80,63 @@ async def create_json_response(json_data: Union[str, dict, list], custom_headers
 
 
 T1 = TypeVar('T1')
-T2 = TypeVar('T2')
 
 
-async def handle_paginated_request(
-        request: Request,
-        all_items: List[T1],
-        item_pre_processing_function: Callable[[T1], Mapping[str, Any]]
-):
-    """Utility function to handle paginated requests; returns the Json object to be sent"""
+object_pagination_start_index = "start"
+object_pagination_end_index = "end"
+object_pagination_after_id = "after"
 
-    logger.info(f" Request `{request.rel_url}` paginated with params: `{[it for it in request.query.items()]}`")
 
-    object_pagination_start_index = "start"
-    object_pagination_end_index = "end"
+def get_request_page(request: Request, max_index: int) -> Tuple[int, int]:
+    """Utility function to retrieve the normalized "start" and "end" pagination params from request"""
 
-    max_index = len(all_items)
     client_start_index = request.query.get(object_pagination_start_index, "0")
     client_start_index = int(client_start_index) if client_start_index else 0
 
     client_end_index = request.query.get(object_pagination_end_index, str(max_index))
     client_end_index = int(client_end_index) if client_end_index else max_index
 
-    (start_index, end_index) = get_normalized_start_and_end(0, max_index, client_start_index, client_end_index)
+    return get_normalized_start_and_end(0, max_index, client_start_index, client_end_index)
+
+
+async def handle_paginated_request(
+        request: Request,
+        all_items: List[T1],
+        item_pre_processing_function: Callable[[T1], Mapping[str, Any]]
+):
+    """Utility function to handle paginated requests; returns the Json object to be sent"""
+
+    logger.info(f" Request `{request.rel_url}` paginated with params: `{[it for it in request.query.items()]}`")
+
+    (start_index, end_index) = get_request_page(request, len(all_items))
     json_body = [item_pre_processing_function(item) for item in all_items[start_index:end_index]]
 
     return json_body
 
 
-async def handle_time_windowed_request(
+async def handle_dao_paginated_request(
         request: Request,
-        all_items: List[T1],
-        item_timestamp_getter: Callable[[T1], int],
-        item_pre_processing_function: Callable[[T1], T2] = lambda x: x
-) -> List[T2]:
-    """Utility function to handle time windowed requests; returns the Json objects to be sent"""
-
-    logger.info(f" Request `{request.rel_url}` windowed with parameters `{[it for it in request.query.items()]}`")
+        object_dao: AbstractDAO[T1],
+        objects_count: int,
+        item_pre_processing_function: Callable[[T1], Mapping[str, Any]]
+):
+    """
+    Utility function to handle paginated requests, loading from the database only the requested page;
+    returns the Json object to be sent
 
-    (start_time, end_time) = await get_request_time_window(request)
+    When the "after" param is provided, the page starts after the object with that ID
+    """
 
-    json_body = [item_pre_processing_function(item) for item in all_items
-                 if start_time < item_timestamp_getter(item) < end_time]
+    logger.info(f" Request `{request.rel_url}` paginated with params: `{[it for it in request.query.items()]}`")
 
-    logger.info(f" {len(json_body)} elements over {len(all_items)} 'survived' the time_window "
-                f"'{start_time}-{end_time}' "
-                f"[{str(datetime.datetime.fromtimestamp(start_time / 1000.0))} - "
-                f"{str(datetime.datetime.fromtimestamp(end_time / 1000.0))}]")
+    (start_index, end_index) = get_request_page(request, objects_count)
+    after_id = request.query.get(object_pagination_after_id, None)
+    if after_id:
+        page = object_dao.find_page(limit=end_index - start_index, after_id=after_id)
+    else:
+        page = object_dao.find_page(skip=start_index, limit=end_index - start_index)
 
-    return json_body
+    return [item_pre_processing_function(item) for item in page.values()]
 
 
 event_time_window_from_query_name = "from_date"
@@ -175,40 +193,84 @@ async def different_number_invalidation_strategy(
         return False  # Still valid cache
 
 
-async def handle_request_with_cache(request: Request,
-                                    request_handler: Callable[[Request], Awaitable[Tuple[Union[dict, list], int]]],
-                                    invalid_cache_detector: Callable[[Request, AbstractCacheData], Awaitable[bool]],
-                                    cache_dao: AbstractCacheDAO):
-    """Utility function to handle requests leveraging on cached responses"""
+async def quantize_request_time_window(request: Request) -> Request:
+    """
+    Utility function to enlarge the request time window to the nearest multiples of the quantum;
+    returns a new request with the quantized time window
+    """
+
+    (start_time, end_time) = await get_request_time_window(request)
+    quantized_start_time = start_time - start_time % CACHED_TIME_WINDOW_QUANTUM_MILLISECONDS
+    quantized_end_time = end_time - end_time % CACHED_TIME_WINDOW_QUANTUM_MILLISECONDS
+    if quantized_end_time < end_time:
+        quantized_end_time += CACHED_TIME_WINDOW_QUANTUM_MILLISECONDS
+
+    return request.clone(rel_url=request.rel_url.update_query({
+        event_time_window_from_query_name: str(quantized_start_time),
+        event_time_window_to_query_name: str(quantized_end_time),
+    }))
+
+
+async def handle_request_with_cache(
+        request: Request,
+        request_handler: Callable[[Request], Awaitable[Tuple[Union[dict, list], int]]],
+        invalid_cache_detector: Callable[[Request, AbstractCacheData], Awaitable[bool]],
+        cache_dao: AbstractCacheDAO,
+        time_window_bucketed: bool = False,
+        restrict_to_time_window: Optional[Callable[[Union[dict, list], int, int], Union[dict, list]]] = None
+):
+    """
+    Utility function to handle requests leveraging on cached responses
+
+    :param time_window_bucketed: whether requests with a time window share the response computed on the window
+    enlarged to the quantum boundaries, restricted to each requested window when served; otherwise requests with a
+    time window are not cached
+    :param restrict_to_time_window: the function restricting a response to the provided window in milliseconds,
+    required for bucketed requests
+    """
 
     if not request.query:
         logger.info(f" Request `{request.rel_url}` has no params; serving without cache")
         # Don't cache responses to requests that doesn't need a computation
         return await create_json_response((await request_handler(request))[0])
-    elif (event_time_window_from_query_name in request.query.keys() or
-          event_time_window_to_query_name in request.query.keys()):
-        logger.info(f" Not caching request `{request.rel_url}` which requires time to be computed")
-        # Don't cache requests that require time in preparation
-        return await create_json_response((await request_handler(request))[0])
-    else:
-        cache_id = str(request.rel_url)
-        cache: Optional[AbstractCacheData] = cache_dao.find_by_id(cache_id)
-        if not cache or await invalid_cache_detector(request, cache):
-            logger.info(f" No cached data for request `{cache_id}`")
-            (to_cache_response, computed_over_number) = await request_handler(request)
-            cache_dao.insert_cache(
-                CacheDataFactory.new_cache(
-                    cache_id,
-                    cache_data=json.dumps(to_cache_response),
-                    cache_over_number=computed_over_number
-                )
+
+    requested_time_window: Optional[Tuple[int, int]] = None
+    if (event_time_window_from_query_name in request.query.keys() or
+            event_time_window_to_query_name in request.query.keys()):
+        if not time_window_bucketed:
+            logger.info(f" Not caching request `{request.rel_url}` which requires time to be computed")
+            # Don't cache requests that require time in preparation
+            return await create_json_response((await request_handler(request))[0])
+
+        # Near requests share the response computed on the enlarged window, which each one restricts to its own
+        requested_time_window = await get_request_time_window(request)
+        request = await quantize_request_time_window(request)
+        logger.info(f" Request time window quantized to `{request.rel_url}`")
+
+    cache_id = str(request.rel_url)
+    cache: Optional[AbstractCacheData] = cache_dao.find_by_id(cache_id)
+    if not cache or await invalid_cache_detector(request, cache):
+        logger.info(f" No cached data for request `{cache_id}`")
+        (to_cache_response, computed_over_number) = await request_handler(request)
+        cache_dao.insert_cache(
+            CacheDataFactory.new_cache(
+                cache_id,
+                cache_data=json.dumps(to_cache_response),
+                cache_over_number=computed_over_number
             )
-            logger.debug(f" Sending:\n{json.dumps(to_cache_response, indent=2)}")
-            return await create_json_response(to_cache_response)
-        else:
-            logger.info(f" Request `{cache_id}` has cached data")
-            logger.debug(f" Sending:\n{json.dumps(cache.cache_data, indent=2)}")
-            return await create_json_response(cache.cache_data)
+        )
+        response = to_cache_response
+    else:
+        logger.info(f" Request `{cache_id}` has cached data")
+        response = cache.cache_data
+        if requested_time_window is not None:
+            response = json.loads(response)
+
+    if requested_time_window is not None:
+        response = restrict_to_time_window(response, *requested_time_window)
+
+    logger.debug(f" Sending:\n{response if isinstance(response, str) else json.dumps(response, indent=2)}")
+    return await create_json_response(response)
 
 
 def create_objects_controller(
@@ -216,61 +278,56 @@ def create_objects_controller(
         cache_dao: Optional[AbstractCacheDAO],
         aggregate_first_dimension_query_name: str = "aggregateByDimension1",
         aggregate_second_dimension_query_name: str = "aggregateByDimension2",
+        get_objects_version: Optional[Callable[[], int]] = None,
 ):
-    """Creates the coroutine handling objects requests, optionally using cache"""
+    """
+    Creates the coroutine handling objects requests, optionally using cache
+
+    Cached responses are invalidated when the objects version changes, if a version getter is provided,
+    otherwise when the objects count changes
+    """
 
     async def objects_controller(request: Request):
         """The controller called when object data is requests"""
 
-        async def _aggregated_objects_to_json_response(
-                aggregated_objects: Mapping[str, List[T1]]
-        ) -> Mapping[str, list]:
-            """Utility function to convert aggregated objects to the json response to be sent to client"""
-            return {aggregation_field: [an_object.to_json() for an_object in objects]
-                    for (aggregation_field, objects) in aggregated_objects.items()}
-
         async def actual_request_handler(client_request: Request) -> Tuple[Union[dict, list], int]:
             """The request handler called to produce a response, and cache it"""
-            all_objects: Mapping[str, T1] = object_dao.find_by()
 
             if client_request.query and aggregate_first_dimension_query_name in client_request.query.keys():
                 logger.info(f" objects_controller received aggregate request with parameters "
                             f"`{[it for it in client_request.query.items()]}`")
 
-                aggregated_data: Mapping[str, List[T1]] = await aggregate_objects_by_field(
-                    list(all_objects.values()),
-                    client_request.query.get(aggregate_first_dimension_query_name, "")
+                return await aggregate_dao_objects_by_fields(
+                    object_dao,
+                    client_request.query.get(aggregate_first_dimension_query_name, ""),
+                    client_request.query.get(aggregate_second_dimension_query_name, None)
+                )  # Return even on how many objects the response is computed
+            else:
+                objects_count = object_dao.count()
+                json_body = await handle_dao_paginated_request(
+                    client_request, object_dao, objects_count, lambda x: x.to_json()
                 )
 
-                if aggregate_second_dimension_query_name in client_request.query.keys():
-                    logger.info(f" Two dimensional aggregation...")
-                    json_body = {}
-                    for first_dimension_value, first_dimension_aggregated_data in aggregated_data.items():
-                        sub_aggregated_data: Mapping[str, List[T1]] = await aggregate_objects_by_field(
-                            first_dimension_aggregated_data,
-                            client_request.query.get(aggregate_second_dimension_query_name, "")
-                        )
-                        json_body[first_dimension_value] = (
-                            await _aggregated_objects_to_json_response(sub_aggregated_data)
-                        )
-                else:
-                    json_body = await _aggregated_objects_to_json_response(aggregated_data)
-            else:
-                json_body = await handle_paginated_request(client_request, list(all_objects.values()),
-                                                           lambda x: x.to_json())
+                return json_body, objects_count
 
-            return json_body, len(all_objects)  # Return even on how many objects the response is computed
+        async def versioned_request_handler(client_request: Request) -> Tuple[Union[dict, list], int]:
+            """The request handler producing a response, and the objects version it was computed on"""
+            objects_version = get_objects_version()  # read before computing, so that concurrent changes invalidate
+            return (await actual_request_handler(client_request))[0], objects_version
 
         async def invalid_cache(_: Request, cache: AbstractCacheData) -> bool:
             """A strategy to be used in determining if the cache is still valid or not"""
-            return await different_number_invalidation_strategy(cache, object_dao.count(), cache_dao)
+            if get_objects_version is not None:
+                return await different_number_invalidation_strategy(cache, get_objects_version(), cache_dao)
+            else:
+                return await different_number_invalidation_strategy(cache, object_dao.count(), cache_dao)
 
         if cache_dao is None:
             return await create_json_response((await actual_request_handler(request))[0])
         else:
             return await handle_request_with_cache(
                 request,
-                actual_request_handler,
+                versioned_request_handler if get_objects_version is not None else actual_request_handler,
                 invalid_cache,
                 cache_dao
             )
@@ -0,0 +1,279 @@
+import gzip
+import hashlib
+import logging
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, MutableMapping, Tuple, List
+
+from aiohttp.web_exceptions import HTTPNotFound
+from aiohttp.web_request import Request
+from aiohttp.web_response import Response
+
+from common.agent.web.mime_type_utils import extension_to_mime_type
+from common.utils.caching import TTLCache
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, without it only gzip variants are stored
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_ASSETS_MIN_COMPRESSED_SIZE = int(os.environ.get("STATIC_ASSETS_MIN_COMPRESSED_SIZE", "1024"))
+"""The minimum size in bytes of a static asset to store also its compressed variants"""
+
+_COMPRESSIBLE_MIME_TYPE_PATTERN = re.compile(r"^(text/.*|application/(json|ld\+json|xml|xhtml\+xml)|image/svg\+xml)")
+"""The MIME types which benefit from compression"""
+
+_HASHED_FILE_NAME_PATTERN = re.compile(r"\.[0-9a-f]{8,}\.")
+"""The pattern of file names containing a content hash (e.g. `main.1a2b3c4d.chunk.js`), which never change"""
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+"""The Cache-Control header value for assets whose name changes when their content changes"""
+
+REVALIDATE_CACHE_CONTROL = "no-cache"
+"""The Cache-Control header value for assets which clients must revalidate, through the ETag, before using"""
+
+_ETAG_ENCODING_SUFFIXES = {"gzip": "gz", "br": "br"}
+"""The suffixes added to the ETag of the plain body, to get the ETag of its encoded variants"""
+
+STATIC_ASSETS_CACHE_SIZE = int(os.environ.get("STATIC_ASSETS_CACHE_SIZE", "100"))
+"""The maximum number of files kept in memory by caches of static files loaded on demand"""
+
+
+@dataclass
+class StaticAsset:
+    """A static file kept in memory, with its precompressed variants"""
+
+    content_type: Optional[str]
+    etag: str
+    cache_control: str
+    body: bytes
+    gzip_body: Optional[bytes] = None
+    brotli_body: Optional[bytes] = None
+
+    @staticmethod
+    def load(file_path: str, web_path: str) -> 'StaticAsset':
+        """Loads a file from disk, compressing it if useful"""
+
+        with open(file_path, "rb") as file:
+            body = file.read()
+
+        content_type = extension_to_mime_type.get(Path(file_path).suffix[1:], None)
+
+        gzip_body, brotli_body = None, None
+        if (len(body) >= STATIC_ASSETS_MIN_COMPRESSED_SIZE and content_type and
+                _COMPRESSIBLE_MIME_TYPE_PATTERN.match(content_type)):
+            gzip_body = gzip.compress(body, compresslevel=9)
+            brotli_body = brotli.compress(body) if brotli is not None else None
+
+        return StaticAsset(
+            content_type=content_type,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            cache_control=(
+                IMMUTABLE_CACHE_CONTROL if _HASHED_FILE_NAME_PATTERN.search(Path(web_path).name)
+                else REVALIDATE_CACHE_CONTROL
+            ),
+            body=body,
+            gzip_body=gzip_body,
+            brotli_body=brotli_body,
+        )
+
+    def _requested_byte_range(self, request: Request) -> Optional[Tuple[int, int]]:
+        """
+        Utility method to get the byte range requested, as start and exclusive stop, if any
+
+        Malformed, multiple or outdated (through If-Range) ranges are ignored, so that the whole body is sent
+        """
+
+        if "Range" not in request.headers or request.headers.get("If-Range", self.etag) != self.etag:
+            return None
+
+        try:
+            byte_range = request.http_range
+        except ValueError:
+            return None
+
+        if byte_range.start is None and byte_range.stop is None:
+            return None
+        elif byte_range.start is None or byte_range.start < 0:  # a suffix range, like `bytes=-500`
+            return max(0, len(self.body) + (byte_range.start or 0)), len(self.body)
+        else:
+            return byte_range.start, min(byte_range.stop or len(self.body), len(self.body))
+
+    def _negotiated_encoding(self, request: Request) -> Tuple[Optional[str], bytes]:
+        """Utility method to choose the encoding of the whole body accepted by the client, with the encoded body"""
+
+        accepted_encodings = request.headers.get("Accept-Encoding", "")
+        if self.brotli_body is not None and "br" in accepted_encodings:
+            return "br", self.brotli_body
+        elif self.gzip_body is not None and "gzip" in accepted_encodings:
+            return "gzip", self.gzip_body
+        else:
+            return None, self.body
+
+    def etag_of(self, encoding: Optional[str]) -> str:
+        """The ETag of the body in provided encoding, different for each encoding as their bytes differ"""
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{_ETAG_ENCODING_SUFFIXES[encoding]}"'
+
+    def response_to(self, request: Request) -> Response:
+        """
+        Creates the response to the request, answering 304 if client copy is fresh, and 206 if a range is requested
+
+        The encoding is negotiated for whole body responses, while ranges are always taken from the plain body
+        """
+
+        byte_range = self._requested_byte_range(request)
+        encoding, body = self._negotiated_encoding(request) if byte_range is None else (None, self.body)
+
+        etag = self.etag_of(encoding)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+            "Accept-Ranges": "bytes",
+            "Access-Control-Allow-Origin": "*",
+        }
+
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+            return Response(status=304, headers=headers)
+
+        if byte_range is not None:
+            start, stop = byte_range
+            if start >= stop:
+                return Response(status=416, headers={**headers, "Content-Range": f"bytes */{len(self.body)}"})
+
+            return Response(status=206, body=self.body[start:stop], content_type=self.content_type,
+                            headers={**headers, "Content-Range": f"bytes {start}-{stop - 1}/{len(self.body)}"})
+
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(body=body, content_type=self.content_type, headers=headers)
+
+
+def _modification_time_of(file_path: str) -> Optional[int]:
+    """Utility function to get the modification time of a file, in nanoseconds, or None if it does not exist"""
+
+    try:
+        return os.stat(file_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+class StaticAssetStore:
+    """
+    The static files of a folder, kept in memory and indexed by their path relative to the folder
+
+    Files are loaded at creation, and loaded again when served if modified on disk since then
+    """
+
+    def __init__(self, folder_path: str):
+        self.folder_path = folder_path
+
+        self._assets: MutableMapping[str, Tuple[int, StaticAsset]] = {}
+        for directory_path, _, file_names in os.walk(folder_path):
+            for file_name in file_names:
+                if Path(file_name).suffix[1:] not in extension_to_mime_type:
+                    continue
+
+                file_path = os.path.join(directory_path, file_name)
+                relative_path = os.path.relpath(file_path, folder_path).replace("\\", "/")
+                self._assets[relative_path] = (
+                    _modification_time_of(file_path), StaticAsset.load(file_path, relative_path)
+                )
+
+        logger.info(
+            f" Loaded {len(self._assets)} static assets from `{folder_path}` "
+            f"({sum(len(asset.body) for _, asset in self._assets.values())} bytes"
+            f"{', brotli variants disabled' if brotli is None else ''})"
+        )
+
+    @property
+    def relative_paths(self) -> List[str]:
+        """The paths of the assets, relative to the folder"""
+        return list(self._assets.keys())
+
+    def find(self, relative_path: str) -> Optional[StaticAsset]:
+        """Finds the asset at provided path, relative to the folder, loading it again if modified on disk"""
+
+        relative_path = relative_path.lstrip("/")
+        found = self._assets.get(relative_path, None)
+        if found is None:
+            return None
+
+        file_path = os.path.join(self.folder_path, relative_path)
+        modification_time = _modification_time_of(file_path)
+        if modification_time is None:
+            return None
+
+        loaded_modification_time, asset = found
+        if loaded_modification_time != modification_time:
+            asset = StaticAsset.load(file_path, relative_path)
+            self._assets[relative_path] = (modification_time, asset)
+        return asset
+
+
+class StaticAssetCache:
+    """A bounded in-memory cache of static files, loading them on first use and reloading them if modified on disk"""
+
+    def __init__(self, max_size: int = STATIC_ASSETS_CACHE_SIZE):
+        self._assets: TTLCache[str, Tuple[int, StaticAsset]] = TTLCache(max_size)
+
+    def get(self, file_path: str) -> Optional[StaticAsset]:
+        """Gets the asset of the file at provided path, if the file exists"""
+
+        norm_path = os.path.normpath(file_path)
+        modification_time = _modification_time_of(norm_path)
+        if modification_time is None:
+            self._assets.remove(norm_path)
+            return None
+
+        found, modification_time_and_asset = self._assets.get(norm_path)
+        if found and modification_time_and_asset[0] == modification_time:
+            return modification_time_and_asset[1]
+
+        asset = StaticAsset.load(norm_path, norm_path)
+        self._assets.put(norm_path, (modification_time, asset))
+        return asset
+
+
+STATIC_ASSET_PATH_MATCHER_STRING = 'asset_path'
+"""The name of the URL part matching the path of the asset to serve"""
+
+
+def create_static_asset_controller(asset_store: StaticAssetStore, relative_path: str):
+    """Creates the coroutine always serving the asset of the store at provided path"""
+
+    async def static_asset_controller(request: Request):
+        """The controller serving an in memory static asset"""
+
+        asset = asset_store.find(relative_path)
+        if asset is None:
+            raise HTTPNotFound(reason=f"File not found: `{relative_path}`")
+
+        return asset.response_to(request)
+
+    return static_asset_controller
+
+
+def create_static_assets_controller(asset_store: StaticAssetStore, path_prefix: str = ""):
+    """
+    Creates the coroutine serving the assets of the store, whose relative path is taken from the URL
+
+    :param path_prefix: the prefix to add to the matched URL part, to get the path relative to the store folder
+    """
+
+    async def static_assets_controller(request: Request):
+        """The controller serving in memory static assets"""
+
+        relative_path = path_prefix + request.match_info[STATIC_ASSET_PATH_MATCHER_STRING]
+        asset = asset_store.find(relative_path)
+        if asset is None:
+            raise HTTPNotFound(reason=f"File not found: `{relative_path}`")
+
+        return asset.response_to(request)
+
+    return static_assets_controller
@@ -1,7 +1,6 @@
 import logging
 from asyncio import coroutine
-from pathlib import Path
-from typing import TypeVar, Optional
+from typing import TypeVar, Optional, Callable
 
 from spade.agent import Agent
 
@@ -9,10 +8,11 @@ from common.agent.web.controllers import (
     create_static_file_controller, create_objects_controller, create_object_count_controller, create_object_controller,
     OBJECT_ID_URL_MATCHER_STRING
 )
-from common.agent.web.mime_type_utils import extension_to_mime_type
+from common.agent.web.static_assets import (
+    StaticAssetStore, create_static_asset_controller, create_static_assets_controller, STATIC_ASSET_PATH_MATCHER_STRING
+)
 from common.database.abstract_dao import AbstractDAO
 from common.database.cache.abstract_cache_dao import AbstractCacheDAO
-from common.utils.lists import flatten_list
 
 logger = logging.getLogger(__name__)
 
@@ -30,19 +30,33 @@ def add_get_raw_file(agent: Agent, web_route: str, file_path: str):
 
 
 def add_get_raw_files_in_folder(agent: Agent, folder_path: str, base_web_endpoint: str = ""):
-    """Add multiple routes which send back the requested files inside a provided folder"""
-
-    to_serve_file_extensions = [f"*.{file_type}" for file_type in extension_to_mime_type.keys()]
+    """
+    Add routes which send back the requested files inside a provided folder
 
-    to_serve_files = flatten_list([list(Path(folder_path).rglob(file_type)) for file_type in to_serve_file_extensions])
-    logger.debug(f" List of files that will be served by {agent.jid}: {to_serve_files}")
+    Files are loaded in memory, and compressed, once and again when modified; a single route is added for each folder
+    at the top level
+    """
 
-    for file in to_serve_files:
-        relative_path = str(file)[len(folder_path):]
-        url_like = relative_path.replace("\\", "/")
-        to_add_url = base_web_endpoint + url_like
+    asset_store = StaticAssetStore(folder_path)
+    logger.debug(f" List of files that will be served by {agent.jid}: {asset_store.relative_paths}")
+
+    top_level_folders = set()
+    for relative_path in asset_store.relative_paths:
+        if "/" in relative_path:
+            top_level_folders.add(relative_path.split("/", 1)[0])
+        else:
+            logger.debug(f" Will add {base_web_endpoint}/{relative_path}")
+            add_get_raw_controller(
+                agent, f"{base_web_endpoint}/{relative_path}",
+                create_static_asset_controller(asset_store, relative_path)
+            )
+
+    for top_level_folder in sorted(top_level_folders):
+        to_add_url = f"{base_web_endpoint}/{top_level_folder}/{{{STATIC_ASSET_PATH_MATCHER_STRING}:.+}}"
         logger.debug(f" Will add {to_add_url}")
-        add_get_raw_file(agent, to_add_url, file)
+        add_get_raw_controller(
+            agent, to_add_url, create_static_assets_controller(asset_store, path_prefix=f"{top_level_folder}/")
+        )
 
 
 T = TypeVar('T')
@@ -53,7 +67,8 @@ def add_all_get_controllers(
         api_mount_point: str,
         resource_name: str,
         object_dao: AbstractDAO[T],
-        cache_dao: Optional[AbstractCacheDAO] = None
+        cache_dao: Optional[AbstractCacheDAO] = None,
+        get_objects_version: Optional[Callable[[], int]] = None
 ):
     """
     Utility method to add GET controllers (all, count, and single object) using provided DAOs, with optional caching
@@ -61,7 +76,7 @@ def add_all_get_controllers(
 
     add_get_raw_controller(
         agent, f"{api_mount_point}/{resource_name}",
-        create_objects_controller(object_dao, cache_dao)
+        create_objects_controller(object_dao, cache_dao, get_objects_version=get_objects_version)
     )
     add_get_raw_controller(
         agent, f"{api_mount_point}/{resource_name}/count",
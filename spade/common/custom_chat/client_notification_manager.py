@@ -34,10 +34,7 @@ class ClientNotificationManager:
 
     def get_messages(self, for_client_id: str) -> Optional[List[dict]]:
         """Gets the client's unread messages if present, empty list otherwise"""
-        client_unread_messages: List[AbstractUnreadMessage] = list(
-            self.unread_message_dao.find_by(recipient_id=for_client_id).values()
-        )
-        self.clear_messages(for_client_id)
+        client_unread_messages: List[AbstractUnreadMessage] = self.unread_message_dao.pop_all_for(for_client_id)
         return [message.message_json for message in client_unread_messages]
 
     def add_message(self, to_client_id: str, message_obj: dict):
@@ -51,10 +48,7 @@ class ClientNotificationManager:
     def clear_messages(self, for_client_id: str):
         """Clears unread messages for a client ID"""
 
-        unread_messages = self.unread_message_dao.find_by(recipient_id=for_client_id).values()
+        unread_messages = self.unread_message_dao.pop_all_for(for_client_id)
 
         if len(unread_messages) == 0:
             logger.info(f" No unread messages to clear.")
-
-        for unread_message in unread_messages:
-            self.unread_message_dao.delete_by_id(unread_message.id)
@@ -1,5 +1,6 @@
 from __future__ import annotations  # Needed in python 3.7 to have the current class type as a return type of methods
 
+import asyncio
 import logging
 import threading
 from typing import Optional, MutableMapping
@@ -29,28 +30,39 @@ class WebSocketConnectedClientsManager:
         else:
             WebSocketConnectedClientsManager.__instance = self
 
-    __client_map: MutableMapping[str, WebSocketServerProtocol] = {}
+    __client_map: MutableMapping[str, MutableMapping[str, WebSocketServerProtocol]] = {}
+    """The index from client IDs, to their connection IDs, to the connection websocket"""
 
-    MY_UNIQUE_SEPARATOR = ".-.-.-.-.-."
+    __scheduled_status_logging: Optional[asyncio.TimerHandle] = None
 
-    @staticmethod
-    def _compose_client_and_connection_id(client_id: str, connection_id: str) -> str:
-        """Method which composes the extended client id, including the connection unique ID"""
-        return f"{client_id}{WebSocketConnectedClientsManager.MY_UNIQUE_SEPARATOR}{connection_id}"
-
-    @staticmethod
-    def _extract_client_id(extended_client_id: str) -> str:
-        """Method to extract client id from its extended version"""
-        return extended_client_id.split(WebSocketConnectedClientsManager.MY_UNIQUE_SEPARATOR)[0]
+    STATUS_LOGGING_PERIOD_SECONDS = 60
+    """The minimum time between two logs of the connected clients status"""
 
     @staticmethod
     def _log_current_status():
         """Internal method to log current status"""
-        connected_ids = [
-            WebSocketConnectedClientsManager._extract_client_id(key)
-            for key in WebSocketConnectedClientsManager.__client_map.keys()
-        ]
-        logger.info(f" Currently connected clients: {str(connected_ids)}")
+        WebSocketConnectedClientsManager.__scheduled_status_logging = None
+
+        client_map = WebSocketConnectedClientsManager.__client_map
+        logger.info(
+            f" Currently connected clients: {len(client_map)}, "
+            f"with {sum(len(connections) for connections in client_map.values())} connections"
+        )
+        logger.debug(f" Currently connected client IDs: {str(list(client_map.keys()))}")
+
+    @staticmethod
+    def _schedule_status_logging():
+        """Internal method to log current status after a while, if not already scheduled"""
+        if WebSocketConnectedClientsManager.__scheduled_status_logging is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                WebSocketConnectedClientsManager._log_current_status()
+            else:
+                WebSocketConnectedClientsManager.__scheduled_status_logging = loop.call_later(
+                    WebSocketConnectedClientsManager.STATUS_LOGGING_PERIOD_SECONDS,
+                    WebSocketConnectedClientsManager._log_current_status
+                )
 
     @staticmethod
     def add_client(client_id: str, connection_unique_id: str, client_ws: WebSocketServerProtocol):
@@ -60,31 +72,29 @@ class WebSocketConnectedClientsManager:
             logger.info(f" Will close previous connection of `{client_id}`...")
             prev_ws.sendClose(WebSocketServerProtocol.CLOSE_STATUS_CODE_NORMAL)
 
-        extended_client_id = WebSocketConnectedClientsManager._compose_client_and_connection_id(
-            client_id, connection_unique_id
-        )
-
         logger.info(f" Adding `{client_id}` connection...")
-        WebSocketConnectedClientsManager.__client_map[extended_client_id] = client_ws
-        WebSocketConnectedClientsManager._log_current_status()
+        client_connections = WebSocketConnectedClientsManager.__client_map.setdefault(client_id, {})
+        client_connections[connection_unique_id] = client_ws
+        WebSocketConnectedClientsManager._schedule_status_logging()
 
     @staticmethod
     def remove_client(client_id: str, connection_unique_id: str) -> Optional[WebSocketServerProtocol]:
         """Removes a client ID from websocket mapping, if client ID was present"""
-        extended_client_id = WebSocketConnectedClientsManager._compose_client_and_connection_id(
-            client_id, connection_unique_id
-        )
         logger.info(f" Removing client `{client_id}` ...")
-        removed_client = WebSocketConnectedClientsManager.__client_map.pop(extended_client_id, None)
-        WebSocketConnectedClientsManager._log_current_status()
+        client_connections = WebSocketConnectedClientsManager.__client_map.get(client_id, {})
+        removed_client = client_connections.pop(connection_unique_id, None)
+        if not client_connections:
+            WebSocketConnectedClientsManager.__client_map.pop(client_id, None)
+
+        WebSocketConnectedClientsManager._schedule_status_logging()
         return removed_client
 
     @staticmethod
     def get_client(client_id: str) -> Optional[WebSocketServerProtocol]:
         """Gets the websocket bound to the provided client ID if present, None otherwise"""
-        for extended_client_id, ws in WebSocketConnectedClientsManager.__client_map.items():
-            actual_client_id = WebSocketConnectedClientsManager._extract_client_id(extended_client_id)
-            if actual_client_id == client_id and ws.is_open:
+        client_connections = WebSocketConnectedClientsManager.__client_map.get(client_id, {})
+        for ws in client_connections.values():
+            if ws.is_open:
                 return ws
 
         logger.info(f" No open connection found for `{client_id}`")
@@ -1,7 +1,9 @@
 import calendar
 import datetime
 import logging
-from typing import TypeVar, List, Optional, Mapping, Callable
+from typing import TypeVar, List, Optional, Mapping, Callable, Any, Tuple, MutableMapping, Union
+
+from common.database.abstract_dao import AbstractDAO
 
 T = TypeVar('T')
 """A type variable to be used writing generic functions"""
@@ -10,6 +12,79 @@ logger = logging.getLogger(__name__)
 
 UNCATALOGUED_FIELD = "uncatalogued"
 
+DATE_DERIVED_FIELDS = ["hour", "weekday", "month", "year"]
+"""The fields derived from the object "datetime", which can be used for aggregation"""
+
+
+def _hour_range(hour: int) -> str:
+    """Utility function to create the aggregation key of an hour"""
+    return f"{'{:02d}'.format(hour)}-{'{:02d}'.format((hour + 1) % 24)}"
+
+
+def _ordered_keys_of(date_derived_field: str) -> List[str]:
+    """Utility function to get all the keys of a date derived field, in their natural order"""
+
+    if date_derived_field == "hour":
+        return [_hour_range(hour) for hour in range(0, 24)]
+    elif date_derived_field == "weekday":
+        return list(calendar.day_name)
+    elif date_derived_field == "month":
+        return list(calendar.month_name[1:])
+    else:
+        return []
+
+
+def _add_to_aggregation(result_dict: MutableMapping[str, List[Any]], to_consider_field: str, key: str,
+                        is_date_derived: bool, value: Any):
+    """Utility function to add a value to the aggregation key, keeping date derived keys ordered"""
+
+    if is_date_derived and not result_dict.keys():  # initialization to have result already ordered
+        for ordered_key in _ordered_keys_of(to_consider_field):
+            result_dict[ordered_key] = []
+
+    result_dict.setdefault(key, []).append(value)
+
+
+def aggregation_key_of(work_on_obj: T, work_json: Mapping[str, Any], to_consider_field: str) -> Tuple[str, bool]:
+    """
+    Utility function to compute the aggregation key of an object
+
+    :returns: the key and whether it was derived from the object "datetime"
+    """
+
+    if to_consider_field in DATE_DERIVED_FIELDS and work_json.get("datetime", None) is not None:
+        # We have to preprocess data to be catalogued by those fields
+        my_date_time: datetime.datetime = work_on_obj.datetime
+        if to_consider_field == "hour":
+            return _hour_range(my_date_time.hour), True
+        elif to_consider_field == "weekday":
+            return my_date_time.strftime('%A'), True
+        elif to_consider_field == "month":
+            return my_date_time.strftime('%B'), True
+        else:
+            return my_date_time.strftime('%Y'), True
+    else:
+        # Access directly the json object fields
+        return str(work_json.get(to_consider_field, UNCATALOGUED_FIELD)), False
+
+
+def _database_group_key_of(group_value: Optional[Any], to_consider_field: str) -> Tuple[str, bool]:
+    """Utility function to convert a group value computed by the database into the aggregation key"""
+
+    if group_value is None:
+        return UNCATALOGUED_FIELD, False
+    elif to_consider_field == "hour":
+        return _hour_range(group_value), True
+    elif to_consider_field == "weekday":
+        # The database numbers week days from 1 (Sunday) to 7 (Saturday)
+        return calendar.day_name[(group_value + 5) % 7], True
+    elif to_consider_field == "month":
+        return calendar.month_name[group_value], True
+    elif to_consider_field == "year":
+        return str(group_value), True
+    else:
+        return str(group_value), False
+
 
 async def aggregate_objects_by_field(objects: List[T],
                                      object_field_name: Optional[str]) -> Mapping[str, List[T]]:
@@ -32,37 +107,73 @@ def aggregate_step(work_on_obj: T, to_consider_field: str, result_dict: dict,
                    side_effect_fun_adding_results: Callable[[List[T], T], None]):
     """Utility function refactoring the aggregation logic"""
 
-    work_json = work_on_obj.to_json()
-    if to_consider_field in ["hour", "weekday", "month", "year"]:
-        # We have to preprocess data to be catalogued by those fields
-        consider_field_value = work_json.get("datetime", UNCATALOGUED_FIELD)
-        if consider_field_value == UNCATALOGUED_FIELD:
-            # Default to common "else" behaviour
-            consider_field_value = work_json.get(to_consider_field, UNCATALOGUED_FIELD)
-        else:
-            my_date_time: datetime.datetime = work_on_obj.datetime
-            if to_consider_field == "hour":
-                if not result_dict.keys():  # initialization to have all data keys even if not present data
-                    for hour in range(0, 24):
-                        result_dict[f"{'{:02d}'.format(hour)}-{'{:02d}'.format((hour + 1) % 24)}"] = []
-                consider_field_value = f"{my_date_time.strftime('%H')}-" \
-                                       f"{(my_date_time + datetime.timedelta(hours=1)).strftime('%H')}"
-            elif to_consider_field == "weekday":
-                if not result_dict.keys():  # initialization to have result already ordered
-                    for day_name in calendar.day_name:
-                        result_dict[day_name] = []
-                consider_field_value = my_date_time.strftime('%A')
-            elif to_consider_field == "month":
-                if not result_dict.keys():  # initialization to have result already ordered
-                    for month_name in calendar.month_name[1:]:
-                        result_dict[month_name] = []
-                consider_field_value = my_date_time.strftime('%B')
-            elif to_consider_field == "year":
-                consider_field_value = my_date_time.strftime('%Y')
-    else:
-        # Access directly the json object fields
-        consider_field_value = work_json.get(to_consider_field, UNCATALOGUED_FIELD)
+    consider_field_value, is_date_derived = aggregation_key_of(work_on_obj, work_on_obj.to_json(), to_consider_field)
+    if is_date_derived and not result_dict.keys():  # initialization to have result already ordered
+        for ordered_key in _ordered_keys_of(to_consider_field):
+            result_dict[ordered_key] = []
 
-    already_catalogued_obj = result_dict.get(str(consider_field_value), [])
+    already_catalogued_obj = result_dict.get(consider_field_value, [])
     side_effect_fun_adding_results(already_catalogued_obj, work_on_obj)
-    result_dict[str(consider_field_value)] = already_catalogued_obj
+    result_dict[consider_field_value] = already_catalogued_obj
+
+
+async def aggregate_dao_objects_by_fields(
+        object_dao: AbstractDAO[T],
+        first_field_name: Optional[str],
+        second_field_name: Optional[str] = None
+) -> Tuple[Mapping[str, Union[List[Mapping[str, Any]], Mapping[str, List[Mapping[str, Any]]]]], int]:
+    """
+    A function to aggregate the json of all objects in a DAO by one field, or two if the second is not None
+
+    Grouping is done by the database, when the DAO supports it, otherwise in a single pass over the objects;
+    objects are not aggregated by empty field names
+
+    :returns: the aggregated object jsons, nested by second field if provided, and the count of aggregated objects
+    """
+
+    field_names = [field_name for field_name in [first_field_name, second_field_name] if field_name is not None]
+    not_empty_field_names = [field_name for field_name in field_names if field_name]
+
+    def keys_of(field_keys: List[Tuple[str, bool]]) -> List[Tuple[str, bool]]:
+        """Utility function to place computed keys in their dimension, using a single key for empty fields"""
+        computed_keys = iter(field_keys)
+        return [next(computed_keys) if field_name else (UNCATALOGUED_FIELD, False) for field_name in field_names]
+
+    database_groups = object_dao.find_grouped_by(not_empty_field_names) if not_empty_field_names else None
+    if database_groups is not None:
+        logger.info(f" Aggregating by `{not_empty_field_names}` on the database")
+        keyed_object_jsons = [
+            (keys_of([_database_group_key_of(group_value, field_name)
+                      for group_value, field_name in zip(group_values, not_empty_field_names)]),
+             an_object.to_json())
+            for group_values, objects in database_groups
+            for an_object in objects
+        ]
+    else:
+        keyed_object_jsons = []
+        for an_object in object_dao.find_by().values():
+            object_json = an_object.to_json()  # computed only once, for all the fields
+            keyed_object_jsons.append((
+                keys_of([aggregation_key_of(an_object, object_json, field_name)
+                         for field_name in not_empty_field_names]),
+                object_json
+            ))
+
+    result = dict()
+    if second_field_name is None:
+        for [(key, is_date_derived)], object_json in keyed_object_jsons:
+            _add_to_aggregation(result, first_field_name, key, is_date_derived, object_json)
+    else:
+        first_dimension_keyed: MutableMapping[str, list] = dict()
+        for [(key, is_date_derived), second_key_and_derivation], object_json in keyed_object_jsons:
+            _add_to_aggregation(
+                first_dimension_keyed, first_field_name, key, is_date_derived, (second_key_and_derivation, object_json)
+            )
+
+        for first_key, second_keyed_object_jsons in first_dimension_keyed.items():
+            result[first_key] = dict()
+            for (second_key, is_date_derived), object_json in second_keyed_object_jsons:
+                _add_to_aggregation(result[first_key], second_field_name, second_key, is_date_derived, object_json)
+
+    logger.info(f" Aggregated {len(keyed_object_jsons)} objects in {len(result)} categories")
+    return result, len(keyed_object_jsons)
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import TypeVar, Generic, Optional, Mapping
+from typing import TypeVar, Generic, Optional, Mapping, List, Tuple, Any
 
 T = TypeVar('T')
 
@@ -17,6 +17,45 @@ class AbstractDAO(Generic[T], ABC):
         """Finds all objects matching the given filters, returning a mapping between id and the object"""
         pass
 
+    def find_by_ids(self, object_ids: List[str]) -> Mapping[str, T]:
+        """Finds all objects with provided IDs, returning a mapping between id and the object"""
+        found_objects = {object_id: self.find_by_id(object_id) for object_id in object_ids}
+        return {object_id: an_object for object_id, an_object in found_objects.items() if an_object is not None}
+
+    def find_page(self, skip: int = 0, limit: Optional[int] = None, projection: Optional[List[str]] = None,
+                  after_id: Optional[str] = None, **kwargs) -> Mapping[str, T]:
+        """
+        Finds a page of objects matching the given filters, in the same order of `find_by`
+
+        :param skip: the number of objects skipped before the page
+        :param limit: the maximum number of objects in the page, no limit if None
+        :param projection: if provided, only these fields are loaded
+        :param after_id: if provided, the page starts after the object with this ID (keyset pagination),
+        in ascending order of ID
+        """
+        ordered_objects = list(self.find_by(**kwargs).items())
+        if after_id is not None:
+            ordered_objects = [(object_id, an_object) for object_id, an_object in sorted(ordered_objects)
+                               if object_id > after_id]
+
+        end = skip + limit if limit is not None else None
+        return dict(ordered_objects[skip:end])
+
+    def find_one_by(self, projection: Optional[List[str]] = None, **kwargs) -> Optional[T]:
+        """Finds the first object matching the given filters, optionally loading only the projection fields"""
+        return next(iter(self.find_by(**kwargs).values()), None)
+
+    def find_grouped_by(self, field_names: List[str]) -> Optional[List[Tuple[Tuple[Any, ...], List[T]]]]:
+        """
+        Groups all objects by the values of provided json fields, grouping and sorting them on the database
+
+        The "hour", "weekday" (1 is Sunday), "month" and "year" fields are derived from the "datetime" field.
+
+        :returns: the list of groups values, in ascending order, with the related objects in the `find_by` order;
+        or None if the database cannot group by the fields
+        """
+        return None
+
     @abstractmethod
     def count(self) -> int:
         """Returns the count of saved objects"""
@@ -0,0 +1,34 @@
+import os
+from typing import Optional
+
+from common.database.cache.abstract_cache_dao import AbstractCacheDAO
+from common.database.cache.model.abstract_cache_data import AbstractCacheData
+from common.utils.caching import TTLCache
+
+IN_MEMORY_CACHE_SIZE = int(os.environ.get("IN_MEMORY_CACHE_SIZE", "500"))
+"""The maximum number of cached responses kept in memory, in front of the database cache"""
+
+
+class LRUCacheDAO(AbstractCacheDAO):
+    """A cache data access object keeping the most recently used entries in memory, in front of another one"""
+
+    def __init__(self, backing_cache_dao: AbstractCacheDAO, max_size: int = IN_MEMORY_CACHE_SIZE):
+        self.backing_cache_dao = backing_cache_dao
+        self._in_memory_cache: TTLCache[str, AbstractCacheData] = TTLCache(max_size)
+
+    def insert_cache(self, cache_data: AbstractCacheData):
+        self._in_memory_cache.put(cache_data.id, cache_data)
+        return self.backing_cache_dao.insert_cache(cache_data)
+
+    def find_by_id(self, cached_data_id: str) -> Optional[AbstractCacheData]:
+        found, cache_data = self._in_memory_cache.get(cached_data_id)
+        if not found:
+            cache_data = self.backing_cache_dao.find_by_id(cached_data_id)
+            if cache_data is not None:
+                self._in_memory_cache.put(cached_data_id, cache_data)
+
+        return cache_data
+
+    def delete_cache_with_id(self, cache_data_id: str):
+        self._in_memory_cache.remove(cache_data_id)
+        self.backing_cache_dao.delete_cache_with_id(cache_data_id)
@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from typing import ContextManager
 
 
 class AbstractConnectionManager(ABC):
@@ -17,3 +19,11 @@ class AbstractConnectionManager(ABC):
     def disconnect_from_db(self, alias: str = "default"):
         """Disconnects from the database"""
         pass
+
+    def deferred_writes(self) -> ContextManager:
+        """Context manager inside which writes may be coalesced and deferred, by default writes happen immediately"""
+        return nullcontext()
+
+    async def flush_deferred_writes(self):
+        """Saves the writes deferred so far, to be called before stopping; by default there are none"""
+        pass
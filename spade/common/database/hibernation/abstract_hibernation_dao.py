@@ -0,0 +1,28 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Mapping
+
+
+@dataclass
+class HibernatedFSMState:
+    """The state of a FSM behaviour, saved to be restored later"""
+
+    state_name: str
+    """The name of the current state of the FSM"""
+
+    state_data: Mapping[str, str]
+    """The data of the current state, needed to resume it"""
+
+
+class AbstractAgentHibernationDAO(ABC):
+    """An abstract Data Access Object for the FSM states of agents stopped because idle, until they are restarted"""
+
+    @abstractmethod
+    def save(self, owner_id: str, fsm_states: Mapping[str, HibernatedFSMState]):
+        """Saves the states of the FSM behaviours of provided owner, replacing previously saved ones"""
+        pass
+
+    @abstractmethod
+    def pop(self, owner_id: str) -> Mapping[str, HibernatedFSMState]:
+        """Retrieves and deletes the saved states of the FSM behaviours of provided owner, if any"""
+        pass
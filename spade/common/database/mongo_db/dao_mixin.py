@@ -1,13 +1,19 @@
 import logging
 from abc import ABC, abstractmethod
-from typing import Mapping, Optional, Type
+from typing import Mapping, Optional, Type, List, Tuple, Any
 
-from mongoengine import Document
+from mongoengine import Document, StringField, IntField, FloatField, BooleanField, DateTimeField
 
 from common.database.abstract_dao import AbstractDAO, T
 
 logger = logging.getLogger(__name__)
 
+_GROUPABLE_FIELD_TYPES = (StringField, IntField, FloatField, BooleanField)
+"""The types of fields whose values, in documents json, are the same used by MongoDB to group them"""
+
+_DATE_PART_OPERATORS = {"hour": "$hour", "weekday": "$dayOfWeek", "month": "$month", "year": "$year"}
+"""The MongoDB operators to extract the fields derived from the "datetime" field"""
+
 
 class MongoDBDAOMixin(AbstractDAO[T], ABC):
     """MongoDB Mixin class to automatically implement some AbstractDAO specified behaviour"""
@@ -27,13 +33,86 @@ class MongoDBDAOMixin(AbstractDAO[T], ABC):
         else:
             return {str(document.id): self.wrap_mongo_db_object(document) for document in documents}
 
+    def find_by_ids(self, object_ids: List[str]) -> Mapping[str, T]:
+        return self.find_by(id__in=object_ids) if object_ids else {}
+
+    def find_page(self, skip: int = 0, limit: Optional[int] = None, projection: Optional[List[str]] = None,
+                  after_id: Optional[str] = None, **kwargs) -> Mapping[str, T]:
+        if limit is not None and limit <= 0:
+            return {}  # MongoDB would consider a zero limit as no limit
+
+        documents = self._mongo_db_document_class.objects(**kwargs)
+        if after_id is not None:  # the keyset cursor needs the ID order, otherwise the model ordering is kept
+            documents = documents.filter(id__gt=after_id).order_by('id')
+        if projection:
+            documents = documents.only(*projection)
+
+        documents = documents.skip(skip)
+        if limit is not None:
+            documents = documents.limit(limit)
+
+        return {str(document.id): self.wrap_mongo_db_object(document) for document in documents}
+
+    def find_one_by(self, projection: Optional[List[str]] = None, **kwargs) -> Optional[T]:
+        documents = self._mongo_db_document_class.objects(**kwargs)
+        if projection:
+            documents = documents.only(*projection)
+
+        document = documents.first()
+        return self.wrap_mongo_db_object(document) if document is not None else None
+
+    def find_grouped_by(self, field_names: List[str]) -> Optional[List[Tuple[Tuple[Any, ...], List[T]]]]:
+        # Documents json uses database field names, so those are the names that can be grouped by
+        fields_by_db_name = {field.db_field: field for field in self._mongo_db_document_class._fields.values()}
+
+        dimension_expressions = {}
+        for index, field_name in enumerate(field_names):
+            datetime_field = fields_by_db_name.get("datetime", None)
+            field = fields_by_db_name.get(field_name, None)
+            if field_name in _DATE_PART_OPERATORS and isinstance(datetime_field, DateTimeField):
+                dimension_expressions[f"_dimension{index}"] = {_DATE_PART_OPERATORS[field_name]: "$datetime"}
+            elif isinstance(field, _GROUPABLE_FIELD_TYPES):
+                dimension_expressions[f"_dimension{index}"] = f"${field_name}"
+            else:
+                logger.debug(f" Cannot group `{self._mongo_db_document_class.__name__}` by `{field_name}` on MongoDB")
+                return None
+
+        # Sorting instead of grouping streams documents in groups order, without limits on group sizes
+        sort_order = {dimension_name: 1 for dimension_name in dimension_expressions.keys()}
+        sort_order.update(self._model_sort_order())
+        sort_order.setdefault("_id", 1)
+        documents = self._mongo_db_document_class.objects.aggregate([
+            {"$addFields": dimension_expressions},
+            {"$sort": sort_order},
+        ], allowDiskUse=True)
+
+        groups = []
+        for document in documents:
+            group_values = tuple(document.pop(dimension_name, None) for dimension_name in dimension_expressions)
+            if not groups or groups[-1][0] != group_values:
+                groups.append((group_values, []))
+
+            groups[-1][1].append(self.wrap_mongo_db_object(self._mongo_db_document_class._from_son(document)))
+
+        return groups
+
+    def _model_sort_order(self) -> Mapping[str, int]:
+        """Utility method to convert the model default ordering into a MongoDB sort stage"""
+
+        sort_order = {}
+        for ordering_field in self._mongo_db_document_class._meta.get('ordering', []):
+            field_name = ordering_field.lstrip('-+')
+            field = self._mongo_db_document_class._fields.get(field_name, None)
+            sort_order[field.db_field if field is not None else field_name] = -1 if ordering_field[0] == '-' else 1
+
+        return sort_order
+
     def count(self) -> int:
         return self._mongo_db_document_class.objects.count()
 
     def delete_by_id(self, object_id: str) -> bool:
-        object_with_id = self._mongo_db_document_class.objects().with_id(object_id)
-        object_with_id.delete()
-        return True
+        deleted_count = self._mongo_db_document_class.objects(id=object_id).delete()
+        return deleted_count > 0
 
     @abstractmethod
     def wrap_mongo_db_object(self, mongo_db_object: Document) -> T:
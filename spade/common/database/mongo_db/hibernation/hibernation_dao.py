@@ -0,0 +1,35 @@
+import datetime
+import logging
+from typing import Mapping, Optional
+
+from common.database.hibernation.abstract_hibernation_dao import AbstractAgentHibernationDAO, HibernatedFSMState
+from common.database.mongo_db.models import HibernatedAgent, HibernatedFSMBehaviourState
+
+logger = logging.getLogger(__name__)
+
+
+class MongoDBAgentHibernationDAO(AbstractAgentHibernationDAO):
+    """Actual implementation for mongoDB of the agent hibernation data access object"""
+
+    def save(self, owner_id: str, fsm_states: Mapping[str, HibernatedFSMState]):
+        HibernatedAgent(
+            id=owner_id,
+            hibernated_at=datetime.datetime.now(),
+            fsm_states=[
+                HibernatedFSMBehaviourState(
+                    behaviour_key=behaviour_key, state_name=fsm_state.state_name, state_data=dict(fsm_state.state_data)
+                )
+                for behaviour_key, fsm_state in fsm_states.items()
+            ]
+        ).save()
+        logger.info(f" Saved hibernated FSM states of `{owner_id}`")
+
+    def pop(self, owner_id: str) -> Mapping[str, HibernatedFSMState]:
+        hibernated_agent: Optional[HibernatedAgent] = HibernatedAgent.objects(id=owner_id).modify(remove=True)
+        if hibernated_agent is None:
+            return {}
+
+        return {
+            behaviour_state.behaviour_key: HibernatedFSMState(behaviour_state.state_name, behaviour_state.state_data)
+            for behaviour_state in hibernated_agent.fsm_states
+        }
@@ -1,7 +1,7 @@
 import datetime
 
 from mongoengine import Document, StringField, DateTimeField, IntField, EmbeddedDocument, ReferenceField, ListField, \
-    EmbeddedDocumentListField, BooleanField, EmbeddedDocumentField
+    EmbeddedDocumentListField, BooleanField, EmbeddedDocumentField, DictField
 
 from common.chat.language_enum import Language
 from common.database.persuation.field_enums import ActionTypeField, QueryTypeField
@@ -20,6 +20,43 @@ class CacheData(Document):
     }
 
 
+class CollectionVersion(Document):
+    """Model class for the version of a collection, bumped at each change of its data"""
+
+    id = StringField(primary_key=True)
+    version = IntField(required=True, default=0)
+
+
+class UserIDMapping(Document):
+    """Model class for the mapping from a messaging platform sender ID to the system user ID"""
+
+    id = StringField(primary_key=True)
+    user_id = StringField(required=True)
+    last_used = DateTimeField(required=True)
+
+    meta = {
+        'collection': 'user_id_mapping',
+        'ordering': ['-last_used'],
+        'indexes': ['-last_used']
+    }
+
+
+class HibernatedFSMBehaviourState(EmbeddedDocument):
+    """Model class for the state of a FSM behaviour of an hibernated agent"""
+
+    behaviour_key = StringField(required=True)
+    state_name = StringField(required=True)
+    state_data = DictField()
+
+
+class HibernatedAgent(Document):
+    """Model class for the FSM states of an agent stopped because idle, kept until it is restarted"""
+
+    id = StringField(primary_key=True)
+    hibernated_at = DateTimeField(required=True)
+    fsm_states = EmbeddedDocumentListField(HibernatedFSMBehaviourState)
+
+
 # TODO 04/06/2020: This class should be used to refactor suggestion events in Profiles chatBot
 class AbstractSuggestionEvent(EmbeddedDocument):
     """Abstract model class to represent all events which carry a suggestion to be evaluated by the user"""
@@ -0,0 +1,71 @@
+import logging
+import threading
+from typing import Type, List, Set, Tuple
+
+from mongoengine import Document
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+_ensured_indexes: Set[Tuple[str, str]] = set()
+"""The (collection, field) pairs whose index was already ensured by this process"""
+
+_ensured_indexes_lock = threading.Lock()
+
+
+def find_duplicate_values(document_class: Type[Document], db_field: str) -> List[dict]:
+    """Finds the values of the field shared by more than one document, with the IDs of those documents"""
+
+    return list(document_class.objects.aggregate([
+        {"$match": {db_field: {"$exists": True, "$ne": None}}},
+        {"$group": {"_id": f"${db_field}", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ], allowDiskUse=True))
+
+
+def ensure_unique_sparse_index(document_class: Type[Document], db_field: str):
+    """
+    Creates a unique sparse index on the field, once per process, if existing documents allow it
+
+    When documents already share values of the field they are logged, to be fixed by hand, and a not unique index
+    is created instead, so that lookups by the field stay fast
+    """
+
+    collection = document_class._get_collection()
+    with _ensured_indexes_lock:
+        if (collection.name, db_field) in _ensured_indexes:
+            return
+
+    _create_index(document_class, collection, db_field)
+    with _ensured_indexes_lock:
+        _ensured_indexes.add((collection.name, db_field))
+
+
+def _create_index(document_class: Type[Document], collection: Collection, db_field: str):
+    """Utility function to create the unique index if possible, otherwise a not unique one"""
+
+    index_name = f"{db_field}_1"
+    existing_index = collection.index_information().get(index_name, None)
+    if existing_index is not None and existing_index.get("unique", False):
+        return
+
+    duplicates = find_duplicate_values(document_class, db_field)
+    if duplicates:
+        for duplicate in duplicates:
+            logger.error(f" Documents {[str(object_id) for object_id in duplicate['ids']]} of `{collection.name}` "
+                         f"share `{db_field}` = `{duplicate['_id']}`; fix them to make the field unique")
+
+        if existing_index is None:
+            collection.create_index(db_field, sparse=True, name=index_name)
+        return
+
+    try:
+        if existing_index is not None:
+            collection.drop_index(index_name)  # a not unique index, created when duplicates were present
+        collection.create_index(db_field, unique=True, sparse=True, name=index_name)
+        logger.info(f" Created unique index on `{collection.name}.{db_field}`")
+    except OperationFailure:
+        # A duplicate may have been inserted meanwhile: lookups stay fast, uniqueness will be retried on restart
+        logger.exception(f" Cannot create unique index on `{collection.name}.{db_field}`")
+        collection.create_index(db_field, sparse=True, name=index_name)
@@ -0,0 +1,23 @@
+import datetime
+from typing import Mapping
+
+from common.database.mongo_db.models import UserIDMapping
+from common.database.user_id_mapping.abstract_user_id_mapping_dao import AbstractUserIDMappingDAO
+
+
+class MongoDBUserIDMappingDAO(AbstractUserIDMappingDAO):
+    """Actual implementation for mongoDB of the user ID mapping data access object"""
+
+    def save(self, platform_key: str, user_id: str):
+        UserIDMapping.objects(id=platform_key).update_one(
+            upsert=True, set__user_id=user_id, set__last_used=datetime.datetime.now()
+        )
+
+    def find_recent(self, max_count: int, used_after: datetime.datetime) -> Mapping[str, str]:
+        return {
+            mapping.id: mapping.user_id
+            for mapping in UserIDMapping.objects(last_used__gt=used_after).only('id', 'user_id').limit(max_count)
+        }
+
+    def touch(self, platform_key: str):
+        UserIDMapping.objects(id=platform_key).update_one(set__last_used=datetime.datetime.now())
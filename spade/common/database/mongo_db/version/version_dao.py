@@ -0,0 +1,25 @@
+import logging
+from typing import List, Mapping
+
+from common.database.mongo_db.models import CollectionVersion
+from common.database.version.abstract_version_dao import AbstractCollectionVersionDAO
+
+logger = logging.getLogger(__name__)
+
+
+class MongoDBCollectionVersionDAO(AbstractCollectionVersionDAO):
+    """Actual implementation for mongoDB of the collection version data access object"""
+
+    def get_versions(self, collection_names: List[str]) -> Mapping[str, int]:
+        stored_versions = {
+            collection_version.id: collection_version.version
+            for collection_version in CollectionVersion.objects(id__in=collection_names)
+        }
+        return {collection_name: stored_versions.get(collection_name, 0) for collection_name in collection_names}
+
+    def bump_version(self, collection_name: str) -> int:
+        collection_version: CollectionVersion = CollectionVersion.objects(id=collection_name).modify(
+            upsert=True, new=True, inc__version=1
+        )
+        logger.info(f" Collection `{collection_name}` is now at version {collection_version.version}")
+        return collection_version.version
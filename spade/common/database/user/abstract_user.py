@@ -57,3 +57,7 @@ class AbstractBasicUser(AbstractJsonConvertible, ABC):
     def last_interaction(self, new_value: datetime):
         """Setter for last_interaction field"""
         pass
+
+    def invalidate_cached_data(self):
+        """Drops any locally cached data, so that next reads are served by the storage"""
+        pass
@@ -0,0 +1,28 @@
+import json
+from dataclasses import dataclass
+
+from common.database.json_convertible import AbstractJsonConvertible
+
+
+@dataclass
+class PlatformUserIdentity(AbstractJsonConvertible):
+    """The system user corresponding to a messaging platform user, without the rest of the user data"""
+
+    user_id: str
+    """The ID of the system user"""
+
+    registration_completed: bool
+    """Whether the user completed the registration"""
+
+    def to_json_string(self) -> str:
+        return json.dumps({
+            'id': self.user_id,
+            'registration_completed': self.registration_completed,
+        })
+
+    @staticmethod
+    def from_json_string(json_string: str) -> 'PlatformUserIdentity':
+        """Creates the identity from its JSON string"""
+
+        json_object = json.loads(json_string)
+        return PlatformUserIdentity(json_object['id'], json_object.get('registration_completed', False))
@@ -0,0 +1,22 @@
+import datetime
+from abc import ABC, abstractmethod
+from typing import Mapping
+
+
+class AbstractUserIDMappingDAO(ABC):
+    """An abstract Data Access Object for the mappings from messaging platform sender IDs to system user IDs"""
+
+    @abstractmethod
+    def save(self, platform_key: str, user_id: str):
+        """Saves the user ID of provided messaging platform sender, marking the mapping as just used"""
+        pass
+
+    @abstractmethod
+    def find_recent(self, max_count: int, used_after: datetime.datetime) -> Mapping[str, str]:
+        """Retrieves at most `max_count` mappings used after provided time, the most recently used first"""
+        pass
+
+    @abstractmethod
+    def touch(self, platform_key: str):
+        """Marks the mapping of provided messaging platform sender as just used, if present"""
+        pass
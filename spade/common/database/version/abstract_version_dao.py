@@ -0,0 +1,16 @@
+from abc import ABC, abstractmethod
+from typing import List, Mapping
+
+
+class AbstractCollectionVersionDAO(ABC):
+    """An abstract Data Access Object for collection versions, bumped at each change of a collection data"""
+
+    @abstractmethod
+    def get_versions(self, collection_names: List[str]) -> Mapping[str, int]:
+        """Retrieves the current versions of provided collections; never changed collections are at version 0"""
+        pass
+
+    @abstractmethod
+    def bump_version(self, collection_name: str) -> int:
+        """Increments the version of provided collection, returning the new version"""
+        pass
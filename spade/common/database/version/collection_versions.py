@@ -0,0 +1,70 @@
+from __future__ import annotations  # Needed in python 3.7 to have the current class type as a return type of methods
+
+import logging
+import os
+import threading
+import time
+from typing import MutableMapping, Optional
+
+from common.database.version.abstract_version_dao import AbstractCollectionVersionDAO
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_VERSION_CHECK_PERIOD_SECONDS = float(os.environ.get("COLLECTION_VERSION_CHECK_PERIOD_SECONDS", "5"))
+"""The minimum time between two reads of collection versions from the database"""
+
+
+class CollectionVersions:
+    """
+    A thread-safe singleton class keeping in memory the versions of collections
+
+    Versions bumped in this process are known immediately, while versions bumped by other processes
+    are read from the database at most once per check period
+    """
+
+    __instance: CollectionVersions = None
+
+    @staticmethod
+    def get_instance(collection_version_dao: AbstractCollectionVersionDAO) -> CollectionVersions:
+        if CollectionVersions.__instance is None:
+            with threading.Lock():  # defensive programming for multiple thread calls to get_instance the first time
+                if CollectionVersions.__instance is None:
+                    CollectionVersions(collection_version_dao)  # actual creation
+
+        return CollectionVersions.__instance
+
+    def __init__(self, collection_version_dao: AbstractCollectionVersionDAO):
+        if CollectionVersions.__instance is not None:
+            raise Exception("This is a singleton class, use get_instance method to get the instance")
+        else:
+            self.collection_version_dao = collection_version_dao
+
+            self._lock = threading.Lock()
+            self._versions: MutableMapping[str, int] = {}
+            self._last_check: Optional[float] = None
+
+            CollectionVersions.__instance = self
+
+    def version_of(self, collection_name: str) -> int:
+        """Gets the version of provided collection"""
+
+        with self._lock:
+            now = time.monotonic()
+            if (collection_name not in self._versions or self._last_check is None or
+                    now - self._last_check >= COLLECTION_VERSION_CHECK_PERIOD_SECONDS):
+                self._versions.update(
+                    self.collection_version_dao.get_versions(list({*self._versions.keys(), collection_name}))
+                )
+                self._last_check = now
+
+            return self._versions[collection_name]
+
+    def bump(self, collection_name: str) -> int:
+        """Increments the version of provided collection, returning the new version"""
+
+        new_version = self.collection_version_dao.bump_version(collection_name)
+        with self._lock:
+            self._versions[collection_name] = new_version
+
+        logger.debug(f" Collection `{collection_name}` is now at version {new_version}")
+        return new_version
@@ -2,7 +2,7 @@ from __future__ import annotations  # Needed in python 3.7 to have the current c
 
 import logging
 import sys
-from typing import List, Optional, Any, Mapping
+from typing import List, Optional, Any, Mapping, Dict, Tuple
 
 import requests
 from bson import json_util
@@ -96,6 +96,7 @@ class PryvAPI:
             sort_ascending: Optional[bool] = None,
             skip: Optional[int] = None,
             limit: Optional[int] = sys.maxsize / 2,
+            modified_since: Optional[float] = None,
     ) -> List[PryvEvent]:
         """Get events from Pryv API"""
 
@@ -121,12 +122,82 @@ class PryvAPI:
             params['skip'] = skip
         if limit is not None:
             params['limit'] = limit
+        if modified_since is not None:
+            params['modifiedSince'] = modified_since
 
         logger.debug(f" Retrieving events at: {actual_endpoint} with params {str(params)}")
         response = requests.get(actual_endpoint, params)
         logger.debug(f" Response: {response.json()}")
         return [PryvEvent(event) for event in response.json().get('events', [])]
 
+    def get_event_changes(
+            self,
+            user_api_endpoint_with_token: str,
+            modified_since: float,
+            streams: Optional[List[str]] = None,
+    ) -> Tuple[List[PryvEvent], List[str]]:
+        """Get events modified (trashed included) and ids of events deleted, since provided time"""
+
+        if user_api_endpoint_with_token is None:
+            logger.warning(f" Could not query Pryv!! Provided user API endpoint is None")
+            return [], []
+
+        actual_endpoint = (
+            f"{self.extract_user_api(user_api_endpoint_with_token)}events"
+            f"?auth={self.extract_user_token(user_api_endpoint_with_token)}"
+        )
+
+        params = {
+            'modifiedSince': modified_since,
+            'state': 'all',
+            'includeDeletions': 'true',
+            'sortAscending': 'true',
+            'limit': sys.maxsize / 2,
+        }
+        if streams is not None:
+            params['streams'] = streams
+
+        logger.debug(f" Retrieving event changes at: {actual_endpoint} with params {str(params)}")
+        response = requests.get(actual_endpoint, params)
+        logger.debug(f" Response: {response.json()}")
+        return (
+            [PryvEvent(event) for event in response.json().get('events', [])],
+            [deletion.get('id') for deletion in response.json().get('eventDeletions', [])]
+        )
+
+    def get_last_events_of(
+            self,
+            user_api_endpoint_with_token: str,
+            stream_ids: List[str]
+    ) -> Dict[str, Optional[PryvEvent]]:
+        """Get the last event of each provided stream, with one Pryv batch call"""
+
+        if user_api_endpoint_with_token is None:
+            logger.warning(f" Could not query Pryv!! Provided user API endpoint is None")
+            return {}
+
+        actual_endpoint = (
+            f"{self.extract_user_api(user_api_endpoint_with_token)}"
+            f"?auth={self.extract_user_token(user_api_endpoint_with_token)}"
+        )
+
+        logger.debug(f" Retrieving last events at: {actual_endpoint} for streams {str(stream_ids)}")
+        response = requests.post(actual_endpoint, json=[
+            {'method': 'events.get', 'params': {'streams': [stream_id], 'limit': 1}}
+            for stream_id in stream_ids
+        ])
+        logger.debug(f" Response: {response.json()}")
+
+        results = response.json().get('results', [])
+        if len(results) != len(stream_ids):
+            logger.error(f" Error retrieving last events: [{response.status_code}] {str(response.json())}")
+            return {}
+
+        return {
+            stream_id: next((PryvEvent(event) for event in result.get('events', [])), None)
+            for stream_id, result in zip(stream_ids, results)
+        }
+
     def create_event(
             self,
             user_api_endpoint_with_token: str,
@@ -344,10 +415,12 @@ class PryvAPI:
         return None
 
     @staticmethod
-    def save_changes_to_event(pryv_api: PryvAPI, api_endpoint: str, event_id: str, new_json_object: dict):
+    def save_changes_to_event(
+            pryv_api: PryvAPI, api_endpoint: str, event_id: str, new_json_object: dict
+    ) -> Optional[PryvEvent]:
         """Saves changes to provided event on Pryv"""
 
-        pryv_api.update_event(
+        return pryv_api.update_event(
             api_endpoint,
             event_id,
             {'content': json_util.dumps(remove_keys_with_none_values(new_json_object))}
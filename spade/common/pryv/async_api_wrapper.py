@@ -0,0 +1,487 @@
+from __future__ import annotations  # Needed in python 3.7 to have the current class type as a return type of methods
+
+import asyncio
+import json
+import logging
+import sys
+from typing import List, Optional, Any, Mapping, MutableMapping, Tuple, Dict
+
+import aiohttp
+from bson import json_util
+
+from common.pryv.api_wrapper import PryvAPI
+from common.pryv.model import (
+    ServiceInfo, DataAccessPermission, AuthResponse, AuthStatus, PryvEvent, PryvStream, AccessInfo, PryvAttachment
+)
+from common.pryv.server_domain import PRYV_PROJECT_ID, PRYV_PROJECT_NAME, PRYV_REQUEST_TIMEOUT_SECONDS
+from common.utils.dictionaries import remove_keys_with_none_values
+from echo.common.database.mongo_db_pryv_hybrid.models import PryvStoredData
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPryvAPI:
+    """
+    A class wrapping Pryv API calls with awaitable methods, not blocking the asyncio event loop
+
+    Methods have the same signatures of the ones in PryvAPI; HTTP connections are kept alive and reused,
+    through one connection pool shared by all instances pointing to the same Pryv domain
+    """
+
+    SERVICE_INFO_ENDPOINT = PryvAPI.SERVICE_INFO_ENDPOINT
+
+    MAX_CONNECTIONS_PER_HOST = 10
+    """The max number of simultaneously open connections towards the same Pryv host"""
+
+    _sessions: MutableMapping[str, aiohttp.ClientSession] = {}
+    """The client sessions (hence connection pools) shared among instances, by Pryv domain"""
+
+    def __init__(self, domain: str, request_timeout_seconds: float = PRYV_REQUEST_TIMEOUT_SECONDS):
+        self.domain = domain
+        self.register_inferred_url = f"https://reg.{domain}"
+        self.request_timeout = aiohttp.ClientTimeout(total=request_timeout_seconds)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Retrieves the keep-alive client session for the current domain, creating it if needed"""
+
+        session = AsyncPryvAPI._sessions.get(self.domain, None)
+        if session is None or session.closed or session.loop is not asyncio.get_event_loop():
+            if session is not None and not session.closed:
+                self._close_session_of_other_loop(session)
+
+            logger.info(f" Creating Pryv connection pool for domain `{self.domain}`")
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=self.MAX_CONNECTIONS_PER_HOST),
+                timeout=self.request_timeout
+            )
+            AsyncPryvAPI._sessions[self.domain] = session
+
+        return session
+
+    def _close_session_of_other_loop(self, session: aiohttp.ClientSession):
+        """Utility method to close a session created on another event loop, on that loop if it is still running"""
+
+        session_loop = session.loop
+        if session_loop.is_running():
+            session_loop.call_soon_threadsafe(lambda: asyncio.ensure_future(session.close(), loop=session_loop))
+        else:
+            # The session cannot be awaited on a stopped loop, so only its connections are closed
+            connector = session.connector
+            session.detach()
+            if connector is not None:
+                try:
+                    connector.close()
+                except Exception:
+                    logger.exception(f" Cannot close Pryv connections for domain `{self.domain}`")
+
+        logger.info(f" Closed Pryv connection pool for domain `{self.domain}` of another event loop")
+
+    async def close(self):
+        """Closes the connection pool of the current domain, to be called when stopping; it is created again if used"""
+
+        session = AsyncPryvAPI._sessions.pop(self.domain, None)
+        if session is not None and not session.closed:
+            await session.close()
+            logger.info(f" Closed Pryv connection pool for domain `{self.domain}`")
+
+    @staticmethod
+    async def _json_of(response: aiohttp.ClientResponse) -> Any:
+        """
+        Utility method to read the JSON body of a response
+
+        Error responses may have not JSON bodies, like the ones of proxies, which are returned as the `error` field
+        """
+
+        if response.ok:
+            return await response.json()
+
+        body = await response.text()
+        try:
+            return json.loads(body)
+        except ValueError:
+            return {'error': body}
+
+    @staticmethod
+    def _to_query_params(params: Mapping[str, Any]) -> List[Tuple[str, str]]:
+        """Utility method to convert query params to the string format accepted by aiohttp"""
+
+        query_params = []
+        for key, value in params.items():
+            values = value if isinstance(value, list) else [value]
+            for a_value in values:
+                if isinstance(a_value, bool):
+                    query_params.append((key, str(a_value).lower()))
+                elif key in ['skip', 'limit']:
+                    query_params.append((key, str(int(a_value))))
+                else:
+                    query_params.append((key, str(a_value)))
+
+        return query_params
+
+    @staticmethod
+    def _events_endpoint(user_api_endpoint_with_token: str, event_id: Optional[str] = None) -> str:
+        """Utility method to compose the events endpoint (optionally of one event) of provided user"""
+
+        return (
+            f"{PryvAPI.extract_user_api(user_api_endpoint_with_token)}events"
+            f"{f'/{event_id}' if event_id else ''}"
+            f"?auth={PryvAPI.extract_user_token(user_api_endpoint_with_token)}"
+        )
+
+    @property
+    async def service_info(self) -> ServiceInfo:
+        """Retrieves service info from Pryv domain"""
+
+        to_fetch_url = f"{self.register_inferred_url}{self.SERVICE_INFO_ENDPOINT}"
+        logger.info(f" Getting service_info at `{to_fetch_url}`")
+
+        async with self._get_session().get(to_fetch_url, timeout=self.request_timeout) as response:
+            return ServiceInfo(await self._json_of(response))
+
+    async def request_auth(
+            self,
+            requesting_app_id: str,
+            requested_permissions: List[DataAccessPermission],
+            language_code: Optional[str] = None,
+            return_url: Optional[str] = None
+    ) -> AuthResponse:
+        """Requests for app authorization"""
+
+        access_url = (await self.service_info).access
+        logger.info(f" Doing request_auth, using access url: `{access_url}`")
+        async with self._get_session().post(access_url, timeout=self.request_timeout, json={
+            'requestingAppId': requesting_app_id,
+            'requestedPermissions': [
+                permission.to_json() for permission in requested_permissions
+            ],
+            'languageCode': language_code,
+            'returnURL': return_url
+        }) as response:
+            response_json = await self._json_of(response)
+            logger.debug(f" request_auth() response: `{str(response_json)}`")
+            return AuthResponse(response_json)
+
+    async def fetch_poll_url(self, previous_auth_response: AuthResponse) -> AuthResponse:
+        """Fetches the poll url of the AuthResponse if sign-in was needed"""
+
+        if previous_auth_response.status == AuthStatus.ACCEPTED:
+            logger.info(f" Auth accepted. {previous_auth_response.to_json_string()}")
+            return previous_auth_response
+        elif previous_auth_response.status == AuthStatus.REFUSED:
+            logger.info(f" Auth refused. {previous_auth_response.to_json_string()}")
+            return previous_auth_response
+        else:
+            poll_url = previous_auth_response.poll
+            logger.info(f" Doing polling at: `{poll_url}`")
+            async with self._get_session().get(poll_url, timeout=self.request_timeout) as response:
+                return AuthResponse(await self._json_of(response))
+
+    async def get_events(
+            self,
+            user_api_endpoint_with_token: str,
+            from_timestamp: Optional[float] = None,
+            to_timestamp: Optional[float] = None,
+            streams: Optional[List[str]] = None,
+            sort_ascending: Optional[bool] = None,
+            skip: Optional[int] = None,
+            limit: Optional[int] = sys.maxsize / 2,
+            modified_since: Optional[float] = None,
+    ) -> List[PryvEvent]:
+        """Get events from Pryv API"""
+
+        if user_api_endpoint_with_token is None:
+            logger.warning(f" Could not query Pryv!! Provided user API endpoint is None")
+            return []
+
+        actual_endpoint = self._events_endpoint(user_api_endpoint_with_token)
+
+        params = {}
+        if from_timestamp is not None:
+            params['fromTime'] = from_timestamp
+        if to_timestamp is not None:
+            params['toTime'] = to_timestamp
+        if streams is not None:
+            params['streams'] = streams
+        if sort_ascending is not None:
+            params['sortAscending'] = sort_ascending
+        if skip is not None:
+            params['skip'] = skip
+        if limit is not None:
+            params['limit'] = limit
+        if modified_since is not None:
+            params['modifiedSince'] = modified_since
+
+        logger.debug(f" Retrieving events at: {actual_endpoint} with params {str(params)}")
+        async with self._get_session().get(
+                actual_endpoint, params=self._to_query_params(params), timeout=self.request_timeout
+        ) as response:
+            response_json = await self._json_of(response)
+            logger.debug(f" Response: {response_json}")
+            if not response.ok:
+                logger.error(f" Error retrieving events: [{response.status}] {str(response_json)}")
+                return []
+
+            return [PryvEvent(event) for event in response_json.get('events', [])]
+
+    async def get_last_events_of(
+            self,
+            user_api_endpoint_with_token: str,
+            stream_ids: List[str]
+    ) -> Dict[str, Optional[PryvEvent]]:
+        """Get the last event of each provided stream, with one Pryv batch call"""
+
+        if user_api_endpoint_with_token is None:
+            logger.warning(f" Could not query Pryv!! Provided user API endpoint is None")
+            return {}
+
+        actual_endpoint = (
+            f"{PryvAPI.extract_user_api(user_api_endpoint_with_token)}"
+            f"?auth={PryvAPI.extract_user_token(user_api_endpoint_with_token)}"
+        )
+
+        logger.debug(f" Retrieving last events at: {actual_endpoint} for streams {str(stream_ids)}")
+        async with self._get_session().post(actual_endpoint, timeout=self.request_timeout, json=[
+            {'method': 'events.get', 'params': {'streams': [stream_id], 'limit': 1}}
+            for stream_id in stream_ids
+        ]) as response:
+            response_json = await self._json_of(response)
+            logger.debug(f" Response: {response_json}")
+
+            results = response_json.get('results', [])
+            if len(results) != len(stream_ids):
+                logger.error(f" Error retrieving last events: [{response.status}] {str(response_json)}")
+                return {}
+
+            return {
+                stream_id: next((PryvEvent(event) for event in result.get('events', [])), None)
+                for stream_id, result in zip(stream_ids, results)
+            }
+
+    async def create_event(
+            self,
+            user_api_endpoint_with_token: str,
+            stream_ids: List[str],
+            content: Any,
+            content_type: str = 'note/txt'
+    ) -> Optional[PryvEvent]:
+        """Create an event for the provided stream"""
+
+        if user_api_endpoint_with_token is None:
+            logger.warning(f" Not creating event!! Provided user API endpoint is None")
+            return None
+
+        actual_endpoint = self._events_endpoint(user_api_endpoint_with_token)
+
+        logger.info(f" Creating event at: {actual_endpoint}")
+        async with self._get_session().post(actual_endpoint, timeout=self.request_timeout, json=PryvEvent.of(
+                stream_ids=stream_ids,
+                content=content,
+                content_type=content_type
+        ).to_json()) as response:
+            response_json = await self._json_of(response)
+            if response.status == 201:
+                return PryvEvent(response_json.get('event'))
+            else:
+                logger.error(f" Error creating event: [{response.status}] {str(response_json)}")
+                return None
+
+    async def update_event(
+            self,
+            user_api_endpoint_with_token: str,
+            to_modify_event_id: str,
+            new_event_fields: Mapping
+    ) -> Optional[PryvEvent]:
+        """Update an event for the provided stream"""
+
+        if user_api_endpoint_with_token is None:
+            logger.warning(f" Not updating event!! Provided user API endpoint is None")
+            return None
+
+        actual_endpoint = self._events_endpoint(user_api_endpoint_with_token, to_modify_event_id)
+
+        logger.info(f" Updating event at: {actual_endpoint}")
+        async with self._get_session().put(
+                actual_endpoint, json=new_event_fields, timeout=self.request_timeout
+        ) as response:
+            response_json = await self._json_of(response)
+            if response.status == 200:
+                return PryvEvent(response_json.get('event'))
+            else:
+                logger.error(f" Error updating event: [{response.status}] {str(response_json)}")
+                return None
+
+    async def delete_event(
+            self,
+            user_api_endpoint_with_token: str,
+            to_delete_event_id: str
+    ) -> Optional[PryvEvent]:
+        """Trash/Delete an event for the provided stream"""
+
+        if user_api_endpoint_with_token is None:
+            logger.warning(f" Not deleting event!! Provided user API endpoint is None")
+            return None
+
+        actual_endpoint = self._events_endpoint(user_api_endpoint_with_token, to_delete_event_id)
+
+        logger.info(f" Deleting event at: {actual_endpoint}")
+        async with self._get_session().delete(actual_endpoint, timeout=self.request_timeout) as response:
+            response_json = await self._json_of(response)
+            if response.status == 200:
+                deleted_event = response_json.get('event', None)
+                return PryvEvent(deleted_event) if deleted_event is not None else None
+            else:
+                logger.error(f" Error deleting event: [{response.status}] {str(response_json)}")
+                return None
+
+    async def add_attachment(
+            self,
+            user_api_endpoint_with_token: str,
+            event_id: str,
+            attachment: Any,
+    ) -> Optional[PryvEvent]:
+        """Add an attachment to the provided event"""
+
+        if user_api_endpoint_with_token is None:
+            logger.warning(f" Not adding attachment!! Provided user API endpoint is None")
+            return None
+
+        actual_endpoint = self._events_endpoint(user_api_endpoint_with_token, event_id)
+
+        form_data = aiohttp.FormData()
+        form_data.add_field('file', attachment, filename='test.jpg', content_type='image/jpg')
+
+        logger.info(f" Adding attachment to event: {actual_endpoint}")
+        async with self._get_session().post(actual_endpoint, data=form_data, timeout=self.request_timeout) as response:
+            response_json = await self._json_of(response)
+            if response.status == 200:
+                return PryvEvent(response_json.get('event'))
+            else:
+                logger.error(f" Error adding attachment: [{response.status}] {str(response_json)}")
+                return None
+
+    async def get_attachment(
+            self,
+            user_api_endpoint_with_token: str,
+            event_id: str,
+            attachment_id: str,
+            read_token: str
+    ) -> Optional[PryvAttachment]:
+        """Retrieve an attachment for the provided event"""
+
+        if user_api_endpoint_with_token is None:
+            logger.warning(f" Not retrieving attachment!! Provided user API endpoint is None")
+            return None
+
+        actual_endpoint = (
+            f"{PryvAPI.extract_user_api(user_api_endpoint_with_token)}events/{event_id}/{attachment_id}/image.jpg"
+            f"?readToken={read_token}"
+        )
+
+        logger.info(f" Retrieving attachment of event: {actual_endpoint}")
+        async with self._get_session().get(
+                actual_endpoint,
+                headers={"Authorization": PryvAPI.extract_user_token(user_api_endpoint_with_token)},
+                timeout=self.request_timeout
+        ) as response:
+            response_json = await self._json_of(response)
+            if response.status == 200:
+                return PryvAttachment(response_json.get('attachment'))
+            else:
+                logger.error(f" Error retrieving attachment: [{response.status}] {str(response_json)}")
+                return None
+
+    async def check_stream_presence(
+            self,
+            user_api_endpoint_with_token: str,
+            to_find_stream_id: str
+    ) -> Optional[PryvStream]:
+        """Gets stream info, returns None in case the stream is not present"""
+
+        if user_api_endpoint_with_token is None:
+            logger.warning(f" Couldn't check stream presence!! Provided user API endpoint is None")
+            return None
+
+        actual_endpoint = (
+            f"{PryvAPI.extract_user_api(user_api_endpoint_with_token)}streams"
+            f"?auth={PryvAPI.extract_user_token(user_api_endpoint_with_token)}"
+        )
+
+        async with self._get_session().get(actual_endpoint, timeout=self.request_timeout) as response:
+            response_json = await self._json_of(response)
+            retrieved_streams = [PryvStream(stream) for stream in response_json.get('streams', [])]
+
+        for stream in retrieved_streams:
+            if stream.id == to_find_stream_id:
+                return stream
+
+        return None
+
+    async def create_stream(
+            self,
+            user_api_endpoint_with_token: str,
+            stream_id: str,
+            name: str,
+            parent_id: str = None
+    ) -> Optional[PryvStream]:
+        """Create a stream if not already present"""
+
+        if user_api_endpoint_with_token is None:
+            logger.warning(f" Not creating stream!! Provided user API endpoint is None")
+            return None
+
+        actual_endpoint = (
+            f"{PryvAPI.extract_user_api(user_api_endpoint_with_token)}streams"
+            f"?auth={PryvAPI.extract_user_token(user_api_endpoint_with_token)}"
+        )
+
+        logger.info(f" Creating stream at: {actual_endpoint}")
+        async with self._get_session().post(actual_endpoint, timeout=self.request_timeout, json=PryvStream.of(
+                stream_id=stream_id,
+                name=name,
+                parent_id=parent_id
+        ).to_json()) as response:
+            response_json = await self._json_of(response)
+            if response.status == 201:
+                logger.info(f" Successfully created stream: [id: {stream_id}, name: {name}]")
+                return PryvStream(response_json.get('stream'))
+            else:
+                logger.error(f" Error creating stream: [{response.status}] {str(response_json)}")
+                return None
+
+    async def get_access_info(
+            self,
+            user_api_endpoint_with_token: str,
+    ) -> Optional[AccessInfo]:
+        """Gets access info about the provided token"""
+
+        actual_endpoint = (
+            f"{PryvAPI.extract_user_api(user_api_endpoint_with_token)}access-info"
+            f"?auth={PryvAPI.extract_user_token(user_api_endpoint_with_token)}"
+        )
+        async with self._get_session().get(actual_endpoint, timeout=self.request_timeout) as response:
+            if response.status == 200:
+                json_response = await self._json_of(response)
+                if json_response.get('error', None) is None:
+                    return AccessInfo(json_response)
+            else:
+                logger.exception(f"Pryv access info failed: {response.status}")
+
+        return None
+
+    @staticmethod
+    async def save_changes_to_event(pryv_api: AsyncPryvAPI, api_endpoint: str, event_id: str, new_json_object: dict):
+        """Saves changes to provided event on Pryv"""
+
+        await pryv_api.update_event(
+            api_endpoint,
+            event_id,
+            {'content': json_util.dumps(remove_keys_with_none_values(new_json_object))}
+        )
+
+    async def create_stream_structure(self, user_api_endpoint_with_token: str):
+        """Creates the initial stream structure of the application"""
+
+        await self.create_stream(user_api_endpoint_with_token, PRYV_PROJECT_ID, PRYV_PROJECT_NAME)
+
+        for value in PryvStoredData.values():
+            await self.create_stream(user_api_endpoint_with_token, value[0], value[1], PRYV_PROJECT_ID)
@@ -0,0 +1,292 @@
+from __future__ import annotations  # Needed in python 3.7 to have the current class type as a return type of methods
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional, MutableMapping, Set, Iterable
+
+from common.pryv.api_wrapper import PryvAPI
+
+logger = logging.getLogger(__name__)
+
+PRYV_WRITES_DEBOUNCE_SECONDS = float(os.environ.get("PRYV_WRITES_DEBOUNCE_SECONDS", "0.5"))
+"""The time waited, after the last deferring scope changing an event ends, before saving the event to Pryv"""
+
+PRYV_WRITES_MAX_DELAY_SECONDS = float(os.environ.get("PRYV_WRITES_MAX_DELAY_SECONDS", "5"))
+"""The maximum time an event change is deferred, even if the event keeps changing"""
+
+PRYV_DEFERRED_WRITERS = int(os.environ.get("PRYV_DEFERRED_WRITERS", "4"))
+"""The number of threads saving deferred changes to Pryv, outside the event loop"""
+
+PRYV_WRITES_RETRY_SECONDS = float(os.environ.get("PRYV_WRITES_RETRY_SECONDS", "10"))
+"""The time waited before saving again deferred changes whose save failed"""
+
+_WRITE_LOCKS_COUNT = 64
+"""The number of locks serializing the saves of the same event, each one shared by the events hashed to it"""
+
+
+class PryvDeferredWritesError(Exception):
+    """Raised when deferred changes to some Pryv events could not be saved, and are still pending"""
+
+
+@dataclass
+class _DeferringScope:
+    """A scope inside which event changes are deferred"""
+
+    event_ids: Set[str] = field(default_factory=set)
+    """The events changed inside the scope"""
+
+    ended: bool = False
+    """Whether the scope ended, so that changes of tasks started inside it should be scheduled by themselves"""
+
+
+_current_deferring_scope: ContextVar[Optional[_DeferringScope]] = ContextVar('_current_deferring_scope', default=None)
+"""The deferring scope of the current context, or None if changes in the current context are not deferred"""
+
+
+@dataclass
+class _PendingEventChanges:
+    """The latest, not yet saved, content of a Pryv event"""
+
+    pryv_api: PryvAPI
+    api_endpoint: str
+    event_id: str
+    new_json_object: dict
+
+    first_deferred_at: float
+    """The monotonic time of the first change not yet saved, which bounds how long the event is deferred"""
+
+    sequence: int
+    """The order of these changes among all requested ones, so that older changes never overwrite newer ones"""
+
+    being_saved: bool = False
+    """Whether these changes are already being saved"""
+
+
+class PryvDeferredWriter:
+    """
+    A thread-safe singleton class to coalesce changes to Pryv events
+
+    Inside a deferring scope changes are only recorded, so that many changes to the same event
+    are saved with a single update, after the scope ends and no other change to the event arrives for a debounce
+    window, or anyway after a maximum delay; updates are sent by a thread pool, not to block the event loop.
+    Changes whose update fails stay pending, and are saved again later
+    """
+
+    __instance: PryvDeferredWriter = None
+
+    @staticmethod
+    def get_instance() -> PryvDeferredWriter:
+        if PryvDeferredWriter.__instance is None:
+            with threading.Lock():  # defensive programming for multiple thread calls to get_instance the first time
+                if PryvDeferredWriter.__instance is None:
+                    PryvDeferredWriter()  # actual creation
+
+        return PryvDeferredWriter.__instance
+
+    def __init__(self):
+        if PryvDeferredWriter.__instance is not None:
+            raise Exception("This is a singleton class, use get_instance method to get the instance")
+        else:
+            self._pending_changes: MutableMapping[str, _PendingEventChanges] = {}
+            """The changes not yet saved, kept also while being saved, so that readers see them"""
+
+            self._scheduled_flushes: MutableMapping[str, asyncio.TimerHandle] = {}
+            self._running_writes: MutableMapping[str, asyncio.Future] = {}
+            self._executor = ThreadPoolExecutor(PRYV_DEFERRED_WRITERS, thread_name_prefix="pryv-deferred-writer")
+
+            self._sequence_lock = threading.Lock()
+            self._last_sequence = 0
+            self._write_locks = [threading.Lock() for _ in range(_WRITE_LOCKS_COUNT)]
+            self._written_sequences: MutableMapping[str, int] = {}
+            """The sequence of the last changes saved, by event ID"""
+
+            self.requested_writes = 0
+            self.actual_writes = 0
+
+            PryvDeferredWriter.__instance = self
+
+    @contextmanager
+    def deferring(self):
+        """Context manager inside which event changes are deferred, and flushed after it ends"""
+        scope = _DeferringScope()
+        token = _current_deferring_scope.set(scope)
+        try:
+            yield self
+        finally:
+            _current_deferring_scope.reset(token)
+            scope.ended = True
+            self.schedule_flush(scope.event_ids)
+
+    def save_changes_to_event(self, pryv_api: PryvAPI, api_endpoint: str, event_id: str, new_json_object: dict):
+        """
+        Saves changes to provided event on Pryv, deferring them if inside a deferring scope
+
+        Outside deferring scopes changes are saved immediately, replacing the pending ones of the event,
+        and errors are raised to the caller
+        """
+        self.requested_writes += 1
+
+        scope = _current_deferring_scope.get()
+        if scope is not None:
+            previous_changes = self._pending_changes.get(event_id, None)
+            self._pending_changes[event_id] = _PendingEventChanges(
+                pryv_api, api_endpoint, event_id, new_json_object,
+                previous_changes.first_deferred_at
+                if previous_changes and not previous_changes.being_saved else time.monotonic(),
+                self._next_sequence()
+            )
+            scope.event_ids.add(event_id)
+            if scope.ended:
+                self.schedule_flush([event_id])
+        else:
+            scheduled_flush = self._scheduled_flushes.pop(event_id, None)
+            if scheduled_flush is not None:
+                scheduled_flush.cancel()
+
+            self._pending_changes.pop(event_id, None)
+            self._write(pryv_api, api_endpoint, event_id, new_json_object, self._next_sequence())
+
+    def pending_changes_of(self, event_id: str) -> Optional[dict]:
+        """Gets the not yet saved content of provided event, if any"""
+        pending_changes = self._pending_changes.get(event_id, None)
+        return pending_changes.new_json_object if pending_changes else None
+
+    def schedule_flush(self, event_ids: Iterable[str]):
+        """
+        Schedules the save of provided events after the debounce window, postponing already scheduled ones,
+        but not beyond the maximum delay from their first deferred change
+        """
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        now = time.monotonic()
+        for event_id in event_ids:
+            pending_changes = self._pending_changes.get(event_id, None)
+            if pending_changes is None or pending_changes.being_saved:
+                continue
+
+            scheduled_flush = self._scheduled_flushes.pop(event_id, None)
+            if scheduled_flush is not None:
+                scheduled_flush.cancel()
+
+            if loop is None:
+                self._write_pending_changes(pending_changes)
+                self._forget_saved_changes(pending_changes)
+            else:
+                delay = min(PRYV_WRITES_DEBOUNCE_SECONDS,
+                            pending_changes.first_deferred_at + PRYV_WRITES_MAX_DELAY_SECONDS - now)
+                self._scheduled_flushes[event_id] = loop.call_later(max(delay, 0), self._flush_event, event_id)
+
+    async def flush(self):
+        """
+        Saves all pending changes on Pryv, one update per event, waiting for them to be saved
+
+        :raises PryvDeferredWritesError: if some changes could not be saved, which are still pending
+        """
+
+        for scheduled_flush in self._scheduled_flushes.values():
+            scheduled_flush.cancel()
+        self._scheduled_flushes = {}
+
+        for event_id in list(self._pending_changes.keys()):
+            self._flush_event(event_id)
+
+        running_writes = list(self._running_writes.values())
+        if running_writes:
+            await asyncio.wait(running_writes)
+            logger.info(
+                f" Flushed Pryv event changes (requested writes: {self.requested_writes}, "
+                f"actual writes: {self.actual_writes})"
+            )
+
+        unsaved_event_ids = [
+            event_id for event_id, pending_changes in self._pending_changes.items() if not pending_changes.being_saved
+        ]
+        if unsaved_event_ids:
+            raise PryvDeferredWritesError(f"Cannot save changes to Pryv events {unsaved_event_ids}")
+
+    def _flush_event(self, event_id: str):
+        """Utility method to save the pending changes of the event, after the running save of the same event"""
+
+        self._scheduled_flushes.pop(event_id, None)
+        pending_changes = self._pending_changes.get(event_id, None)
+        if pending_changes is None or pending_changes.being_saved:
+            return
+
+        pending_changes.being_saved = True
+        write = asyncio.ensure_future(self._write_after(self._running_writes.get(event_id, None), pending_changes))
+        self._running_writes[event_id] = write
+
+        def forget_write(_):
+            if self._running_writes.get(event_id, None) is write:
+                del self._running_writes[event_id]
+
+        write.add_done_callback(forget_write)
+
+    async def _write_after(self, previous_write: Optional[asyncio.Future], pending_changes: _PendingEventChanges):
+        """Utility method to save the changes in the thread pool, once the previous save of the event completed"""
+
+        if previous_write is not None:
+            await asyncio.wait([previous_write])
+
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self._write_pending_changes, pending_changes)
+        except Exception:
+            event_id = pending_changes.event_id
+            logger.exception(f" Error saving deferred changes to Pryv event `{event_id}`, "
+                             f"retrying in {PRYV_WRITES_RETRY_SECONDS} seconds")
+
+            # The changes stay pending, to be saved again unless newer ones replace them meanwhile
+            pending_changes.being_saved = False
+            if self._pending_changes.get(event_id, None) is pending_changes and (
+                    event_id not in self._scheduled_flushes
+            ):
+                self._scheduled_flushes[event_id] = loop.call_later(
+                    PRYV_WRITES_RETRY_SECONDS, self._flush_event, event_id
+                )
+            return
+
+        self._forget_saved_changes(pending_changes)
+
+    def _write_pending_changes(self, pending_changes: _PendingEventChanges):
+        """Utility method to save the changes"""
+        self._write(pending_changes.pryv_api, pending_changes.api_endpoint, pending_changes.event_id,
+                    pending_changes.new_json_object, pending_changes.sequence)
+
+    def _forget_saved_changes(self, saved_changes: _PendingEventChanges):
+        """Utility method to forget the saved changes, unless newer ones arrived meanwhile"""
+        if self._pending_changes.get(saved_changes.event_id, None) is saved_changes:
+            del self._pending_changes[saved_changes.event_id]
+
+    def _next_sequence(self) -> int:
+        """Utility method to get the sequence of newly requested changes"""
+        with self._sequence_lock:
+            self._last_sequence += 1
+            return self._last_sequence
+
+    def _write(self, pryv_api: PryvAPI, api_endpoint: str, event_id: str, new_json_object: dict, sequence: int):
+        """
+        Utility method to actually save changes on Pryv, one save of the same event at a time
+
+        Changes older than the ones already saved are skipped, like deferred ones whose save was still running
+        when newer changes were saved immediately
+        """
+
+        with self._write_locks[hash(event_id) % _WRITE_LOCKS_COUNT]:
+            if self._written_sequences.get(event_id, 0) > sequence:
+                return
+
+            self.actual_writes += 1
+            PryvAPI.save_changes_to_event(pryv_api, api_endpoint, event_id, new_json_object)
+            self._written_sequences[event_id] = sequence
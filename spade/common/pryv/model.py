@@ -173,6 +173,14 @@ class PryvEvent(AbstractJsonResponse):
     def content(self) -> Optional[Any]:
         return self.internal_json.get('content', None)
 
+    @property
+    def modified(self) -> Optional[float]:
+        return self.internal_json.get('modified', None)
+
+    @property
+    def trashed(self) -> bool:
+        return self.internal_json.get('trashed', False)
+
     @property
     def attachments(self) -> Optional[List[PryvAttachment]]:
         attachments = []
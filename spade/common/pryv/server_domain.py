@@ -5,3 +5,5 @@ PRYV_SERVER_DOMAIN = os.environ.get("PRYV_SERVER_DOMAIN", "pryv.me")
 PRYV_PROJECT_NAME = os.environ.get("PRYV_PROJECT_NAME", "Echo Project")
 
 PRYV_PROJECT_ID = os.environ.get("PRYV_PROJECT_ID", "echo-project")
+
+PRYV_REQUEST_TIMEOUT_SECONDS = float(os.environ.get("PRYV_REQUEST_TIMEOUT_SECONDS", "10"))
@@ -0,0 +1,109 @@
+import logging
+from typing import List, Optional, MutableMapping
+
+from common.pryv.api_wrapper import PryvAPI
+from common.pryv.model import PryvEvent
+
+logger = logging.getLogger(__name__)
+
+
+class PryvStreamEventLog:
+    """
+    A local, time ordered, copy of the events in a Pryv stream
+
+    After the first full download, it is kept in sync retrieving only the events modified since the last sync
+    """
+
+    def __init__(self, pryv_api: PryvAPI, user_api_endpoint_with_token: str, stream_id: str):
+        self._pryv_api = pryv_api
+        self._user_api_endpoint_with_token = user_api_endpoint_with_token
+        self.stream_id = stream_id
+
+        self._events_by_id: MutableMapping[str, PryvEvent] = {}
+        self._ordered_events: List[PryvEvent] = []
+        self._last_modified: Optional[float] = None
+        self._loaded = False
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the full download already happened"""
+        return self._loaded
+
+    def _update_last_modified(self, events: List[PryvEvent]):
+        """Utility method to keep track of the most recent modification time seen"""
+        for event in events:
+            if event.modified is not None and (self._last_modified is None or event.modified > self._last_modified):
+                self._last_modified = event.modified
+
+    def _reorder(self):
+        """Utility method to rebuild the time ordered view of events"""
+        self._ordered_events = sorted(self._events_by_id.values(), key=lambda event: event.time)
+
+    def sync(self):
+        """Brings the local copy up to date, downloading all events only the first time"""
+
+        if not self.is_loaded:
+            events = self._pryv_api.get_events(
+                self._user_api_endpoint_with_token, streams=[self.stream_id], sort_ascending=True
+            )
+            self._events_by_id = {event.id: event for event in events}
+            self._ordered_events = list(events)
+            self._update_last_modified(events)
+            self._loaded = True
+            logger.debug(f" Loaded {len(events)} events of stream `{self.stream_id}`")
+        else:
+            changed_events, deleted_event_ids = self._pryv_api.get_event_changes(
+                self._user_api_endpoint_with_token, self._last_modified or 0, streams=[self.stream_id]
+            )
+            # Events modified exactly at last sync time are returned again, and are skipped if unchanged
+            changed_events = [
+                event for event in changed_events
+                if (event.id in self._events_by_id and
+                    event.internal_json != self._events_by_id[event.id].internal_json) or
+                   (event.id not in self._events_by_id and not event.trashed)
+            ]
+            deleted_event_ids = [event_id for event_id in deleted_event_ids if event_id in self._events_by_id]
+            if not changed_events and not deleted_event_ids:
+                return
+
+            for event in changed_events:
+                if event.trashed:
+                    self._events_by_id.pop(event.id, None)
+                else:
+                    self._events_by_id[event.id] = event
+            for event_id in deleted_event_ids:
+                self._events_by_id.pop(event_id, None)
+
+            self._update_last_modified(changed_events)
+            self._reorder()
+            logger.debug(
+                f" Synced stream `{self.stream_id}`: {len(changed_events)} changed, {len(deleted_event_ids)} deleted"
+            )
+
+    def events(self) -> List[PryvEvent]:
+        """All stream events, ordered by ascending time"""
+        self.sync()
+        return list(self._ordered_events)
+
+    def last(self, count: int) -> List[PryvEvent]:
+        """The last events in the stream, ordered by ascending time, without downloading all of them"""
+        if self.is_loaded:
+            self.sync()
+            return self._ordered_events[-count:] if count > 0 else []
+
+        last_events = self._pryv_api.get_events(
+            self._user_api_endpoint_with_token, streams=[self.stream_id], limit=count
+        )
+        return list(reversed(last_events))
+
+    def put(self, event: PryvEvent):
+        """Registers locally an event just created or updated on Pryv"""
+        if self.is_loaded:
+            self._events_by_id[event.id] = event
+            self._reorder()
+
+    def remove(self, event_id: str):
+        """Removes locally an event just trashed or deleted on Pryv"""
+        if self.is_loaded:
+            self._events_by_id.pop(event_id, None)
+            self._reorder()
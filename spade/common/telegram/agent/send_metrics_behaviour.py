@@ -0,0 +1,25 @@
+import datetime
+import logging
+import os
+
+from spade.behaviour import PeriodicBehaviour
+
+from common.agent.my_logging import log
+from common.telegram.chat.send_scheduler import TelegramSendScheduler
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_SEND_METRICS_LOG_SECONDS = float(os.environ.get("TELEGRAM_SEND_METRICS_LOG_SECONDS", "300"))
+"""The period of Telegram send scheduler metrics logging; 0 disables it"""
+
+
+class LogTelegramSendMetricsBehaviour(PeriodicBehaviour):
+    """Behaviour to periodically log the throughput and queues depth of requests sent to Telegram"""
+
+    def __init__(self, period: float = TELEGRAM_SEND_METRICS_LOG_SECONDS, start_at: datetime.datetime = None):
+        super().__init__(period, start_at)
+
+    async def run(self):
+        metrics = TelegramSendScheduler.get_instance().metrics
+        log(self.agent, "Telegram send scheduler metrics: " +
+            ", ".join(f"{name}: {value}" for name, value in metrics.items()), logger)
@@ -1,25 +1,46 @@
 import logging
-from typing import Optional, List, Mapping, Union
+import os
+from typing import Optional, List, Mapping, Union, Tuple, Callable, Awaitable, TypeVar
 
 from aiogram import Bot, types
 from aiogram.types import ParseMode, InputMediaPhoto
 from aiogram.utils import emoji
+from aiogram.utils.exceptions import BadRequest
 
 from common.chat.message.types import ChatMessage
 from common.chat.platform.abstract_messaging_platform import AbstractMessagingPlatform, ChatAction
 from common.telegram.agent.integration import preprocess_and_label_telegram_message
+from common.telegram.chat.send_scheduler import TelegramSendScheduler
+from common.utils.caching import TTLCache
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
+TELEGRAM_FILE_ID_CACHE_SIZE = int(os.environ.get("TELEGRAM_FILE_ID_CACHE_SIZE", "1000"))
+"""The maximum number of Telegram file IDs of already sent animations kept in memory, to avoid sending them again"""
+
 
 class TelegramMessagingPlatform(AbstractMessagingPlatform):
     """Actual implementation of telegram messaging platform """
 
+    _animation_file_ids: TTLCache[Tuple[int, str], str] = TTLCache(TELEGRAM_FILE_ID_CACHE_SIZE)
+    """The file IDs assigned by Telegram to already sent animations, by bot ID and animation path"""
+
     def __init__(self, telegram_api_token):
         self.telegram_bot = Bot(telegram_api_token)
 
         self._last_sent_messages: List[ChatMessage] = []
 
+    async def _scheduled(self, recipient_id: str, send: Callable[[], Awaitable[T]], cost: int = 1) -> T:
+        """
+        Utility method to send a request about the chat through the scheduler shared by all agents
+
+        :param cost: the number of messages sent, zero for requests not counted by Telegram limits, like chat actions
+        and edits, which are only kept in order with the other requests of the chat
+        """
+        return await TelegramSendScheduler.get_instance().send(f"{self.telegram_bot.id}_{recipient_id}", send, cost)
+
     def _trim_messages_cache(self):
         """Utility method to implement messages cache trimming"""
         # It takes always only the last "MAX_SIZE" elements
@@ -37,23 +58,27 @@ class TelegramMessagingPlatform(AbstractMessagingPlatform):
                            custom_keyboard_obj=None, quick_reply_menu_obj=None,
                            disable_web_page_preview: bool = False,
                            parse_mode: Union[str, None] = ParseMode.MARKDOWN) -> ChatMessage:
-        sent_message = await self.telegram_bot.send_message(
+        sent_message = await self._scheduled(recipient_id, lambda: self.telegram_bot.send_message(
             recipient_id,
             emoji.emojize(message_text),
             parse_mode,
             reply_to_message_id=_int_or_none(reply_to_message_id),
             reply_markup=custom_keyboard_obj if custom_keyboard_obj else quick_reply_menu_obj,
             disable_web_page_preview=disable_web_page_preview
-        )
+        ))
         self._last_sent_messages.append(preprocess_and_label_telegram_message(sent_message))
         self._trim_messages_cache()
         return self._last_sent_messages[-1]
 
     async def send_chat_action(self, recipient_id: str, chat_action_obj: ChatAction):
         if ChatAction.TYPING == chat_action_obj:
-            return await self.telegram_bot.send_chat_action(recipient_id, "typing")
+            return await self._scheduled(
+                recipient_id, lambda: self.telegram_bot.send_chat_action(recipient_id, "typing"), cost=0
+            )
         elif ChatAction.UPLOAD_PHOTO == chat_action_obj:
-            return await self.telegram_bot.send_chat_action(recipient_id, "upload_photo")
+            return await self._scheduled(
+                recipient_id, lambda: self.telegram_bot.send_chat_action(recipient_id, "upload_photo"), cost=0
+            )
         else:
             logger.info(f" No chat action implemented for Telegram related to {chat_action_obj}")
 
@@ -63,13 +88,13 @@ class TelegramMessagingPlatform(AbstractMessagingPlatform):
                          quick_reply_menu_obj=None) -> ChatMessage:
         image_file = types.InputFile(image_absolute_path)
 
-        sent_message = await self.telegram_bot.send_photo(
+        sent_message = await self._scheduled(recipient_id, lambda: self.telegram_bot.send_photo(
             recipient_id,
             image_file,
             caption=emoji.emojize(image_description),
             reply_to_message_id=_int_or_none(reply_to_message_id),
             reply_markup=custom_keyboard_obj if custom_keyboard_obj else quick_reply_menu_obj
-        )
+        ))
         self._last_sent_messages.append(preprocess_and_label_telegram_message(sent_message))
         self._trim_messages_cache()
         return self._last_sent_messages[-1]
@@ -84,18 +109,38 @@ class TelegramMessagingPlatform(AbstractMessagingPlatform):
                              custom_keyboard_obj=None,
                              quick_reply_menu_obj=None) -> ChatMessage:
 
-        if animation_path.startswith("http"):
-            animation_to_be_sent = animation_path
-        else:
-            animation_to_be_sent = types.InputFile(animation_path)
+        file_id_key = (self.telegram_bot.id, animation_path)
+        found, file_id = TelegramMessagingPlatform._animation_file_ids.get(file_id_key)
+
+        async def send(animation_to_be_sent) -> types.Message:
+            """Utility function to send the animation, in whatever form"""
+
+            return await self._scheduled(recipient_id, lambda: self.telegram_bot.send_animation(
+                recipient_id,
+                animation_to_be_sent,
+                caption=emoji.emojize(image_description),
+                reply_to_message_id=_int_or_none(reply_to_message_id),
+                reply_markup=custom_keyboard_obj if custom_keyboard_obj else quick_reply_menu_obj
+            ))
+
+        sent_message = None
+        if found:
+            try:
+                sent_message = await send(file_id)
+            except BadRequest as exception:
+                logger.info(f" Telegram file ID of `{animation_path}` not valid anymore, sending it again: {exception}")
+                TelegramMessagingPlatform._animation_file_ids.remove(file_id_key)
+
+        if sent_message is None:
+            if animation_path.startswith("http"):
+                sent_message = await send(animation_path)
+            else:
+                sent_message = await send(types.InputFile(animation_path))
+
+            sent_file = sent_message.animation or sent_message.document
+            if sent_file is not None:
+                TelegramMessagingPlatform._animation_file_ids.put(file_id_key, sent_file.file_id)
 
-        sent_message = await self.telegram_bot.send_animation(
-            recipient_id,
-            animation_to_be_sent,
-            caption=emoji.emojize(image_description),
-            reply_to_message_id=_int_or_none(reply_to_message_id),
-            reply_markup=custom_keyboard_obj if custom_keyboard_obj else quick_reply_menu_obj
-        )
         self._last_sent_messages.append(preprocess_and_label_telegram_message(sent_message))
         self._trim_messages_cache()
         return self._last_sent_messages[-1]
@@ -110,11 +155,11 @@ class TelegramMessagingPlatform(AbstractMessagingPlatform):
             for path, description in media_paths_to_descriptions.items()
         ]
 
-        sent_messages = await self.telegram_bot.send_media_group(
+        sent_messages = await self._scheduled(recipient_id, lambda: self.telegram_bot.send_media_group(
             recipient_id,
             media_array,
             reply_to_message_id=_int_or_none(reply_to_message_id)
-        )
+        ), cost=len(media_array))
         preprocessed_sent_messages = [preprocess_and_label_telegram_message(message) for message in sent_messages]
         self._last_sent_messages.extend(preprocessed_sent_messages)
         self._trim_messages_cache()
@@ -125,7 +170,7 @@ class TelegramMessagingPlatform(AbstractMessagingPlatform):
                          custom_keyboard_obj=None,
                          quick_reply_menu_obj=None) -> ChatMessage:
 
-        sent_message = await self.telegram_bot.send_venue(
+        sent_message = await self._scheduled(recipient_id, lambda: self.telegram_bot.send_venue(
             chat_id=recipient_id,
             title=title,
             address=address,
@@ -133,28 +178,28 @@ class TelegramMessagingPlatform(AbstractMessagingPlatform):
             longitude=longitude,
             reply_to_message_id=_int_or_none(reply_to_message_id),
             reply_markup=custom_keyboard_obj if custom_keyboard_obj else quick_reply_menu_obj
-        )
+        ))
         self._last_sent_messages.append(preprocess_and_label_telegram_message(sent_message))
         self._trim_messages_cache()
         return self._last_sent_messages[-1]
 
     async def edit_message(self, recipient_id: str, to_modify_message_id: str, new_message_text: str,
                            quick_reply_menu_obj=None):
-        return await self.telegram_bot.edit_message_text(
+        return await self._scheduled(recipient_id, lambda: self.telegram_bot.edit_message_text(
             emoji.emojize(new_message_text),
             recipient_id,
             _int_or_none(to_modify_message_id),
             parse_mode=ParseMode.MARKDOWN,
             reply_markup=quick_reply_menu_obj
-        )
+        ), cost=0)
 
     async def edit_quick_replies_for_message_id(self, recipient_id: str, to_modify_message_id: str,
                                                 quick_reply_menu_obj=None):
-        return await self.telegram_bot.edit_message_reply_markup(
+        return await self._scheduled(recipient_id, lambda: self.telegram_bot.edit_message_reply_markup(
             recipient_id,
             message_id=_int_or_none(to_modify_message_id),
             reply_markup=quick_reply_menu_obj
-        )
+        ), cost=0)
 
     async def notify_quick_reply_received(self, reply_to_quick_reply_id: str, notification_text: Optional[str] = None):
         return await self.telegram_bot.answer_callback_query(
@@ -163,7 +208,9 @@ class TelegramMessagingPlatform(AbstractMessagingPlatform):
         )
 
     async def delete_message(self, recipient_id: str, message_id: str):
-        return await self.telegram_bot.delete_message(recipient_id, _int_or_none(message_id))
+        return await self._scheduled(
+            recipient_id, lambda: self.telegram_bot.delete_message(recipient_id, _int_or_none(message_id)), cost=0
+        )
 
 
 def _int_or_none(some_str: Optional[str]) -> Optional[int]:
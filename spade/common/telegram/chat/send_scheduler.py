@@ -0,0 +1,299 @@
+from __future__ import annotations  # Needed in python 3.7 to have the current class type as a return type of methods
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Optional, MutableMapping, Callable, Awaitable, Any, List, Tuple, Deque, Set, Mapping
+
+from aiogram.utils.exceptions import RetryAfter
+
+from common.utils.caching import TTLCache
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_GLOBAL_MESSAGES_PER_SECOND = float(os.environ.get("TELEGRAM_GLOBAL_MESSAGES_PER_SECOND", "30"))
+"""The maximum rate of requests sent to Telegram, for all chats together"""
+
+TELEGRAM_CHAT_MESSAGES_PER_SECOND = float(os.environ.get("TELEGRAM_CHAT_MESSAGES_PER_SECOND", "1"))
+"""The maximum sustained rate of requests sent to Telegram, for a single chat"""
+
+TELEGRAM_CHAT_BURST = int(os.environ.get("TELEGRAM_CHAT_BURST", "3"))
+"""The number of requests for a single chat which can be sent at once, before being limited to the chat rate"""
+
+TELEGRAM_MAX_RETRY_AFTER_SECONDS = float(os.environ.get("TELEGRAM_MAX_RETRY_AFTER_SECONDS", "10"))
+"""The longest wait asked by Telegram flood control, after which a request is retried instead of failing"""
+
+TELEGRAM_SEND_MAX_RETRIES = int(os.environ.get("TELEGRAM_SEND_MAX_RETRIES", "3"))
+"""The maximum times a request is retried, when asked to wait by Telegram flood control"""
+
+TELEGRAM_CHAT_BUCKETS_CACHE_SIZE = int(os.environ.get("TELEGRAM_CHAT_BUCKETS_CACHE_SIZE", "10000"))
+"""The maximum number of chats whose rate limiting state is kept in memory"""
+
+_THROUGHPUT_WINDOW_SECONDS = 60
+"""The time window over which the throughput is measured"""
+
+
+class SendPriority(IntEnum):
+    """The priorities of requests to Telegram, lower values are sent first"""
+
+    INTERACTIVE = 0
+    """Replies to users currently chatting"""
+
+    PROACTIVE = 1
+    """Messages not solicited by users, like notifications"""
+
+
+_current_send_priority: ContextVar[SendPriority] = ContextVar(
+    '_current_send_priority', default=SendPriority.INTERACTIVE
+)
+"""The priority of requests to Telegram, in the current context"""
+
+
+class _TokenBucket:
+    """A token bucket, allowing a burst of `capacity` requests, and then `rate` requests per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        """Utility method to add the tokens accumulated since last update"""
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def delay(self, now: float, tokens: float = 1) -> float:
+        """The seconds to wait, before the provided tokens are available"""
+        self._refill(now)
+        return max(0.0, (min(tokens, self.capacity) - self._tokens) / self.rate)
+
+    def take(self, now: float, tokens: float = 1):
+        """Consumes the tokens, which should be available"""
+        self._refill(now)
+        self._tokens -= min(tokens, self.capacity)
+
+    def block(self, now: float, seconds: float):
+        """Makes no tokens available for the provided seconds, even for requests without cost"""
+        self._refill(now)
+        self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+@dataclass
+class _SendRequest:
+    """A request to Telegram, waiting to be sent"""
+
+    priority: SendPriority
+    send: Callable[[], Awaitable[Any]]
+    cost: int
+    result: asyncio.Future = field(repr=False)
+
+
+class TelegramSendScheduler:
+    """
+    A singleton class scheduling the requests to Telegram of all agents, to stay within its rate limits
+
+    Requests are sent in order for each chat, one at a time, limited by a token bucket for each chat and a global
+    one; among chats, interactive requests are sent before proactive ones, which are sent inside a `proactive` scope.
+    Requests asked to wait by Telegram flood control are retried after the asked time, if short enough,
+    and meanwhile no other request is sent
+    """
+
+    __instance: TelegramSendScheduler = None
+
+    @staticmethod
+    def get_instance() -> TelegramSendScheduler:
+        if TelegramSendScheduler.__instance is None:
+            with threading.Lock():  # defensive programming for multiple thread calls to get_instance the first time
+                if TelegramSendScheduler.__instance is None:
+                    TelegramSendScheduler()  # actual creation
+
+        return TelegramSendScheduler.__instance
+
+    def __init__(self):
+        if TelegramSendScheduler.__instance is not None:
+            raise Exception("This is a singleton class, use get_instance method to get the instance")
+        else:
+            self._global_bucket = _TokenBucket(TELEGRAM_GLOBAL_MESSAGES_PER_SECOND, TELEGRAM_GLOBAL_MESSAGES_PER_SECOND)
+            self._chat_buckets: TTLCache[str, _TokenBucket] = TTLCache(
+                TELEGRAM_CHAT_BUCKETS_CACHE_SIZE, TELEGRAM_CHAT_BURST / TELEGRAM_CHAT_MESSAGES_PER_SECOND
+            )
+            """The buckets of chats recently sent to; older ones would be full, so they are equal to new ones"""
+
+            self._chat_queues: MutableMapping[str, Deque[_SendRequest]] = {}
+
+            self._scheduled_chats: Set[str] = set()
+            """The chats with requests ready to be sent, delayed, or being sent"""
+
+            self._ready_chats: List[Tuple[int, int, str]] = []
+            """The heap of chats whose next request can be sent, by priority and arrival order"""
+
+            self._delayed_chats: List[Tuple[float, Tuple[int, int, str]]] = []
+            """The heap of chats whose next request waits for the chat bucket, by time it can be sent"""
+
+            self._arrival_counter = itertools.count()
+            self._wake_up: Optional[asyncio.Event] = None
+            self._worker: Optional[asyncio.Task] = None
+
+            self.sent_requests = 0
+            self.failed_requests = 0
+            self.retried_requests = 0
+            self._sent_times: Deque[float] = deque()
+
+            TelegramSendScheduler.__instance = self
+
+    @staticmethod
+    @contextmanager
+    def proactive():
+        """Context manager inside which requests are sent with proactive priority"""
+        token = _current_send_priority.set(SendPriority.PROACTIVE)
+        try:
+            yield
+        finally:
+            _current_send_priority.reset(token)
+
+    async def send(self, chat_id: str, send: Callable[[], Awaitable[Any]], cost: int = 1) -> Any:
+        """
+        Schedules the request to the chat, returning its result once sent
+
+        :param send: the function actually sending the request, called once its turn comes
+        :param cost: the number of messages sent by the request, like the items of a media group;
+        zero for requests only to be kept in order, like chat actions
+        """
+
+        self._ensure_worker()
+
+        request = _SendRequest(_current_send_priority.get(), send, cost, asyncio.get_running_loop().create_future())
+        self._chat_queues.setdefault(chat_id, deque()).append(request)
+
+        if chat_id not in self._scheduled_chats:
+            self._schedule_next_request_of(chat_id)
+
+        return await request.result
+
+    @property
+    def metrics(self) -> Mapping[str, Any]:
+        """The counters of sent requests, with the current throughput and queues depth"""
+
+        self._forget_old_sent_times(time.monotonic())
+        queued_requests = [request for queue in self._chat_queues.values() for request in queue]
+        return {
+            "sent_requests": self.sent_requests,
+            "failed_requests": self.failed_requests,
+            "retried_requests": self.retried_requests,
+            "sent_requests_per_second": len(self._sent_times) / _THROUGHPUT_WINDOW_SECONDS,
+            "queued_requests": len(queued_requests),
+            "queued_proactive_requests": len(
+                [request for request in queued_requests if request.priority == SendPriority.PROACTIVE]
+            ),
+            "queued_chats": len(self._chat_queues),
+        }
+
+    def _ensure_worker(self):
+        """Utility method to start the worker sending requests, in the running loop, if not running"""
+
+        if self._worker is None or self._worker.done():
+            self._wake_up = asyncio.Event()
+            self._worker = asyncio.ensure_future(self._run())
+
+    def _schedule_next_request_of(self, chat_id: str):
+        """Utility method to make the next request of the chat ready to be sent, if any"""
+
+        queue = self._chat_queues.get(chat_id, None)
+        if not queue:
+            self._chat_queues.pop(chat_id, None)
+            self._scheduled_chats.discard(chat_id)
+            return
+
+        self._scheduled_chats.add(chat_id)
+        heapq.heappush(self._ready_chats, (queue[0].priority, next(self._arrival_counter), chat_id))
+        self._wake_up.set()
+
+    async def _run(self):
+        """The loop sending requests, once allowed by the buckets"""
+
+        while True:
+            now = time.monotonic()
+            while self._delayed_chats and self._delayed_chats[0][0] <= now:
+                heapq.heappush(self._ready_chats, heapq.heappop(self._delayed_chats)[1])
+
+            if not self._ready_chats:
+                self._wake_up.clear()
+                timeout = self._delayed_chats[0][0] - now if self._delayed_chats else None
+                try:
+                    await asyncio.wait_for(self._wake_up.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            priority, arrival, chat_id = self._ready_chats[0]
+            request = self._chat_queues[chat_id][0]
+
+            global_delay = self._global_bucket.delay(now, request.cost)
+            if global_delay > 0:
+                await asyncio.sleep(global_delay)
+                continue
+
+            heapq.heappop(self._ready_chats)
+            found, chat_bucket = self._chat_buckets.get(chat_id)
+            if not found:
+                chat_bucket = _TokenBucket(TELEGRAM_CHAT_MESSAGES_PER_SECOND, TELEGRAM_CHAT_BURST)
+            chat_delay = chat_bucket.delay(now, request.cost)
+            if chat_delay > 0:
+                heapq.heappush(self._delayed_chats, (now + chat_delay, (priority, arrival, chat_id)))
+                continue
+
+            self._global_bucket.take(now, request.cost)
+            chat_bucket.take(now, request.cost)
+            self._chat_buckets.put(chat_id, chat_bucket)  # stored again, to expire only once refilled
+            self._chat_queues[chat_id].popleft()
+            asyncio.ensure_future(self._send_and_schedule_next(chat_id, request))
+
+    async def _send_and_schedule_next(self, chat_id: str, request: _SendRequest):
+        """Utility method to send the request, retrying it if asked, and then to schedule the next of the chat"""
+
+        try:
+            for attempt in itertools.count():
+                try:
+                    result = await request.send()
+                except RetryAfter as exception:
+                    if attempt >= TELEGRAM_SEND_MAX_RETRIES or exception.timeout > TELEGRAM_MAX_RETRY_AFTER_SECONDS:
+                        raise
+
+                    logger.info(f" Telegram asked to wait {exception.timeout} seconds before sending to `{chat_id}`")
+                    self.retried_requests += 1
+                    # Flood control applies to the whole bot, so no other chat is sent to meanwhile
+                    self._global_bucket.block(time.monotonic(), exception.timeout)
+                    await asyncio.sleep(exception.timeout)
+                else:
+                    self.sent_requests += 1
+                    self._record_sent_time(time.monotonic())
+                    if not request.result.done():
+                        request.result.set_result(result)
+                    break
+        except Exception as exception:
+            self.failed_requests += 1
+            if not request.result.done():
+                request.result.set_exception(exception)
+        finally:
+            self._schedule_next_request_of(chat_id)
+
+    def _record_sent_time(self, now: float):
+        """Utility method to record a sent request, for throughput measurement"""
+        self._sent_times.append(now)
+        self._forget_old_sent_times(now)
+
+    def _forget_old_sent_times(self, now: float):
+        """Utility method to forget sent requests outside the throughput window"""
+        while self._sent_times and self._sent_times[0] < now - _THROUGHPUT_WINDOW_SECONDS:
+            self._sent_times.popleft()
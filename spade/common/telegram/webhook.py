@@ -0,0 +1,179 @@
+import asyncio
+import hmac
+import json
+import logging
+import os
+from typing import Optional, List
+
+from aiogram import Bot, Dispatcher, types
+from aiogram.bot.api import Methods
+from aiohttp import web, ClientSession
+from aiohttp.web_exceptions import HTTPUnauthorized, HTTPBadRequest, HTTPServiceUnavailable
+from aiohttp.web_request import Request
+from aiohttp.web_response import Response
+
+from common.utils.my_logging import log_exception
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_INGESTION_MODE = os.environ.get("TELEGRAM_INGESTION_MODE", "polling").lower()
+"""How Telegram updates are received: `polling` them, or through a `webhook` called by Telegram"""
+
+TELEGRAM_WEBHOOK_URL = os.environ.get("TELEGRAM_WEBHOOK_URL", "")
+"""The public URL of the webhook, registered to Telegram at startup; if empty the webhook is not registered"""
+
+TELEGRAM_WEBHOOK_PATH = os.environ.get("TELEGRAM_WEBHOOK_PATH", "/telegram/webhook")
+"""The path where the webhook is served"""
+
+TELEGRAM_WEBHOOK_HOST = os.environ.get("TELEGRAM_WEBHOOK_HOST", "0.0.0.0")
+"""The address where the webhook server listens"""
+
+TELEGRAM_WEBHOOK_PORT = int(os.environ.get("TELEGRAM_WEBHOOK_PORT", "8443"))
+"""The port where the webhook server listens"""
+
+TELEGRAM_WEBHOOK_SECRET_TOKEN = os.environ.get("TELEGRAM_WEBHOOK_SECRET_TOKEN", "")
+"""The secret sent by Telegram with each update, to reject requests not coming from it; if empty nothing is checked"""
+
+TELEGRAM_WEBHOOK_QUEUE_SIZE = int(os.environ.get("TELEGRAM_WEBHOOK_QUEUE_SIZE", "1000"))
+"""The maximum number of received updates waiting to be processed, after which Telegram is asked to retry later"""
+
+TELEGRAM_WEBHOOK_WORKERS = int(os.environ.get("TELEGRAM_WEBHOOK_WORKERS", "8"))
+"""The number of updates processed concurrently"""
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+"""The header containing the secret token, in requests made by Telegram"""
+
+
+class TelegramWebhookReceiver:
+    """
+    A receiver of Telegram updates through a webhook
+
+    Updates are acknowledged as soon as they are queued, and then processed by the dispatcher handlers;
+    when the queue is full Telegram is answered with an error, so that it sends the update again later
+    """
+
+    def __init__(self, telegram_dispatcher: Dispatcher,
+                 secret_token: str = TELEGRAM_WEBHOOK_SECRET_TOKEN,
+                 queue_size: int = TELEGRAM_WEBHOOK_QUEUE_SIZE,
+                 workers_count: int = TELEGRAM_WEBHOOK_WORKERS):
+        self.telegram_dispatcher = telegram_dispatcher
+        self.secret_token = secret_token
+        self.queue_size = queue_size
+        self.workers_count = workers_count
+
+        self._updates: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+        self.received_updates = 0
+        self.rejected_updates = 0
+
+    def create_webhook_controller(self):
+        """Creates the coroutine receiving updates from Telegram"""
+
+        async def webhook_controller(request: Request):
+            """The controller queueing the received update"""
+
+            if self.secret_token and not hmac.compare_digest(
+                    request.headers.get(SECRET_TOKEN_HEADER, ""), self.secret_token
+            ):
+                raise HTTPUnauthorized(reason="Wrong secret token")
+
+            try:
+                update = types.Update.to_object(await request.json())
+            except ValueError:
+                raise HTTPBadRequest(reason="Malformed update")
+
+            try:
+                self._updates.put_nowait(update)
+            except asyncio.QueueFull:
+                self.rejected_updates += 1
+                logger.warning(f" Updates queue full, Telegram will send again update {update.update_id}")
+                raise HTTPServiceUnavailable(reason="Too many updates", headers={"Retry-After": "1"})
+
+            self.received_updates += 1
+            return Response()
+
+        return webhook_controller
+
+    def create_app(self, webhook_path: str = TELEGRAM_WEBHOOK_PATH,
+                   webhook_url: str = TELEGRAM_WEBHOOK_URL) -> web.Application:
+        """Creates the web application serving the webhook, which processes updates while running"""
+
+        async def on_startup(_app: web.Application):
+            await self._start_processing()
+            if webhook_url:
+                await self._register_webhook(webhook_url)
+
+        async def on_cleanup(_app: web.Application):
+            await self._stop_processing()
+
+        app = web.Application()
+        app.router.add_post(webhook_path, self.create_webhook_controller())
+        app.on_startup.append(on_startup)
+        app.on_cleanup.append(on_cleanup)
+        return app
+
+    async def _start_processing(self):
+        """Utility method to create the queue of updates, and the workers processing them"""
+
+        # The handlers expect the bot and the dispatcher in their context, which workers inherit
+        Bot.set_current(self.telegram_dispatcher.bot)
+        Dispatcher.set_current(self.telegram_dispatcher)
+
+        self._updates = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [asyncio.ensure_future(self._process_updates()) for _ in range(self.workers_count)]
+
+    async def _stop_processing(self):
+        """Utility method to stop the workers, once received updates are processed"""
+
+        await self._updates.join()
+        for worker in self._workers:
+            worker.cancel()
+
+        logger.info(f" Webhook stopped (received updates: {self.received_updates}, "
+                    f"rejected updates: {self.rejected_updates})")
+
+    async def _process_updates(self):
+        """Utility method to process queued updates, one at a time"""
+
+        while True:
+            update = await self._updates.get()
+            try:
+                await self.telegram_dispatcher.process_update(update)
+            except:
+                log_exception(logger)
+            finally:
+                self._updates.task_done()
+
+    async def _register_webhook(self, webhook_url: str):
+        """Utility method to ask Telegram to send updates to the webhook"""
+
+        payload = {"url": webhook_url, "max_connections": self.workers_count}
+        if self.secret_token:
+            payload["secret_token"] = self.secret_token
+
+        # Requested directly, to pass the secret token also with aiogram versions not supporting it
+        await self.telegram_dispatcher.bot.request(Methods.SET_WEBHOOK, payload)
+        logger.info(f" Telegram webhook registered at `{webhook_url}`")
+
+
+def run_telegram_webhook(telegram_dispatcher: Dispatcher,
+                         host: str = TELEGRAM_WEBHOOK_HOST, port: int = TELEGRAM_WEBHOOK_PORT):
+    """Runs the webhook server receiving Telegram updates, until interrupted"""
+
+    web.run_app(TelegramWebhookReceiver(telegram_dispatcher).create_app(), host=host, port=port)
+
+
+async def post_recorded_updates(fixture_paths: List[str],
+                                webhook_url: str = f"http://localhost:{TELEGRAM_WEBHOOK_PORT}{TELEGRAM_WEBHOOK_PATH}",
+                                secret_token: str = TELEGRAM_WEBHOOK_SECRET_TOKEN):
+    """Posts the recorded Telegram updates, in JSON files, to a running webhook, as Telegram would do"""
+
+    async with ClientSession() as session:
+        for fixture_path in fixture_paths:
+            with open(fixture_path) as fixture_file:
+                update_json = json.load(fixture_file)
+
+            headers = {SECRET_TOKEN_HEADER: secret_token}
+            async with session.post(webhook_url, json=update_json, headers=headers) as response:
+                logger.info(f" Posted `{fixture_path}`: {response.status}")
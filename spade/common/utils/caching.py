@@ -0,0 +1,71 @@
+import time
+from collections import OrderedDict
+from typing import TypeVar, Generic, Optional, Tuple, Mapping
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+
+class TTLCache(Generic[K, V]):
+    """A bounded in-memory cache, evicting least recently used entries and expiring entries older than a TTL"""
+
+    def __init__(self, max_size: int, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: 'OrderedDict[K, Tuple[float, V]]' = OrderedDict()
+
+    def _is_expired(self, stored_at: float) -> bool:
+        """Utility method to check whether an entry stored at provided time is expired"""
+        return self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds
+
+    def peek(self, key: K) -> Tuple[bool, Optional[V]]:
+        """Like get, but without affecting counters and recency of the entry"""
+        entry = self._entries.get(key, None)
+        if entry is None or self._is_expired(entry[0]):
+            return False, None
+
+        return True, entry[1]
+
+    def contains(self, key: K) -> bool:
+        """Checks whether a not expired entry is present for the key, without affecting counters"""
+        return self.peek(key)[0]
+
+    def get(self, key: K) -> Tuple[bool, Optional[V]]:
+        """Retrieves the value for the key, returning also a boolean telling whether it was found"""
+        entry = self._entries.get(key, None)
+        if entry is None or self._is_expired(entry[0]):
+            self._entries.pop(key, None)
+            self.misses += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[1]
+
+    def put(self, key: K, value: V):
+        """Stores the value for the key, evicting the least recently used entry if the cache is full"""
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def put_all(self, values: Mapping[K, V]):
+        """Stores all provided key-value pairs"""
+        for key, value in values.items():
+            self.put(key, value)
+
+    def remove(self, key: K):
+        """Removes the entry for the key, if present"""
+        self._entries.pop(key, None)
+
+    def invalidate(self):
+        """Removes all entries"""
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,4 +1,5 @@
 import logging
+import os
 from abc import abstractmethod, ABC
 from typing import Union, Optional
 
@@ -12,7 +13,6 @@ from common.agent.agents.abstract_gateway_agent import (
 from common.agent.agents.abstract_user_agent import MESSAGING_PLATFORM_API_TOKEN_METADATA_FIELD
 from common.agent.agents.custom_metadata_fields import MasMessageMetadataFields, MasMessagePerformatives
 from common.agent.agents.interaction_texts import localize
-from common.agent.behaviour.behaviours import WaitForMessageFSMBehaviour
 from common.agent.my_logging import log
 from common.agent.presence_utils import find_contact_by_partial_name
 from common.agent.utils import compose_user_agent_jid
@@ -22,24 +22,35 @@ from covid19.common.agent.agents.interaction_texts import (
     NEW_USER_MESSAGE_NOT_LOCALIZED
 )
 from covid19.common.agent.agents.user.agent import UserAgent
-from covid19.common.bootstrap_agent_names import ALL_PLATFORMS_GATEWAY_AGENTS_JIDS
+from covid19.common.agent.agents.user.session_host import UserSessionHostAgent
+from covid19.common.bootstrap_agent_names import ALL_PLATFORMS_GATEWAY_AGENTS_JIDS, USER_SESSION_HOST_JID
 from covid19.common.database.connection_manager import AbstractCovid19ConnectionManager
-from covid19.common.database.user.factory import UserFactory
 
 logger = logging.getLogger(__name__)
 
+USER_SESSION_HOST_ENABLED = os.environ.get("USER_SESSION_HOST_ENABLED", "false").lower() == "true"
+"""Whether users are managed by sessions in a single UserSessionHostAgent, instead of by a UserAgent each"""
+
 
 class AbstractCovid19GatewayAgent(AbstractGatewayAgent):
     """Abstract gateway agent for Covid19 project"""
 
     def __init__(self, jid, password, messaging_platform_sender_name: str, messaging_platform_api_token: str,
                  db_connection_manager: AbstractCovid19ConnectionManager):
-        super().__init__(jid, password)
+        super().__init__(jid, password, db_connection_manager.get_user_id_mapping_dao())
 
         self.messaging_platform_sender: str = messaging_platform_sender_name
         self.messaging_platform_api_token: str = messaging_platform_api_token
         self.db_connection_manager = db_connection_manager
 
+        self.user_session_host_startup: CachedUser = CachedUser(user_id=USER_SESSION_HOST_JID)
+        """Tracks the startup of the UserSessionHostAgent, if started by this agent, like for UserAgents of users"""
+
+    async def setup(self):
+        self.db_connection_manager.connect_to_db()  # needed to warm up the user cache
+
+        await super().setup()
+
     class AbstractCheckUserRegistrationState(AbstractAskForUserDataAboutMessageState, ABC):
         """A FSM behaviour state to handle the check for user registration to the system"""
 
@@ -53,15 +64,8 @@ class AbstractCovid19GatewayAgent(AbstractGatewayAgent):
             doctor_jid = find_contact_by_partial_name(CHECK_REGISTRATION_CONTACT_PARTIAL_NAME, self.presence)
             await forward_message_to_user_agent(self, cached_user, mas_message, chat_message, doctor_jid)
 
-        def create_response_handling_behaviour(self) -> WaitForMessageFSMBehaviour:
-            class HandleUserRegistrationResponse(WaitForMessageFSMBehaviour):
-                pass  # Only to change the class name shown in logging
-
-            return HandleUserRegistrationResponse(
-                lambda: self.agent.create_handle_user_registration_response_state(
-                    self.agent.messaging_platform_api_token
-                )
-            )
+        def create_response_handling_state(self) -> AbstractUserDataResponseHandlingState:
+            return self.agent.create_handle_user_registration_response_state(self.agent.messaging_platform_api_token)
 
     class AbstractHandleUserRegistrationResponseState(AbstractUserDataResponseHandlingState, ABC):
         """A FSM behaviour state to handle user registration status, coming back from DoctorAgent"""
@@ -80,9 +84,6 @@ class AbstractCovid19GatewayAgent(AbstractGatewayAgent):
                 # Default handling behaviour
                 await super().on_chat_message_received(mas_message, chat_message)
 
-        def extract_user_id(self, other_agent_message: Message) -> str:
-            return UserFactory.from_json(other_agent_message.body).id
-
         async def handle_user_data_response(self, cached_user: CachedUser, mas_message: Message,
                                             chat_message: ChatMessage):
             await forward_message_to_user_agent(self, cached_user, mas_message, chat_message, mas_message.sender)
@@ -142,22 +143,43 @@ async def forward_message_to_user_agent(
             db_connection_manager=behaviour.agent.db_connection_manager
         )
 
-    user_agent_jid = compose_user_agent_jid(
-        cached_user.user_id,
-        str(behaviour.agent.jid.domain)
-    )
+    def create_session_host_agent(agent_jid: str, _: CachedUser):
+        """Callback used to create the agent hosting user sessions"""
+
+        log(behaviour.agent, f"Creating the UserSessionHostAgent with jid {agent_jid}", logger)
+
+        return UserSessionHostAgent(
+            jid=agent_jid,
+            password=f"{agent_jid}",
+            gateway_agents_jids=ALL_PLATFORMS_GATEWAY_AGENTS_JIDS,
+            doctor_jid=str(doctor_agent_jid),
+            db_connection_manager=behaviour.agent.db_connection_manager
+        )
+
+    if USER_SESSION_HOST_ENABLED:
+        user_agent_jid = USER_SESSION_HOST_JID
+        started_agent = behaviour.agent.user_session_host_startup
+        create_started_agent = create_session_host_agent
+    else:
+        user_agent_jid = compose_user_agent_jid(
+            cached_user.user_id,
+            str(behaviour.agent.jid.domain)
+        )
+        started_agent = cached_user
+        create_started_agent = create_agent
 
     await UserAgentStartupHandler.handle_agent_startup(
         to_startup_agent_jid=lambda: user_agent_jid,
         presence_manager=behaviour.agent.presence,
         on_agent_already_online=lambda user_jid: log(behaviour.agent, f"UserAgent {user_jid} already online.", logger),
         on_before_create_agent=before_create_user_agent,
-        cached_user=cached_user,
-        create_agent=create_agent
+        cached_user=started_agent,
+        create_agent=create_started_agent
     )
 
     msg = to_forward_message
     msg.metadata[MESSAGING_PLATFORM_API_TOKEN_METADATA_FIELD] = behaviour.agent.messaging_platform_api_token
+    msg.metadata[MasMessageMetadataFields.USER_ID.value] = cached_user.user_id
     msg.to = user_agent_jid
     msg.sender = msg.metadata[MasMessageMetadataFields.SENDER.value] = str(behaviour.agent.jid)
     log(behaviour.agent, f"Forwarding the messaging platform message to UserAgent {user_agent_jid}.", logger)
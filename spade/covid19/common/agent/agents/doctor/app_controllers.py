@@ -1,19 +1,20 @@
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from threading import Timer
 from typing import Optional
 
 from aiohttp.web_exceptions import (
-    HTTPBadRequest, HTTPInternalServerError, HTTPUnauthorized, HTTPNotFound
+    HTTPBadRequest, HTTPUnauthorized, HTTPNotFound
 )
 from aiohttp.web_request import Request
 from aiohttp.web_response import Response
 
 from common.agent.web.controllers import create_json_response, CORS_HEADER, OBJECT_ID_URL_MATCHER_STRING
 from common.chat.language_enum import Language
+from common.chat.platform.types import ChatPlatform
 from common.custom_chat.client_notification_manager import ClientNotificationManager
 from common.pryv.api_wrapper import PryvAPI
+from common.pryv.async_api_wrapper import AsyncPryvAPI
 from common.pryv.model import DataAccessPermission, AuthStatus, AuthResponse
 from covid19.common.database.mongo_db_pryv_hybrid.models import PryvStoredData
 from covid19.common.database.user.daos import AbstractUserDAO
@@ -39,7 +40,7 @@ def create_get_status_controller():
     return status_controller
 
 
-def create_app_login_controller(user_dao: AbstractUserDAO, pryv_api_wrapper: PryvAPI):
+def create_app_login_controller(user_dao: AbstractUserDAO, pryv_api_wrapper: AsyncPryvAPI):
     """Creates the coroutine handling the app login call"""
 
     pryv_requesting_app_id = 'covid19-physio-project'
@@ -57,7 +58,7 @@ def create_app_login_controller(user_dao: AbstractUserDAO, pryv_api_wrapper: Pry
 
         language_code = request.query.get(language_code_query_field, default_language)
 
-        auth_response = pryv_api_wrapper.request_auth(
+        auth_response = await pryv_api_wrapper.request_auth(
             requesting_app_id=pryv_requesting_app_id,
             requested_permissions=[
                 DataAccessPermission.of(info[0], info[1], info[2])
@@ -76,22 +77,18 @@ def create_app_login_controller(user_dao: AbstractUserDAO, pryv_api_wrapper: Pry
 
 
 async def _start_polling_for_access_granting(
-        user_dao: AbstractUserDAO, pryv_api_wrapper: PryvAPI, auth_response: AuthResponse, max_age: datetime,
+        user_dao: AbstractUserDAO, pryv_api_wrapper: AsyncPryvAPI, auth_response: AuthResponse, max_age: datetime,
 ):
     """Function to poll the Pryv api to verify if the user granted access authorization"""
 
-    next_auth_response = pryv_api_wrapper.fetch_poll_url(auth_response)
+    next_auth_response = await pryv_api_wrapper.fetch_poll_url(auth_response)
     if next_auth_response.status == AuthStatus.ACCEPTED:
         logger.info(f" User gave Pryv access to our Bot.")
 
         pryv_endpoint_url = next_auth_response.pryv_api_endpoint
         user_username = PryvAPI.extract_user_username(pryv_endpoint_url)
 
-        users_with_username = list(user_dao.find_by(custom_chat_id=user_username).values())
-        if len(users_with_username) > 1:
-            raise Exception(f"More than 1 user with custom_chat_id = `{user_username}`")
-
-        already_present_user = users_with_username[0] if len(users_with_username) == 1 else None
+        already_present_user = user_dao.find_one_by_platform_id(ChatPlatform.CUSTOM_CHAT, user_username)
         if already_present_user is None:
             # New user should be created
             new_user = UserFactory.new_user(pryv_endpoint=pryv_endpoint_url, custom_chat_id=user_username)
@@ -112,17 +109,16 @@ async def _start_polling_for_access_granting(
         if datetime.now() > max_age:
             logger.info(f" Auth request with url {auth_response.poll} went on prescription. Will not poll this again.")
         else:
-            Timer(
+            asyncio.get_running_loop().call_later(
                 next_auth_response.poll_rate_ms / 1000,
-                asyncio.gather,
-                [_start_polling_for_access_granting(user_dao, pryv_api_wrapper, next_auth_response, max_age)],
-                {'loop': asyncio.get_running_loop()}
-            ).start()
+                asyncio.ensure_future,
+                _start_polling_for_access_granting(user_dao, pryv_api_wrapper, next_auth_response, max_age)
+            )
     else:
         logger.error(f" Unknown auth response status: {next_auth_response.status}")
 
 
-def create_credentials_checker_controller(user_dao: AbstractUserDAO, pryv_api_wrapper: PryvAPI):
+def create_credentials_checker_controller(user_dao: AbstractUserDAO, pryv_api_wrapper: AsyncPryvAPI):
     """Creates the coroutine handling the credentials check"""
 
     user_id_query_field = "userId"
@@ -137,14 +133,7 @@ def create_credentials_checker_controller(user_dao: AbstractUserDAO, pryv_api_wr
 
         logger.info(f" Checking credentials for {to_check_user_id}...")
 
-        users_with_id = list(user_dao.find_by(custom_chat_id=to_check_user_id).values())
-        if len(users_with_id) > 1:
-            raise HTTPInternalServerError(
-                reason=f"More than 1 user with custom_chat_id = `{to_check_user_id}`",
-                headers=CORS_HEADER
-            )
-
-        already_present_user = users_with_id[0] if len(users_with_id) == 1 else None
+        already_present_user = user_dao.find_one_by_platform_id(ChatPlatform.CUSTOM_CHAT, to_check_user_id)
 
         # A new login is needed if the user is None or its endpoint is None
         new_login_needed = already_present_user is None or already_present_user.pryv_endpoint is None
@@ -152,7 +141,7 @@ def create_credentials_checker_controller(user_dao: AbstractUserDAO, pryv_api_wr
         # If the user is present and endpoint is present, check for latter validity
         if not new_login_needed:
             logger.info(f" User was present and had a Pryv endpoint. Check for token validity...")
-            pryv_access_info = pryv_api_wrapper.get_access_info(already_present_user.pryv_endpoint)
+            pryv_access_info = await pryv_api_wrapper.get_access_info(already_present_user.pryv_endpoint)
             if pryv_access_info is None:
                 # Token revoked or something wrong with the user permissions, request Pryv auth again
                 logger.info(f" User Pryv token invalid. New login needed...")
@@ -175,13 +164,11 @@ def _get_one_user_by_id_or_error(user_id: str, user_dao: AbstractUserDAO):
     if user_id == "":
         raise HTTPBadRequest(reason="Malformed user id query", headers=CORS_HEADER)
 
-    users_with_id = list(user_dao.find_by(custom_chat_id=user_id).values())
-    if len(users_with_id) > 1:
-        raise HTTPInternalServerError(reason=f"More than 1 user with custom_chat_id = `{user_id}`", headers=CORS_HEADER)
-    elif len(users_with_id) == 0:
+    a_user = user_dao.find_one_by_platform_id(ChatPlatform.CUSTOM_CHAT, user_id)
+    if a_user is None:
         raise HTTPNotFound(reason=f"User with custom_chat_id = `{user_id}` not found", headers=CORS_HEADER)
 
-    return users_with_id[0]
+    return a_user
 
 
 def create_message_sender_info_controller(user_dao: AbstractUserDAO):
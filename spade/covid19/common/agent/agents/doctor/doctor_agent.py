@@ -1,13 +1,13 @@
 import logging
 import os
 from pathlib import Path
-from typing import Optional, List, Tuple, Callable
+from typing import Optional, List, Tuple
 
 from spade.message import Message
 
 from common.agent.agents.abstract_doctor_agent import AbstractDoctorAgent
 from common.agent.agents.custom_metadata_fields import MasMessageMetadataFields, MasMessagePerformatives
-from common.agent.my_logging import log, log_agent_contacts
+from common.agent.my_logging import log, log_agent_contacts, log_exception
 from common.agent.web.controllers import OBJECT_ID_URL_MATCHER_STRING
 from common.agent.web.utils import (
     add_get_raw_file, add_get_raw_files_in_folder, add_all_get_controllers, add_post_raw_controller,
@@ -17,8 +17,10 @@ from common.chat.language_enum import Language
 from common.chat.message.types import ChatMessage
 from common.chat.platform.types import ChatPlatform
 from common.custom_chat.client_notification_manager import ClientNotificationManager
-from common.pryv.api_wrapper import PryvAPI
+from common.database.cache.lru_cache_dao import LRUCacheDAO
+from common.pryv.async_api_wrapper import AsyncPryvAPI
 from common.database.persuation.dao import AbstractStrategyDAO
+from common.database.user.platform_user_identity import PlatformUserIdentity
 from covid19.common.agent.agents.doctor.app_controllers import (
     create_app_login_controller, create_get_status_controller, create_credentials_checker_controller,
     create_message_sender_info_controller, create_user_messages_controller, create_user_language_controller,
@@ -30,8 +32,9 @@ from covid19.common.agent.agents.doctor.web_api_controllers import (
     create_delete_object_controller, create_exercise_set_mapping_controller,
     create_modify_exercise_set_mapping_controller, create_question_controller, create_modify_question_controller,
     create_delete_question_controller, create_user_goal_controller, create_modify_user_goal_controller,
-    create_user_level_history_controller, API_MOUNT_POINT,
+    create_user_level_history_controller, with_catalogue_change_notification, API_MOUNT_POINT,
 )
+from covid19.common.database.catalogue import CatalogueCollection, catalogue_collection_version
 from covid19.common.database.connection_manager import AbstractCovid19ConnectionManager
 from covid19.common.database.user.daos import (
     AbstractUserDAO, AbstractExerciseDAO, AbstractExerciseSetDAO, AbstractQuestionToExerciseSetMappingDAO,
@@ -73,6 +76,15 @@ class DoctorAgent(AbstractDoctorAgent):
 
         _start_web_server(self, self.connection_manager, str(os.path.abspath(WEB_PAGE_ROOT)))
 
+    async def _async_stop(self):
+        # Kept alive Pryv connections are closed, not to leave them open
+        try:
+            await AsyncPryvAPI(self.connection_manager.pryv_server_domain).close()
+        except:
+            log_exception(self, logger)
+
+        await super()._async_stop()
+
     class HandleGatewayDataRequestState(AbstractDoctorAgent.AbstractHandleGatewayDataRequestState):
         """The state in charge of managing data requests coming from other agents"""
 
@@ -87,21 +99,34 @@ class DoctorAgent(AbstractDoctorAgent):
                 chat_message: ChatMessage,
                 connection_manager: AbstractCovid19ConnectionManager
         ) -> Optional[AbstractUser]:
+            return await self._find_or_create_user(mas_message, chat_message, connection_manager)
+
+        async def resolve_platform_user_identity(
+                self,
+                mas_message: Message,
+                chat_message: ChatMessage,
+                connection_manager: AbstractCovid19ConnectionManager
+        ) -> Optional[PlatformUserIdentity]:
+            user = await self._find_or_create_user(
+                mas_message, chat_message, connection_manager, projection=['id', 'registration_completed']
+            )
+            return PlatformUserIdentity(user.id, user.registration_completed) if user else None
+
+        async def _find_or_create_user(
+                self,
+                mas_message: Message,
+                chat_message: ChatMessage,
+                connection_manager: AbstractCovid19ConnectionManager,
+                projection: Optional[List[str]] = None
+        ) -> Optional[AbstractUser]:
+            """Utility method to find the user sending the chat message, creating it if new"""
 
             user_dao = connection_manager.get_user_dao()
-            result_user: Optional[AbstractUser] = None
 
             # Try to find the user by messaging platform ID, first
-            if chat_message.chat_platform == ChatPlatform.TELEGRAM:
-                result_user = await self._find_user_by_messaging_platform_id(
-                    chat_message,
-                    lambda messaging_platform_id: list(user_dao.find_by(telegram_id=messaging_platform_id).values())
-                )
-            elif chat_message.chat_platform == ChatPlatform.CUSTOM_CHAT:
-                result_user = await self._find_user_by_messaging_platform_id(
-                    chat_message,
-                    lambda messaging_platform_id: list(user_dao.find_by(custom_chat_id=messaging_platform_id).values())
-                )
+            result_user = user_dao.find_one_by_platform_id(
+                chat_message.chat_platform, chat_message.sender_id, projection
+            )
 
             if result_user:
                 # If user found directly with platform ID, return it
@@ -122,28 +147,6 @@ class DoctorAgent(AbstractDoctorAgent):
                 new_user = UserFactory.new_user(first_name=_first_name, language=_language)
                 return user_dao.insert(new_user)
 
-        async def _find_user_by_messaging_platform_id(
-                self,
-                chat_message: ChatMessage,
-                finder_function: Callable[[str], List[AbstractUser]]
-        ) -> Optional[AbstractUser]:
-            """Utility method to find a user by messaging platform ID"""
-
-            _sender_id = chat_message.sender_id
-            users = finder_function(_sender_id)
-
-            if len(users) == 1:
-                return users[0]
-
-            if len(users) > 1:  # More than one user with same messaging platform ID -> data error
-                for p in users:
-                    log(self.agent, f"{p.to_json_string()}", logger, logging.ERROR)
-
-                raise RuntimeError(f"Retrieving user by {chat_message.chat_platform.value} ID `{_sender_id}`, "
-                                   f"results in multiple users!!")
-
-            return None
-
     def create_default_fsm_state(self) -> HandleGatewayDataRequestState:
         return DoctorAgent.HandleGatewayDataRequestState()
 
@@ -165,7 +168,7 @@ def _start_web_server(agent: DoctorAgent, connection_manager: AbstractCovid19Con
         connection_manager.get_question_to_exercise_set_mapping_dao()
     )
     strategy_dao: AbstractStrategyDAO = connection_manager.get_strategy_dao()
-    pryv_api: PryvAPI = PryvAPI(connection_manager.pryv_server_domain)
+    pryv_api: AsyncPryvAPI = AsyncPryvAPI(connection_manager.pryv_server_domain)
 
     index_file = "index.html"
 
@@ -200,84 +203,122 @@ def _start_web_server(agent: DoctorAgent, connection_manager: AbstractCovid19Con
         create_user_language_controller(user_dao)
     )
 
+    # Catalogue collections are modified only through versioned controllers, so their responses can be cached
+    response_cache_dao = LRUCacheDAO(connection_manager.get_cache_dao())
+
+    def add_all_cached_catalogue_get_controllers(resource_name: str, object_dao, collection: CatalogueCollection):
+        add_all_get_controllers(
+            agent, API_MOUNT_POINT, resource_name, object_dao, response_cache_dao,
+            lambda: catalogue_collection_version(connection_manager, collection)
+        )
+
     add_all_get_controllers(agent, API_MOUNT_POINT, "user", user_dao)
-    add_all_get_controllers(agent, API_MOUNT_POINT, "user_goal", user_goal_dao)
-    add_all_get_controllers(agent, API_MOUNT_POINT, "question", evaluation_question_dao)
-    add_all_get_controllers(agent, API_MOUNT_POINT, "exercise", exercises_dao)
+    add_all_cached_catalogue_get_controllers("user_goal", user_goal_dao, CatalogueCollection.USER_GOALS)
+    add_all_cached_catalogue_get_controllers(
+        "question", evaluation_question_dao, CatalogueCollection.EVALUATION_QUESTIONS
+    )
+    add_all_cached_catalogue_get_controllers("exercise", exercises_dao, CatalogueCollection.EXERCISES)
     add_all_get_controllers(agent, API_MOUNT_POINT, "strategy", strategy_dao)
     add_get_raw_controller(
         agent, f"{API_MOUNT_POINT}/exercise/{{{OBJECT_ID_URL_MATCHER_STRING}}}/gif",
         create_exercise_gif_controller(exercises_dao)
     )
-    add_all_get_controllers(agent, API_MOUNT_POINT, "exercise_set", exercise_sets_dao)
-    add_all_get_controllers(
-        agent, API_MOUNT_POINT, "question_to_exercise_sets_mapping", questions_to_exercise_sets_dao
+    add_all_cached_catalogue_get_controllers("exercise_set", exercise_sets_dao, CatalogueCollection.EXERCISE_SETS)
+    add_all_cached_catalogue_get_controllers(
+        "question_to_exercise_sets_mapping", questions_to_exercise_sets_dao,
+        CatalogueCollection.QUESTION_TO_EXERCISE_SET_MAPPINGS
     )
     add_get_raw_controller(
         agent, f"{API_MOUNT_POINT}/user/{{{OBJECT_ID_URL_MATCHER_STRING}}}/level_history",
-        create_user_level_history_controller(user_dao, evaluation_question_dao, pryv_api)
+        create_user_level_history_controller(
+            user_dao, evaluation_question_dao, pryv_api, connection_manager, response_cache_dao
+        )
     )
 
-    add_post_raw_controller(agent, f"{API_MOUNT_POINT}/exercise", create_exercise_controller(exercises_dao))
+    def catalogue_change(controller, changed_collection: CatalogueCollection):
+        return with_catalogue_change_notification(controller, connection_manager, changed_collection)
+
+    add_post_raw_controller(
+        agent, f"{API_MOUNT_POINT}/exercise",
+        catalogue_change(create_exercise_controller(exercises_dao), CatalogueCollection.EXERCISES)
+    )
     add_post_raw_controller(
         agent, f"{API_MOUNT_POINT}/exercise/{{{OBJECT_ID_URL_MATCHER_STRING}}}",
-        create_modify_exercise_controller(exercises_dao)
+        catalogue_change(create_modify_exercise_controller(exercises_dao), CatalogueCollection.EXERCISES)
     )
     add_post_raw_controller(
         agent, f"{API_MOUNT_POINT}/exercise/{{{OBJECT_ID_URL_MATCHER_STRING}}}/delete",
-        create_delete_exercise_controller(exercises_dao)
+        catalogue_change(create_delete_exercise_controller(exercises_dao), CatalogueCollection.EXERCISES)
     )
 
     add_post_raw_controller(
-        agent, f"{API_MOUNT_POINT}/exercise_set", create_exercise_set_controller(
-            exercise_sets_dao, exercises_dao, user_goal_dao
+        agent, f"{API_MOUNT_POINT}/exercise_set", catalogue_change(
+            create_exercise_set_controller(exercise_sets_dao, exercises_dao, user_goal_dao),
+            CatalogueCollection.EXERCISE_SETS
         )
     )
     add_post_raw_controller(
-        agent, f"{API_MOUNT_POINT}/exercise_set/{{{OBJECT_ID_URL_MATCHER_STRING}}}",
-        create_modify_exercise_set_controller(
-            exercise_sets_dao, exercises_dao, user_goal_dao
+        agent, f"{API_MOUNT_POINT}/exercise_set/{{{OBJECT_ID_URL_MATCHER_STRING}}}", catalogue_change(
+            create_modify_exercise_set_controller(exercise_sets_dao, exercises_dao, user_goal_dao),
+            CatalogueCollection.EXERCISE_SETS
         )
     )
     add_post_raw_controller(
         agent, f"{API_MOUNT_POINT}/exercise_set/{{{OBJECT_ID_URL_MATCHER_STRING}}}/delete",
-        create_delete_object_controller(exercise_sets_dao)
+        catalogue_change(create_delete_object_controller(exercise_sets_dao), CatalogueCollection.EXERCISE_SETS)
     )
 
     add_post_raw_controller(
-        agent, f"{API_MOUNT_POINT}/question_to_exercise_sets_mapping", create_exercise_set_mapping_controller(
-            questions_to_exercise_sets_dao, exercise_sets_dao, evaluation_question_dao
+        agent, f"{API_MOUNT_POINT}/question_to_exercise_sets_mapping", catalogue_change(
+            create_exercise_set_mapping_controller(
+                questions_to_exercise_sets_dao, exercise_sets_dao, evaluation_question_dao
+            ),
+            CatalogueCollection.QUESTION_TO_EXERCISE_SET_MAPPINGS
         )
     )
     add_post_raw_controller(
         agent, f"{API_MOUNT_POINT}/question_to_exercise_sets_mapping/{{{OBJECT_ID_URL_MATCHER_STRING}}}",
-        create_modify_exercise_set_mapping_controller(
-            questions_to_exercise_sets_dao, exercise_sets_dao, evaluation_question_dao
+        catalogue_change(
+            create_modify_exercise_set_mapping_controller(
+                questions_to_exercise_sets_dao, exercise_sets_dao, evaluation_question_dao
+            ),
+            CatalogueCollection.QUESTION_TO_EXERCISE_SET_MAPPINGS
         )
     )
     add_post_raw_controller(
         agent, f"{API_MOUNT_POINT}/question_to_exercise_sets_mapping/{{{OBJECT_ID_URL_MATCHER_STRING}}}/delete",
-        create_delete_object_controller(questions_to_exercise_sets_dao)
+        catalogue_change(
+            create_delete_object_controller(questions_to_exercise_sets_dao),
+            CatalogueCollection.QUESTION_TO_EXERCISE_SET_MAPPINGS
+        )
     )
 
-    add_post_raw_controller(agent, f"{API_MOUNT_POINT}/question", create_question_controller(evaluation_question_dao))
     add_post_raw_controller(
-        agent, f"{API_MOUNT_POINT}/question/{{{OBJECT_ID_URL_MATCHER_STRING}}}",
-        create_modify_question_controller(evaluation_question_dao)
+        agent, f"{API_MOUNT_POINT}/question",
+        catalogue_change(create_question_controller(evaluation_question_dao), CatalogueCollection.EVALUATION_QUESTIONS)
     )
     add_post_raw_controller(
-        agent, f"{API_MOUNT_POINT}/question/{{{OBJECT_ID_URL_MATCHER_STRING}}}/delete",
-        create_delete_question_controller(evaluation_question_dao)
+        agent, f"{API_MOUNT_POINT}/question/{{{OBJECT_ID_URL_MATCHER_STRING}}}", catalogue_change(
+            create_modify_question_controller(evaluation_question_dao), CatalogueCollection.EVALUATION_QUESTIONS
+        )
+    )
+    add_post_raw_controller(
+        agent, f"{API_MOUNT_POINT}/question/{{{OBJECT_ID_URL_MATCHER_STRING}}}/delete", catalogue_change(
+            create_delete_question_controller(evaluation_question_dao), CatalogueCollection.EVALUATION_QUESTIONS
+        )
     )
 
-    add_post_raw_controller(agent, f"{API_MOUNT_POINT}/user_goal", create_user_goal_controller(user_goal_dao))
+    add_post_raw_controller(
+        agent, f"{API_MOUNT_POINT}/user_goal",
+        catalogue_change(create_user_goal_controller(user_goal_dao), CatalogueCollection.USER_GOALS)
+    )
     add_post_raw_controller(
         agent, f"{API_MOUNT_POINT}/user_goal/{{{OBJECT_ID_URL_MATCHER_STRING}}}",
-        create_modify_user_goal_controller(user_goal_dao)
+        catalogue_change(create_modify_user_goal_controller(user_goal_dao), CatalogueCollection.USER_GOALS)
     )
     add_post_raw_controller(
         agent, f"{API_MOUNT_POINT}/user_goal/{{{OBJECT_ID_URL_MATCHER_STRING}}}/delete",
-        create_delete_object_controller(user_goal_dao)
+        catalogue_change(create_delete_object_controller(user_goal_dao), CatalogueCollection.USER_GOALS)
     )
 
     to_serve_folder = Path(os.path.join(Path(__file__).parent, page_root))
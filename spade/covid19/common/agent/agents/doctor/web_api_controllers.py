@@ -1,9 +1,12 @@
+import asyncio
 import json
 import logging
 import os
+import time
 import uuid
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, List, Tuple, Callable
+from typing import Optional, List, Tuple, Callable, Awaitable, Mapping
 
 from aiohttp.web_exceptions import HTTPNotFound
 from aiohttp.web_request import Request, FileField
@@ -11,13 +14,18 @@ from aiohttp.web_response import Response
 from bson import json_util
 
 from common.agent.web.controllers import (
-    create_json_response, OBJECT_ID_URL_MATCHER_STRING, CORS_HEADER, get_request_time_window
+    create_json_response, OBJECT_ID_URL_MATCHER_STRING, CORS_HEADER, get_request_time_window, handle_request_with_cache
 )
-from common.agent.web.mime_type_utils import get_mime_type_from_extension
+from common.agent.web.static_assets import StaticAssetCache
 from common.database.abstract_dao import AbstractDAO, T
-from common.pryv.api_wrapper import PryvAPI
+from common.database.cache.abstract_cache_dao import AbstractCacheDAO
+from common.database.cache.model.abstract_cache_data import AbstractCacheData
+from common.pryv.async_api_wrapper import AsyncPryvAPI
 from common.pryv.model import PryvEvent
-from covid19.common.agent.agents.level_model import compute_user_level
+from common.utils.caching import TTLCache
+from covid19.common.agent.agents.level_model import compute_user_level, get_question_chain_index, QuestionChainIndex
+from covid19.common.database.catalogue import CatalogueCollection, CatalogueCache
+from covid19.common.database.connection_manager import AbstractCovid19ConnectionManager
 from covid19.common.database.mongo_db_pryv_hybrid.models import PryvStoredData
 from covid19.common.database.user.daos import (
     AbstractExerciseDAO, AbstractExerciseSetDAO, AbstractUserGoalDAO, AbstractQuestionToExerciseSetMappingDAO,
@@ -40,6 +48,15 @@ logger = logging.getLogger(__name__)
 
 API_MOUNT_POINT = "/api/v1"
 
+LEVEL_HISTORY_CACHE_SIZE = int(os.environ.get("LEVEL_HISTORY_CACHE_SIZE", "200"))
+"""The maximum number of users whose level events are kept in memory, for level history requests"""
+
+LEVEL_HISTORY_CACHE_TTL_SECONDS = float(os.environ.get("LEVEL_HISTORY_CACHE_TTL_SECONDS", "3600"))
+"""The time after which cached level events of a user are downloaded again from scratch"""
+
+LEVEL_EVENTS_PAIRING_TOLERANCE_SECONDS = float(os.environ.get("LEVEL_EVENTS_PAIRING_TOLERANCE_SECONDS", "5"))
+"""The maximum time distance between question and answer events considered part of the same level change"""
+
 
 def _get_form_field(form_data, form_field: str) -> Optional[str]:
     """Utility function to get form data from client"""
@@ -47,8 +64,33 @@ def _get_form_field(form_data, form_field: str) -> Optional[str]:
     return form_data.get(form_field) if form_data.get(form_field) else None
 
 
-def create_exercise_gif_controller(exercises_dao: AbstractExerciseDAO):
-    """Creates the coroutine handling the getting of the GIF image about an exercise"""
+def with_catalogue_change_notification(
+        controller: Callable[[Request], Awaitable[Response]],
+        connection_manager: AbstractCovid19ConnectionManager,
+        changed_collection: CatalogueCollection
+):
+    """Wraps a controller modifying the catalogue, so that agents caching it reload it after each successful change"""
+
+    async def notifying_controller(request: Request):
+        """The controller notifying the catalogue change after the wrapped one succeeds"""
+
+        response = await controller(request)
+        CatalogueCache.notify_changed(connection_manager, changed_collection)
+        return response
+
+    return notifying_controller
+
+
+def create_exercise_gif_controller(exercises_dao: AbstractExerciseDAO,
+                                   exercise_gif_cache: Optional[StaticAssetCache] = None):
+    """
+    Creates the coroutine handling the getting of the GIF image about an exercise
+
+    GIFs are kept in memory and support conditional and range requests
+    """
+
+    if exercise_gif_cache is None:
+        exercise_gif_cache = StaticAssetCache()
 
     async def exercise_gif_controller(request: Request):
         """The controller handling exercise GIF request"""
@@ -57,11 +99,12 @@ def create_exercise_gif_controller(exercises_dao: AbstractExerciseDAO):
         logger.debug(f" Request GIF of object with ID: `{object_id}`")
 
         an_object: Optional[AbstractExercise] = exercises_dao.find_by_id(object_id)
-        if an_object and an_object.gif_path:
-            file_path = Path(os.path.join(Path(__file__), GO_UP_PATH_STRING, an_object.gif_path))
-            norm_path = os.path.normpath(file_path)
-            with open(norm_path, "rb") as file:
-                return Response(body=file.read(), content_type=get_mime_type_from_extension(norm_path))
+        gif_asset = exercise_gif_cache.get(
+            os.path.join(Path(__file__), GO_UP_PATH_STRING, an_object.gif_path)
+        ) if an_object and an_object.gif_path else None
+
+        if gif_asset is not None:
+            return gif_asset.response_to(request)
         else:
             raise HTTPNotFound(reason=f"No GIF for object with ID `{object_id}`", headers=CORS_HEADER)
 
@@ -420,12 +463,112 @@ def create_modify_user_goal_controller(user_goal_dao: AbstractUserGoalDAO):
     return user_goal_modification_controller
 
 
+@dataclass
+class _CachedLevelEvents:
+    """
+    The level events of a user, downloaded from Pryv, covering a time window
+
+    Events lists start with the last event before the window, if any, which gives the level at its start
+    """
+
+    from_timestamp: float
+    to_timestamp: float
+    question_events: List[PryvEvent]
+    answer_events: List[PryvEvent]
+
+
+def _merge_events(old_events: List[PryvEvent], new_events: List[PryvEvent]) -> List[PryvEvent]:
+    """Utility function to merge time ordered events, new ones replacing old ones with the same ID"""
+
+    new_event_ids = {event.id for event in new_events}
+    return sorted(
+        [event for event in old_events if event.id not in new_event_ids] + new_events, key=lambda event: event.time
+    )
+
+
+def _last_event_before(events: List[PryvEvent], timestamp: float) -> Optional[PryvEvent]:
+    """Utility function to find the last of time ordered events happened before the timestamp"""
+
+    previous_events = [event for event in events if event.time < timestamp]
+    return previous_events[-1] if previous_events else None
+
+
+def _merge_join_level_events(
+        question_events: List[PryvEvent],
+        answer_events: List[PryvEvent],
+        questions_by_id: Mapping[str, AbstractEvaluationQuestion],
+        question_chain_index: QuestionChainIndex,
+        previous_question_event: Optional[PryvEvent] = None,
+        previous_answer_event: Optional[PryvEvent] = None
+) -> List[dict]:
+    """
+    Utility function to join question and answer events by time
+
+    Events nearer than the pairing tolerance are considered a single level change, and the user level
+    at each change is made of the last question and the last answer seen, starting from the previous ones
+    """
+
+    timeline = sorted(
+        [(event.time, True, event) for event in question_events] +
+        [(event.time, False, event) for event in answer_events],
+        key=lambda timed_event: timed_event[0]
+    )
+
+    level_history = []
+    current_question_id: Optional[str] = (
+        str(json_util.loads(previous_question_event.content)) if previous_question_event is not None else None
+    )
+    current_answer: Optional[DifficultyField] = (
+        DifficultyField(int(previous_answer_event.content)) if previous_answer_event is not None else None
+    )
+    event_index = 0
+    while event_index < len(timeline):
+        change_time = timeline[event_index][0]
+        while event_index < len(timeline) and (
+                timeline[event_index][0] - change_time <= LEVEL_EVENTS_PAIRING_TOLERANCE_SECONDS
+        ):
+            _, is_question_event, event = timeline[event_index]
+            if is_question_event:
+                current_question_id = str(json_util.loads(event.content))
+            else:
+                current_answer = DifficultyField(int(event.content))
+            event_index += 1
+
+        question = questions_by_id.get(current_question_id, None)
+        if question is not None and current_answer is not None:
+            level_history.append({
+                'timestamp': change_time,
+                'level': compute_user_level(question, current_answer, question_chain_index).split('/')[0].strip()
+            })
+
+    return level_history
+
+
+def _restrict_level_history(level_history: List[dict], start_timestamp: int, end_timestamp: int) -> List[dict]:
+    """Utility function to keep the level changes inside the provided time window, in milliseconds"""
+
+    return [
+        level_change for level_change in level_history
+        if start_timestamp / 1000.0 <= level_change['timestamp'] <= end_timestamp / 1000.0
+    ]
+
+
 def create_user_level_history_controller(
         user_dao: AbstractUserDAO,
         questions_dao: AbstractEvaluationQuestionDAO,
-        pryv_api: PryvAPI
+        pryv_api: AsyncPryvAPI,
+        connection_manager: AbstractCovid19ConnectionManager,
+        cache_dao: Optional[AbstractCacheDAO] = None
 ):
-    """Creates the coroutine handling the retrieval of user level history"""
+    """
+    Creates the coroutine handling the retrieval of user level history, optionally using cache
+
+    Responses are cached by time window buckets, once their window is over, as level events are added only at present
+    """
+
+    cached_level_events: TTLCache[Tuple[str, str], _CachedLevelEvents] = TTLCache(
+        LEVEL_HISTORY_CACHE_SIZE, LEVEL_HISTORY_CACHE_TTL_SECONDS
+    )
 
     async def user_level_history_controller(request: Request):
         """The controller handling user level history retrieval"""
@@ -434,46 +577,112 @@ def create_user_level_history_controller(
         logger.debug(f" Request for data about user with ID: `{object_id}`")
 
         a_user: Optional[AbstractUser] = user_dao.find_by_id(object_id)
-        if a_user:
-            start_timestamp, end_timestamp = await get_request_time_window(request)
+        if a_user is None:
+            raise HTTPNotFound(reason=f"No user with ID `{object_id}`", headers=CORS_HEADER)
+
+        async def level_history_request_handler(client_request: Request) -> Tuple[List[dict], int]:
+            """The request handler computing the level history, and whether its window was already over"""
 
-            def get_pryv_events_for(stream_id: str) -> List[PryvEvent]:
-                return pryv_api.get_events(
+            start_timestamp, end_timestamp = await get_request_time_window(client_request)
+            from_timestamp, to_timestamp = start_timestamp / 1000.0, end_timestamp / 1000.0
+            window_over = int(to_timestamp <= time.time())
+
+            async def get_pryv_events_between(stream_id: str, events_from: float,
+                                              events_to: float) -> List[PryvEvent]:
+                return await pryv_api.get_events(
                     a_user.pryv_endpoint,
-                    from_timestamp=start_timestamp / 1000.0,
-                    to_timestamp=end_timestamp / 1000.0,
+                    from_timestamp=events_from,
+                    to_timestamp=events_to,
                     streams=[stream_id],
                     sort_ascending=True
                 )
 
-            questions_history = get_pryv_events_for(PryvStoredData.CURRENT_QUESTION.value[0])
-            question_answers_history = get_pryv_events_for(PryvStoredData.CURRENT_QUESTION_ANSWER.value[0])
+            async def get_level_events_between(events_from: float,
+                                               events_to: float) -> Tuple[List[PryvEvent], List[PryvEvent]]:
+                return await asyncio.gather(
+                    get_pryv_events_between(PryvStoredData.CURRENT_QUESTION.value[0], events_from, events_to),
+                    get_pryv_events_between(PryvStoredData.CURRENT_QUESTION_ANSWER.value[0], events_from, events_to)
+                )
 
-            if len(questions_history) != len(question_answers_history):
-                logger.warning(
-                    f" Mismatch! The retrieved questions count is different from the questions-answer count!"
+            async def get_last_pryv_event_before(stream_id: str, events_to: float) -> List[PryvEvent]:
+                # Without an explicit start Pryv would only look at the day before the end
+                return await pryv_api.get_events(
+                    a_user.pryv_endpoint,
+                    from_timestamp=0,
+                    to_timestamp=events_to,
+                    streams=[stream_id],
+                    sort_ascending=False,
+                    limit=1
                 )
-                # Here we could make a cleanup of data, checking whether the events are near in time
 
-            question_answer_pair_history = zip(
-                [(question.content, question.time) for question in questions_history],
-                [(answer.content, answer.time) for answer in question_answers_history]
-            )
-            result_for_client = []
-            for ((question_content, question_time), (answer_content, answer_time)) in question_answer_pair_history:
-                question_id = json_util.loads(question_content)
-                question = questions_dao.find_by_id(question_id)
-                answer = DifficultyField(int(answer_content))
-                result_for_client.append(
-                    {
-                        'timestamp': question_time,
-                        'level': compute_user_level(question, answer).split('/')[0].strip()
-                    }
+            async def get_level_events_from(events_from: float,
+                                            events_to: float) -> Tuple[List[PryvEvent], List[PryvEvent]]:
+                (previous_question_events, previous_answer_events, (question_events, answer_events)) = (
+                    await asyncio.gather(
+                        get_last_pryv_event_before(PryvStoredData.CURRENT_QUESTION.value[0], events_from),
+                        get_last_pryv_event_before(PryvStoredData.CURRENT_QUESTION_ANSWER.value[0], events_from),
+                        get_level_events_between(events_from, events_to)
+                    )
+                )
+                return (
+                    _merge_events(previous_question_events, question_events),
+                    _merge_events(previous_answer_events, answer_events)
                 )
 
-            return await create_json_response(result_for_client)
+            # Events can still be added up to now, so the cached window never goes beyond it
+            covered_to_timestamp = min(to_timestamp, time.time())
+            cache_key = (object_id, a_user.pryv_endpoint)
+            found, cached = cached_level_events.get(cache_key)
+            if found and cached.from_timestamp <= from_timestamp:
+                if to_timestamp > cached.to_timestamp:
+                    new_question_events, new_answer_events = await get_level_events_between(
+                        cached.to_timestamp, to_timestamp
+                    )
+                    logger.debug(f" Retrieved {len(new_question_events) + len(new_answer_events)} new level events")
+                    cached.question_events = _merge_events(cached.question_events, new_question_events)
+                    cached.answer_events = _merge_events(cached.answer_events, new_answer_events)
+                    cached.to_timestamp = max(cached.to_timestamp, covered_to_timestamp)
+            else:
+                question_events, answer_events = await get_level_events_from(from_timestamp, to_timestamp)
+                cached = _CachedLevelEvents(from_timestamp, covered_to_timestamp, question_events, answer_events)
+                cached_level_events.put(cache_key, cached)
+
+            questions_history = [
+                event for event in cached.question_events if from_timestamp <= event.time <= to_timestamp
+            ]
+            question_answers_history = [
+                event for event in cached.answer_events if from_timestamp <= event.time <= to_timestamp
+            ]
+
+            # The level at the start of the window comes from the events preceding it
+            previous_question_event = _last_event_before(cached.question_events, from_timestamp)
+            previous_answer_event = _last_event_before(cached.answer_events, from_timestamp)
+
+            question_events_to_join = questions_history + (
+                [previous_question_event] if previous_question_event is not None else []
+            )
+            questions_by_id = questions_dao.find_by_ids(
+                list({str(json_util.loads(event.content)) for event in question_events_to_join})
+            )
+            result_for_client = _merge_join_level_events(
+                questions_history, question_answers_history, questions_by_id,
+                get_question_chain_index(connection_manager),
+                previous_question_event, previous_answer_event
+            )
+
+            return result_for_client, window_over
+
+        async def invalid_cache(_: Request, cache: AbstractCacheData) -> bool:
+            """A strategy considering valid only responses computed once their window was over"""
+            return not cache.cache_over_number
+
+        if cache_dao is None:
+            return await create_json_response((await level_history_request_handler(request))[0])
         else:
-            raise HTTPNotFound(reason=f"No user with ID `{object_id}`", headers=CORS_HEADER)
+            return await handle_request_with_cache(
+                request, level_history_request_handler, invalid_cache, cache_dao,
+                time_window_bucketed=True, restrict_to_time_window=_restrict_level_history
+            )
 
     return user_level_history_controller
 
@@ -1,21 +1,91 @@
+from typing import List, Optional, Mapping, Tuple, MutableMapping
+
+from covid19.common.database.catalogue import CatalogueCache
+from covid19.common.database.connection_manager import AbstractCovid19ConnectionManager
 from covid19.common.database.user.field_enums import DifficultyField
 from covid19.common.database.user.model.abstract_evaluation_question import AbstractEvaluationQuestion
 
 
-def compute_user_level(question: AbstractEvaluationQuestion, question_answer: DifficultyField) -> str:
+class QuestionChainIndex:
+    """An index giving, for each evaluation question, its ordinal in the question chain and the chain length"""
+
+    def __init__(self, questions: List[AbstractEvaluationQuestion]):
+        ordinals: MutableMapping[str, int] = {}
+        chain_heads: MutableMapping[str, str] = {}
+
+        for question in questions:
+            # Walk backwards only up to the first question whose ordinal is already known
+            to_be_numbered: List[AbstractEvaluationQuestion] = []
+            current_question = question
+            while current_question is not None and current_question.id not in ordinals:
+                to_be_numbered.append(current_question)
+                current_question = current_question.previous
+
+            if current_question is None:
+                ordinal, chain_head = 0, to_be_numbered[-1].id
+            else:
+                ordinal, chain_head = ordinals[current_question.id], chain_heads[current_question.id]
+
+            for numbered_question in reversed(to_be_numbered):
+                ordinal += 1
+                ordinals[numbered_question.id] = ordinal
+                chain_heads[numbered_question.id] = chain_head
+
+        chain_lengths: MutableMapping[str, int] = {}
+        for question_id, ordinal in ordinals.items():
+            chain_head = chain_heads[question_id]
+            chain_lengths[chain_head] = max(chain_lengths.get(chain_head, 0), ordinal)
+
+        self._positions: Mapping[str, Tuple[int, int]] = {
+            question_id: (ordinal, chain_lengths[chain_heads[question_id]])
+            for question_id, ordinal in ordinals.items()
+        }
+
+    def position_of(self, question: AbstractEvaluationQuestion) -> Optional[Tuple[int, int]]:
+        """Gets the ordinal of the question, starting from 1, and the length of its chain, if the question is known"""
+        return self._positions.get(question.id, None)
+
+
+def get_question_chain_index(
+        connection_manager: Optional[AbstractCovid19ConnectionManager] = None
+) -> QuestionChainIndex:
+    """
+    Gets the question chain index of the current catalogue version
+
+    :param connection_manager: if provided, the catalogue is refreshed first, if its version changed
+    """
+
+    catalogue = CatalogueCache.get_instance()
+    if connection_manager is not None:
+        catalogue.refresh_if_changed(connection_manager)
+
+    return catalogue.derived_data(
+        "question_chain_index", lambda current_catalogue: QuestionChainIndex(
+            list(current_catalogue.evaluation_questions.values())
+        )
+    )
+
+
+def compute_user_level(question: AbstractEvaluationQuestion, question_answer: DifficultyField,
+                       question_chain_index: Optional[QuestionChainIndex] = None) -> str:
     """Utility method to compute the user level"""
 
-    current_count = 1
-    current_question = question
+    position = (question_chain_index or get_question_chain_index()).position_of(question)
+    if position is not None:
+        user_level, current_count = position
+    else:
+        # The question is not in the catalogue loaded in this process, walk the chain
+        current_count = 1
+        current_question = question
 
-    while current_question.previous is not None:
-        current_count += 1
-        current_question = current_question.previous
+        while current_question.previous is not None:
+            current_count += 1
+            current_question = current_question.previous
 
-    user_level = current_count
-    current_question = question
-    while current_question.next is not None:
-        current_count += 1
-        current_question = current_question.next
+        user_level = current_count
+        current_question = question
+        while current_question.next is not None:
+            current_count += 1
+            current_question = current_question.next
 
     return f"{user_level}.{question_answer.value}  /  {current_count}.{DifficultyField.EASY.value}"
@@ -2,6 +2,8 @@ import logging
 from abc import ABC
 from typing import Optional
 
+from spade.message import Message
+
 from common.agent.agents.abstract_user_agent import AbstractMessagingPlatformReceiveMessageState
 from common.chat.platform.types import ChatPlatform
 from common.custom_chat.message_dao import AbstractMessageDAO
@@ -26,6 +28,15 @@ class AbstractCovid19ReceiveMessageState(AbstractMessagingPlatformReceiveMessage
         self.user: Optional[AbstractUser] = None
         self.messaging_platform_handling_strategies: Optional[AbstractCovid19HandlingStrategies] = None
 
+    async def on_message_received(self, mas_message: Message):
+        db_connection_manager: AbstractCovid19ConnectionManager = self.agent.db_connection_manager
+        if db_connection_manager is None:
+            await super().on_message_received(mas_message)
+        else:
+            # Writes done while handling the message are coalesced, and saved after it
+            with db_connection_manager.deferred_writes():
+                await super().on_message_received(mas_message)
+
     def create_platform_strategies(self, chat_platform: ChatPlatform) -> AbstractCovid19HandlingStrategies:
         return HandlingStrategiesFactory.strategies_for(chat_platform)
 
@@ -12,7 +12,8 @@ from common.chat.message.types import ChatActualMessage, ChatQuickReply
 from common.chat.platform.types import ChatPlatform
 from common.custom_chat.client_notification_manager import ClientNotificationManager
 from common.database.abstract_suggestion_event import AbstractSuggestionEvent
-from common.pryv.api_wrapper import PryvAPI
+from common.database.hibernation.abstract_hibernation_dao import AbstractAgentHibernationDAO
+from common.pryv.async_api_wrapper import AsyncPryvAPI
 from common.utils.lists import flatten_list
 from covid19.common.agent.agents.interaction_texts import (
     BOT_INTRODUCTION_MESSAGE_TEXT_NOT_LOCALIZED, START_COMMAND_ALREADY_REGISTERED_MESSAGE_TEXT_NOT_LOCALIZED,
@@ -28,19 +29,17 @@ from covid19.common.agent.agents.user.data_management_states import (
     FavouriteWeekDaysInsertionState, GoalSettingState, UpdatePersonalDataState, LanguageInsertionState,
     UserEvaluationQuestionsState, PryvAccessAskingState, NameInsertionState
 )
-from covid19.common.agent.agents.user.mappings_to_exercise_sets_utils import get_exercise_sets_for
+from covid19.common.agent.agents.user.mappings_to_exercise_sets_utils import get_exercise_sets_for, LevelIndex
 from covid19.common.agent.agents.user.privacy_statement import generate_privacy_statement_not_localized
 from covid19.common.agent.agents.user.proactive_notification_behaviour import ProactiveNotificationSettingBehaviour
 from covid19.common.agent.agents.user.sport_session_management_states import (
     InSportSessionState, DifficultyRatingState, FunnyRatingState, AbortSessionState
 )
 from covid19.common.agent.available_functionality_enums import SlashCommands, UserFunctionality
+from covid19.common.database.catalogue import CatalogueCache
 from covid19.common.database.connection_manager import AbstractCovid19ConnectionManager
 from covid19.common.database.enums import Usefulness
-from covid19.common.database.user.daos import (
-    AbstractUserDAO, AbstractUserGoalDAO, AbstractEvaluationQuestionDAO,
-    AbstractQuestionToExerciseSetMappingDAO
-)
+from covid19.common.database.user.daos import AbstractUserDAO
 from covid19.common.database.user.model.abstract_evaluation_question import AbstractEvaluationQuestion
 from covid19.common.database.user.model.abstract_question_to_exercise_set_mapping import (
     AbstractQuestionToExerciseSetMapping
@@ -51,21 +50,11 @@ from covid19.common.database.user.model.abstract_user_goal import AbstractUserGo
 logger = logging.getLogger(__name__)
 
 
-class UserAgent(AbstractUserAgent):
-    """The Agent which will manage each system User"""
-
-    def __init__(self, jid, password, my_user_id: str, gateway_agents_jids: List[str], doctor_jid: str,
-                 default_platform_and_token: Tuple[ChatPlatform, str],
-                 db_connection_manager: AbstractCovid19ConnectionManager):
-        super().__init__(jid, password, my_user_id, gateway_agents_jids)
-
-        self.doctor_jid: str = doctor_jid
-        self.default_platform_and_token: Tuple[ChatPlatform, str] = default_platform_and_token
-        self.db_connection_manager: AbstractCovid19ConnectionManager = db_connection_manager
+class Covid19UserMixin:
+    """The fields and methods shared by the agents and the sessions managing each system User"""
 
-        self.available_goals: Optional[Mapping[str, AbstractUserGoal]] = None
-        self.evaluation_questions: Optional[Mapping[str, AbstractEvaluationQuestion]] = None
-        self.question_to_exercise_set_mappings: Optional[Mapping[str, AbstractQuestionToExerciseSetMapping]] = None
+    user_id: str
+    db_connection_manager: AbstractCovid19ConnectionManager
 
     async def retrieve_current_user(self) -> AbstractUser:
         self.db_connection_manager.connect_to_db()
@@ -77,6 +66,56 @@ class UserAgent(AbstractUserAgent):
 
         self.db_connection_manager.disconnect_from_db()
 
+    def load_agent_database_fields(self):
+        """Utility function to load database fields"""
+        log(self, f"Reload agent database fields, for possible data refresh", logger)
+
+        try:
+            CatalogueCache.get_instance().refresh_if_changed(self.db_connection_manager)
+        except:
+            log_exception(self, logger)
+
+    @property
+    def available_goals(self) -> Mapping[str, AbstractUserGoal]:
+        """The user goals available for selection, shared with other agents"""
+        return CatalogueCache.get_instance().available_goals
+
+    @property
+    def evaluation_questions(self) -> Mapping[str, AbstractEvaluationQuestion]:
+        """The user evaluation questions, shared with other agents"""
+        return CatalogueCache.get_instance().evaluation_questions
+
+    @property
+    def question_to_exercise_set_mappings(self) -> Mapping[str, AbstractQuestionToExerciseSetMapping]:
+        """The mappings from question answers to exercise sets, shared with other agents"""
+        return CatalogueCache.get_instance().question_to_exercise_set_mappings
+
+    @property
+    def level_index(self) -> LevelIndex:
+        """The index of user levels built over question to exercise set mappings, shared with other agents"""
+        return CatalogueCache.get_instance().derived_data(
+            "level_index", lambda catalogue: LevelIndex(list(catalogue.question_to_exercise_set_mappings.values()))
+        )
+
+    def get_hibernation_dao(self) -> AbstractAgentHibernationDAO:
+        return self.db_connection_manager.get_agent_hibernation_dao()
+
+    def create_messaging_platform_receive_message_behaviour(self) -> WaitForMessageFSMBehaviour:
+        return UserAgent.Covid19MessageFSMHandlingBehaviour(UserAgent.MessagingPlatformReceiveMessageState)
+
+
+class UserAgent(Covid19UserMixin, AbstractUserAgent):
+    """The Agent which will manage each system User"""
+
+    def __init__(self, jid, password, my_user_id: str, gateway_agents_jids: List[str], doctor_jid: str,
+                 default_platform_and_token: Tuple[ChatPlatform, str],
+                 db_connection_manager: AbstractCovid19ConnectionManager):
+        super().__init__(jid, password, my_user_id, gateway_agents_jids)
+
+        self.doctor_jid: str = doctor_jid
+        self.default_platform_and_token: Tuple[ChatPlatform, str] = default_platform_and_token
+        self.db_connection_manager: AbstractCovid19ConnectionManager = db_connection_manager
+
     async def setup(self):
         await super().setup()
 
@@ -94,32 +133,15 @@ class UserAgent(AbstractUserAgent):
 
         log(self, f"UserAgent started.", logger)
 
-    def load_agent_database_fields(self):
-        """Utility function to load database fields"""
-        log(self, f"Reload agent database fields, for possible data refresh", logger)
-
-        try:
-            user_goal_dao: AbstractUserGoalDAO = self.db_connection_manager.get_user_goal_dao()
-            self.available_goals: Mapping[str, AbstractUserGoal] = user_goal_dao.find_by()
-        except:
-            log_exception(self, logger)
+    async def _async_stop(self):
+        # Changes deferred while handling messages are saved, not to lose them
         try:
-            evaluation_question_dao: AbstractEvaluationQuestionDAO = (
-                self.db_connection_manager.get_evaluation_question_dao()
-            )
-            self.evaluation_questions: Mapping[str, AbstractEvaluationQuestion] = evaluation_question_dao.find_by()
-        except:
-            log_exception(self, logger)
-        try:
-            question_to_exercise_set_mapping_dao: AbstractQuestionToExerciseSetMappingDAO = (
-                self.db_connection_manager.get_question_to_exercise_set_mapping_dao()
-            )
-            self.question_to_exercise_set_mappings: Mapping[str, AbstractQuestionToExerciseSetMapping] = (
-                question_to_exercise_set_mapping_dao.find_by()
-            )
+            await self.db_connection_manager.flush_deferred_writes()
         except:
             log_exception(self, logger)
 
+        await super()._async_stop()
+
     class Covid19MessageFSMHandlingBehaviour(WaitForMessageFSMBehaviour):
         """The FSM behaviour handling the Covid19 project interactions towards users"""
 
@@ -134,12 +156,12 @@ class UserAgent(AbstractUserAgent):
             def get_evaluation_questions() -> List[AbstractEvaluationQuestion]:
                 return list(self.agent.evaluation_questions.values())
 
-            def get_question_to_exercise_set_mappings() -> List[AbstractQuestionToExerciseSetMapping]:
-                return list(self.agent.question_to_exercise_set_mappings.values())
+            def get_level_index() -> LevelIndex:
+                return self.agent.level_index
 
-            def get_pryv_api() -> PryvAPI:
+            def get_pryv_api() -> AsyncPryvAPI:
                 db_connection_manager: AbstractCovid19ConnectionManager = self.agent.db_connection_manager
-                return PryvAPI(db_connection_manager.pryv_server_domain)
+                return AsyncPryvAPI(db_connection_manager.pryv_server_domain)
 
             pryv_access_asking_state = PryvAccessAskingState(
                 _default_handle_quick_reply, _on_registration_completed, get_user_available_goals,
@@ -179,7 +201,7 @@ class UserAgent(AbstractUserAgent):
             )
 
             asked_to_exercise = AskedToExerciseState(
-                _default_handle_quick_reply, _on_back_to_menu, get_question_to_exercise_set_mappings
+                _default_handle_quick_reply, _on_back_to_menu, get_level_index
             )
             in_sport_session_state = InSportSessionState(
                 _default_handle_quick_reply, _on_back_to_menu
@@ -188,7 +210,7 @@ class UserAgent(AbstractUserAgent):
                 _default_handle_quick_reply, _on_back_to_menu
             )
             ask_for_difficulty_rating = DifficultyRatingState(
-                _default_handle_quick_reply, _on_back_to_menu, get_question_to_exercise_set_mappings
+                _default_handle_quick_reply, _on_back_to_menu, get_level_index
             )
             ask_for_fun_rating = FunnyRatingState(
                 _default_handle_quick_reply, _on_back_to_menu
@@ -301,13 +323,18 @@ class UserAgent(AbstractUserAgent):
 
             self.agent.load_agent_database_fields()
 
+            if self.user is not None:
+                self.user.prefetch_profile()
+
             if self.should_send_back_the_menu is None:
                 self.should_send_back_the_menu = True
 
         async def check_user_completed_registration(self, user: AbstractUser) -> bool:
             connection_manager: AbstractCovid19ConnectionManager = self.agent.db_connection_manager
             if user.pryv_endpoint:
-                pryv_access_info = PryvAPI(connection_manager.pryv_server_domain).get_access_info(user.pryv_endpoint)
+                pryv_access_info = await AsyncPryvAPI(connection_manager.pryv_server_domain).get_access_info(
+                    user.pryv_endpoint
+                )
                 if pryv_access_info is None:
                     # Token revoked or something wrong with the user permissions, request Pryv auth again
                     user.pryv_endpoint = None
@@ -386,9 +413,6 @@ class UserAgent(AbstractUserAgent):
         async def handle_quick_reply(self, chat_quick_reply: ChatQuickReply):
             await _default_handle_quick_reply(self, chat_quick_reply)
 
-    def create_messaging_platform_receive_message_behaviour(self) -> WaitForMessageFSMBehaviour:
-        return UserAgent.Covid19MessageFSMHandlingBehaviour(UserAgent.MessagingPlatformReceiveMessageState)
-
 
 async def handle_command_start(state: AbstractCovid19ReceiveMessageState, recipient_id: str):
     """The handler function for what should happen when the user sends '/start' command"""
@@ -439,7 +463,7 @@ async def handle_asked_to_exercise(state: AbstractCovid19ReceiveMessageState, re
     user, language = _get_user_and_language(state)
 
     suitable_exercise_sets = get_exercise_sets_for(
-        user, list(state.agent.question_to_exercise_set_mappings.values())
+        user, state.agent.level_index
     )
     first_exercise_set = suitable_exercise_sets[0] if suitable_exercise_sets else None
 
@@ -1,6 +1,6 @@
 import logging
 from datetime import datetime
-from typing import List, Callable, Awaitable, Optional
+from typing import List, Callable, Awaitable, Optional, Mapping
 
 from common.agent.agents.interaction_texts import localize, SORRY_INTERNAL_ERROR_TEXT_NOT_LOCALIZED, localize_list
 from common.agent.behaviour.abstract_user_agent_behaviours import AbstractMenuOptionsHandlingState
@@ -13,15 +13,12 @@ from covid19.common.agent.agents.interaction_texts import (
     CHOOSE_DIFFERENT_EXERCISE_SETS_WITH_ARROWS_TEXT_NOT_LOCALIZED
 )
 from covid19.common.agent.agents.user.abstract_behaviours import AbstractCovid19ReceiveMessageState
-from covid19.common.agent.agents.user.mappings_to_exercise_sets_utils import get_exercise_sets_for
+from covid19.common.agent.agents.user.mappings_to_exercise_sets_utils import get_exercise_sets_for, LevelIndex
 from covid19.common.agent.agents.user.sport_session_management_states import InSportSessionState
 from covid19.common.agent.available_functionality_enums import UserFunctionality
 from covid19.common.database.user.factory import SportSessionFactory
 from covid19.common.database.user.field_enums import ShiftField
 from covid19.common.database.user.model.abstract_exercise_set import AbstractExerciseSet
-from covid19.common.database.user.model.abstract_question_to_exercise_set_mapping import (
-    AbstractQuestionToExerciseSetMapping
-)
 from covid19.common.database.user.model.abstract_user import AbstractUser
 
 logger = logging.getLogger(__name__)
@@ -44,7 +41,7 @@ class AskedToExerciseState(AbstractMenuOptionsHandlingState, AbstractCovid19Rece
                      [AbstractCovid19ReceiveMessageState, ChatQuickReply], Awaitable[None]
                  ],
                  on_back_to_menu: Callable[[AbstractCovid19ReceiveMessageState, str, bool], Awaitable[None]],
-                 get_question_to_exercise_set_mappings: Callable[[], List[AbstractQuestionToExerciseSetMapping]],
+                 get_level_index: Callable[[], LevelIndex],
                  ):
 
         AbstractMenuOptionsHandlingState.__init__(self, I_PROPOSE_THIS_EXERCISES_TEXT_NOT_LOCALIZED,
@@ -54,7 +51,7 @@ class AskedToExerciseState(AbstractMenuOptionsHandlingState, AbstractCovid19Rece
 
         self._default_quick_reply_handler = default_quick_reply_handler
         self._on_back_to_menu_with_optional_message = on_back_to_menu
-        self._get_question_to_exercise_set_mappings = get_question_to_exercise_set_mappings
+        self._get_level_index = get_level_index
 
         self.suitable_exercise_sets: Optional[List[AbstractExerciseSet]] = None
         self.current_displayed_exercise_set_index: int = 0
@@ -65,8 +62,18 @@ class AskedToExerciseState(AbstractMenuOptionsHandlingState, AbstractCovid19Rece
 
         if self.suitable_exercise_sets is None:
             self.suitable_exercise_sets = get_exercise_sets_for(
-                self.user, self._get_question_to_exercise_set_mappings()
+                self.user, self._get_level_index()
             )
+            if self.current_displayed_exercise_set_index >= len(self.suitable_exercise_sets):
+                self.current_displayed_exercise_set_index = 0  # restored after hibernation, but sets changed since
+
+    def hibernation_data(self) -> Mapping[str, str]:
+        return {"current_displayed_exercise_set_index": str(self.current_displayed_exercise_set_index)}
+
+    def restore_hibernation_data(self, hibernation_data: Mapping[str, str]):
+        self.current_displayed_exercise_set_index = int(
+            hibernation_data.get("current_displayed_exercise_set_index", "0")
+        )
 
     async def on_legal_value(self, user: AbstractUser, chat_actual_message: ChatActualMessage):
         legal_value: str = chat_actual_message.message_text
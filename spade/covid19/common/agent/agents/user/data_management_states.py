@@ -1,7 +1,6 @@
 import asyncio
 import logging
 from abc import ABC
-from threading import Timer
 from typing import List, Collection, Optional, Set, Any, Callable, Awaitable, Mapping
 
 from common.agent.agents.interaction_texts import markup_text, localize, localize_list
@@ -9,7 +8,7 @@ from common.agent.behaviour.abstract_user_agent_behaviours import AbstractMenuOp
 from common.agent.my_logging import log
 from common.chat.language_enum import Language
 from common.chat.message.types import ChatQuickReply, ChatMessage, ChatActualMessage
-from common.pryv.api_wrapper import PryvAPI
+from common.pryv.async_api_wrapper import AsyncPryvAPI
 from common.pryv.model import DataAccessPermission, AuthResponse, AuthStatus
 from common.utils.dictionaries import inverse_dictionary
 from covid19.common.agent.agents.interaction_texts import (
@@ -149,7 +148,7 @@ class PryvAccessAskingState(AbstractDataInsertionState):
                  on_registration_completed: Callable[[AbstractCovid19ReceiveMessageState, str], Awaitable[None]],
                  get_user_available_goals: Callable[[], List[AbstractUserGoal]],
                  get_evaluation_questions: Callable[[], List[AbstractEvaluationQuestion]],
-                 get_pryv_api: Callable[[], PryvAPI],
+                 get_pryv_api: Callable[[], AsyncPryvAPI],
                  ):
         super().__init__(PRYV_ACCESS_ASKING_TEXT_NOT_LOCALIZED, PryvAccessAskingState.KEYBOARD_OPTIONS_NOT_LOCALIZED,
                          default_quick_reply_handler, on_registration_completed, get_user_available_goals,
@@ -160,7 +159,7 @@ class PryvAccessAskingState(AbstractDataInsertionState):
 
         self.get_pryv_api = get_pryv_api
 
-        self.pryv_api: Optional[PryvAPI] = None
+        self.pryv_api: Optional[AsyncPryvAPI] = None
         self.message_with_link: Optional[ChatMessage] = None
 
     async def on_start(self):
@@ -188,7 +187,7 @@ class PryvAccessAskingState(AbstractDataInsertionState):
             if legal_value == self.current_localize(YES_BUTTON_TEXT_NOT_LOCALIZED):
                 log(self.agent, f"Start pryv registration process...")
 
-                auth_response = self.pryv_api.request_auth(
+                auth_response = await self.pryv_api.request_auth(
                     requesting_app_id='covid19-physio-project',
                     requested_permissions=[
                         DataAccessPermission.of(info[0], info[1], info[2])
@@ -262,7 +261,7 @@ class PryvAccessAskingState(AbstractDataInsertionState):
     ):
         """Function to poll the Pryv api to verify if the user granted access authorization"""
 
-        next_auth_response = self.pryv_api.fetch_poll_url(auth_response)
+        next_auth_response = await self.pryv_api.fetch_poll_url(auth_response)
         if next_auth_response.status == AuthStatus.ACCEPTED:
             log(self.agent, f"User gave Pryv access to our Bot.", logger)
             self.user.pryv_endpoint = next_auth_response.pryv_api_endpoint
@@ -276,12 +275,11 @@ class PryvAccessAskingState(AbstractDataInsertionState):
             await self.delete_link_message(recipient_id)
         elif next_auth_response.status == AuthStatus.NEED_SIGNIN:
             log(self.agent, f"Not accepted yet", logger)
-            Timer(
+            asyncio.get_running_loop().call_later(
                 next_auth_response.poll_rate_ms / 1000,
-                asyncio.gather,
-                [self.poll_for_access_granting(recipient_id, current_language, next_auth_response)],
-                {'loop': asyncio.get_running_loop()}
-            ).start()
+                asyncio.ensure_future,
+                self.poll_for_access_granting(recipient_id, current_language, next_auth_response)
+            )
         else:
             log(self.agent, f"Unknown auth response status: {next_auth_response.status}", logger, logging.ERROR)
 
@@ -878,6 +876,7 @@ class UserEvaluationQuestionsState(AbstractDataInsertionState):
                          ])
 
         self.current_displayed_question: Optional[AbstractEvaluationQuestion] = None
+        self._hibernated_question_id: Optional[str] = None
 
     async def on_start(self):
         await super().on_start()
@@ -885,8 +884,20 @@ class UserEvaluationQuestionsState(AbstractDataInsertionState):
         if self.current_displayed_question is None:
             questions = self._get_evaluation_questions()
             question_with_no_previous = [question for question in questions if question.previous is None]
-            self.current_displayed_question: AbstractEvaluationQuestion = question_with_no_previous[0]
+            self.current_displayed_question: AbstractEvaluationQuestion = next(
+                (question for question in questions if question.id == self._hibernated_question_id),
+                question_with_no_previous[0]
+            )
             self._question_text_not_localized = self.current_displayed_question.text_not_localized
+            self._hibernated_question_id = None
+
+    def hibernation_data(self) -> Mapping[str, str]:
+        if self.current_displayed_question is None:
+            return {}
+        return {"current_displayed_question_id": self.current_displayed_question.id}
+
+    def restore_hibernation_data(self, hibernation_data: Mapping[str, str]):
+        self._hibernated_question_id = hibernation_data.get("current_displayed_question_id", None)
 
     async def on_legal_value(self, user: AbstractUser, chat_actual_message: ChatActualMessage):
         legal_value: str = chat_actual_message.message_text
@@ -1,5 +1,6 @@
+import bisect
 import logging
-from typing import List, TypeVar, Callable, Optional
+from typing import List, Optional, Mapping, Tuple, MutableMapping
 
 from covid19.common.database.user.field_enums import DifficultyField, ShiftField
 from covid19.common.database.user.model.abstract_evaluation_question import AbstractEvaluationQuestion
@@ -11,80 +12,99 @@ from covid19.common.database.user.model.abstract_user import AbstractUser
 
 logger = logging.getLogger(__name__)
 
-# noinspection PyPep8Naming
-T = TypeVar('T')
-
-
-def on_question_and_difficulty_mapping(
-        question: AbstractEvaluationQuestion,
-        difficulty: DifficultyField,
-        question_to_exercise_set_mappings: List[AbstractQuestionToExerciseSetMapping],
-        function: Callable[[AbstractQuestionToExerciseSetMapping], T]
-) -> Optional[T]:
-    """Utility function to do something on a mapping identified by a question and a difficulty answer"""
-
-    for mapping in question_to_exercise_set_mappings:
-        if mapping.asked_question.id == question.id and mapping.user_answer == difficulty:
-            return function(mapping)
 
+class LevelIndex:
+    """
+    An index over question to exercise set mappings, to resolve user levels without scanning all mappings
 
-def get_ordered_mappings_for(
-        question: AbstractEvaluationQuestion,
-        question_to_exercise_set_mappings: List[AbstractQuestionToExerciseSetMapping],
-        reverse: bool = False
-):
-    """Utility method to get some question mappings in ascending ordered of difficulty"""
+    It should be built once per catalogue version, since shift results are memoized
+    """
 
-    question_mappings = [question_mapping
-                         for question_mapping in question_to_exercise_set_mappings
-                         if question_mapping.asked_question.id == question.id]
-    question_mappings.sort(key=lambda question_mapping: question_mapping.user_answer.value, reverse=reverse)
-    return question_mappings
+    def __init__(self, question_to_exercise_set_mappings: List[AbstractQuestionToExerciseSetMapping]):
+        mappings_by_level: MutableMapping[Tuple[str, DifficultyField], AbstractQuestionToExerciseSetMapping] = {}
+        # The ascending difficulty values which bring some exercise sets, for each question
+        levels_with_exercise_sets: MutableMapping[str, List[int]] = {}
+        for mapping in question_to_exercise_set_mappings:
+            level = (mapping.asked_question.id, mapping.user_answer)
+            if level in mappings_by_level:
+                continue  # Only the first mapping of a level is considered
+
+            mappings_by_level[level] = mapping
+            if mapping.suitable_exercise_sets:
+                levels_with_exercise_sets.setdefault(mapping.asked_question.id, []).append(mapping.user_answer.value)
+        for levels in levels_with_exercise_sets.values():
+            levels.sort()
+        self._mappings_by_level: Mapping[Tuple[str, DifficultyField], AbstractQuestionToExerciseSetMapping] = (
+            mappings_by_level
+        )
+        self._levels_with_exercise_sets: Mapping[str, List[int]] = levels_with_exercise_sets
+
+        self._shifts: MutableMapping[
+            Tuple[str, DifficultyField, ShiftField], Tuple[AbstractEvaluationQuestion, DifficultyField]
+        ] = {}
+
+    def mapping_for(self, question: AbstractEvaluationQuestion,
+                    difficulty: DifficultyField) -> Optional[AbstractQuestionToExerciseSetMapping]:
+        """Gets the mapping identified by a question and a difficulty answer, if any"""
+        return self._mappings_by_level.get((question.id, difficulty), None)
+
+    def has_exercise_sets(self, question: AbstractEvaluationQuestion, difficulty: DifficultyField) -> bool:
+        """Whether a question and a difficulty have some exercise sets"""
+        mapping = self.mapping_for(question, difficulty)
+        return mapping is not None and len(mapping.suitable_exercise_sets) != 0
+
+    def next_difficulty_with_exercise_sets(self, question: AbstractEvaluationQuestion, difficulty: DifficultyField,
+                                           going_towards_easier_answers: bool) -> Optional[DifficultyField]:
+        """Gets the nearest difficulty, strictly past the provided one, bringing exercise sets for the question"""
+        levels = self._levels_with_exercise_sets.get(question.id, [])
+        if going_towards_easier_answers:
+            position = bisect.bisect_right(levels, difficulty.value)
+            return DifficultyField(levels[position]) if position < len(levels) else None
+        else:
+            position = bisect.bisect_left(levels, difficulty.value)
+            return DifficultyField(levels[position - 1]) if position > 0 else None
 
+    def first_pair_with_exercise_sets(
+            self, question: AbstractEvaluationQuestion, going_towards_harder_exercises: bool
+    ) -> Optional[Tuple[AbstractEvaluationQuestion, DifficultyField]]:
+        """Gets the first question difficulty pair with some exercise sets, following the specified direction"""
+        levels = self._levels_with_exercise_sets.get(question.id, [])
+        if not levels:
+            return None
 
-def get_first_pair_with_exercise_sets(
-        question: AbstractEvaluationQuestion,
-        question_to_exercise_set_mappings: List[AbstractQuestionToExerciseSetMapping],
-        going_towards_harder_exercises: bool
-) -> (AbstractEvaluationQuestion, DifficultyField):
-    """
-    Utility method to get first question difficulty pair with some exercise sets,
-    following the specified direction
-    """
+        # Since the DifficultyField enumeration goes from Impossible to Easy, the lowest value is the first
+        # when going towards harder exercises
+        difficulty = DifficultyField(levels[0] if going_towards_harder_exercises else levels[-1])
+        return self.mapping_for(question, difficulty).asked_question, difficulty
 
-    # Since the DifficultyField enumeration goes from Impossible to Easy, we want to reverse only when we want Easy
-    # as first, hence when we are NOT going towards harder exercises
-    ordered_mappings = get_ordered_mappings_for(
-        question,
-        question_to_exercise_set_mappings,
-        reverse=not going_towards_harder_exercises
-    )
+    def shift(self, question: AbstractEvaluationQuestion, difficulty: DifficultyField,
+              shift_type: ShiftField) -> Tuple[AbstractEvaluationQuestion, DifficultyField]:
+        """Shifts a level, memoizing the result for next calls"""
+        key = (question.id, difficulty, shift_type)
+        if key not in self._shifts:
+            self._shifts[key] = _compute_shift(self, question, difficulty, shift_type)
 
-    for mapping in ordered_mappings:
-        if mapping.suitable_exercise_sets:
-            return mapping.asked_question, mapping.user_answer
+        return self._shifts[key]
 
 
-def has_exercise_sets(
+def shift_question_or_difficulty(
+        level_index: LevelIndex,
         question: AbstractEvaluationQuestion,
         difficulty: DifficultyField,
-        question_to_exercise_set_mappings: List[AbstractQuestionToExerciseSetMapping],
-):
-    """Utility method to know if a question and a difficulty have some exercise sets"""
+        shift_type: ShiftField
+) -> (AbstractEvaluationQuestion, DifficultyField):
+    """Utility method to shift the current user level"""
 
-    return on_question_and_difficulty_mapping(
-        question, difficulty, question_to_exercise_set_mappings,
-        lambda mapping: len(mapping.suitable_exercise_sets) != 0
-    )
+    return level_index.shift(question, difficulty, shift_type)
 
 
-def shift_question_or_difficulty(
-        question_to_exercise_set_mappings: List[AbstractQuestionToExerciseSetMapping],
+def _compute_shift(
+        level_index: LevelIndex,
         question: AbstractEvaluationQuestion,
         difficulty: DifficultyField,
         shift_type: ShiftField
 ) -> (AbstractEvaluationQuestion, DifficultyField):
-    """Utility method to shift the current user level"""
+    """Utility function computing the shift of a user level, jumping directly to levels with exercises"""
 
     logger.debug(f" Shifting from question `{question.id}` and difficulty `{difficulty}` towards `{shift_type}`")
 
@@ -94,17 +114,17 @@ def shift_question_or_difficulty(
     if shift_type == ShiftField.NEXT:
         # Go to next difficulty level
 
-        while out_difficulty != DifficultyField.EASY:
+        if difficulty != DifficultyField.EASY:
             # Original "difficulty response" was not easy, try to go towards it
-            out_difficulty = DifficultyField(out_difficulty.value + 1)
+            out_difficulty = (
+                level_index.next_difficulty_with_exercise_sets(
+                    question, difficulty, going_towards_easier_answers=True
+                )
+                or DifficultyField.EASY
+            )
             logger.debug(f" Original difficulty `{difficulty}`, shifted difficulty `{out_difficulty}`")
 
-            if has_exercise_sets(question, out_difficulty, question_to_exercise_set_mappings):
-                break  # New difficulty has exercises
-
-        if difficulty == DifficultyField.EASY or (
-                not has_exercise_sets(question, out_difficulty, question_to_exercise_set_mappings)
-        ):
+        if difficulty == DifficultyField.EASY or not level_index.has_exercise_sets(question, out_difficulty):
             # Original "difficulty response" was easy, or new difficulty doesn't bring exercise sets with it
             logger.debug(f" Original difficulty was EASY or {out_difficulty} has no exercises for current question")
 
@@ -114,8 +134,8 @@ def shift_question_or_difficulty(
             if harder_question is not None:
                 logger.debug(f" Got harder question `{harder_question.id}`")
 
-                out_question, out_difficulty = get_first_pair_with_exercise_sets(
-                    harder_question, question_to_exercise_set_mappings, going_towards_harder_exercises=True
+                out_question, out_difficulty = level_index.first_pair_with_exercise_sets(
+                    harder_question, going_towards_harder_exercises=True
                 )
                 logger.debug(f" Next question level with exercises is `{out_question.id}` and `{out_difficulty}`")
             else:
@@ -126,17 +146,17 @@ def shift_question_or_difficulty(
     elif shift_type == ShiftField.PREVIOUS:
         # Go to previous level of difficulty
 
-        while out_difficulty != DifficultyField.IMPOSSIBLE:
+        if difficulty != DifficultyField.IMPOSSIBLE:
             # Original "difficulty response" was not impossible, try to go towards it
-            out_difficulty = DifficultyField(out_difficulty.value - 1)
+            out_difficulty = (
+                level_index.next_difficulty_with_exercise_sets(
+                    question, difficulty, going_towards_easier_answers=False
+                )
+                or DifficultyField.IMPOSSIBLE
+            )
             logger.debug(f" Original difficulty `{difficulty}`, shifted difficulty `{out_difficulty}`")
 
-            if has_exercise_sets(question, out_difficulty, question_to_exercise_set_mappings):
-                break  # New difficulty has exercises
-
-        if difficulty == DifficultyField.IMPOSSIBLE or (
-                not has_exercise_sets(question, out_difficulty, question_to_exercise_set_mappings)
-        ):
+        if difficulty == DifficultyField.IMPOSSIBLE or not level_index.has_exercise_sets(question, out_difficulty):
             # Original "difficulty response" was impossible, or new difficulty doesn't bring exercise sets with it
             logger.debug(
                 f" Original difficulty was IMPOSSIBLE or {out_difficulty} has no exercises for current question"
@@ -148,8 +168,8 @@ def shift_question_or_difficulty(
             if easier_question is not None:
                 logger.debug(f" Got easier question `{easier_question.id}`")
 
-                out_question, out_difficulty = get_first_pair_with_exercise_sets(
-                    easier_question, question_to_exercise_set_mappings, going_towards_harder_exercises=False
+                out_question, out_difficulty = level_index.first_pair_with_exercise_sets(
+                    easier_question, going_towards_harder_exercises=False
                 )
                 logger.debug(f" Previous question level with exercises is `{out_question.id}` and `{out_difficulty}`")
             else:
@@ -162,7 +182,7 @@ def shift_question_or_difficulty(
 
 def get_exercise_sets_for(
         user: AbstractUser,
-        question_to_exercise_set_mappings: List[AbstractQuestionToExerciseSetMapping]
+        level_index: LevelIndex
 ) -> List[AbstractExerciseSet]:
     """Method encapsulating the logic to retrieve suitable exercise sets for a certain user level"""
 
@@ -171,9 +191,7 @@ def get_exercise_sets_for(
     logger.info(f" Getting exercise sets for question `{user_question.id}` and difficulty `{user_answer}`")
 
     current_user_level_mapping: Optional[AbstractQuestionToExerciseSetMapping] = (
-        on_question_and_difficulty_mapping(
-            user_question, user_answer, question_to_exercise_set_mappings, lambda mapping: mapping
-        )
+        level_index.mapping_for(user_question, user_answer)
     )
 
     suitable_exercise_sets: List[AbstractExerciseSet] = []
@@ -184,16 +202,15 @@ def get_exercise_sets_for(
             logger.info(f" Current question difficulty mapping needs a shift "
                         f"`{current_user_level_mapping.question_shift}`")
 
-            new_question, new_difficulty = shift_question_or_difficulty(
-                question_to_exercise_set_mappings,
+            new_question, new_difficulty = level_index.shift(
                 current_user_level_mapping.asked_question,
                 current_user_level_mapping.user_answer,
                 current_user_level_mapping.question_shift
             )
             logger.info(f" Exercises will be taken from `{new_question.id}` and `{new_difficulty}`")
 
-            new_level_mapping: AbstractQuestionToExerciseSetMapping = on_question_and_difficulty_mapping(
-                new_question, new_difficulty, question_to_exercise_set_mappings, lambda mapping: mapping
+            new_level_mapping: AbstractQuestionToExerciseSetMapping = level_index.mapping_for(
+                new_question, new_difficulty
             )
             suitable_exercise_sets = new_level_mapping.suitable_exercise_sets
         else:
@@ -0,0 +1,76 @@
+import logging
+from typing import List
+
+from common.agent.agents.user_session_host import AbstractUserSession, AbstractUserSessionHostAgent
+from common.agent.behaviour.behaviours import TrySubscriptionToAgentBehaviour
+from common.agent.my_logging import log, log_exception
+from common.custom_chat.client_notification_manager import ClientNotificationManager
+from common.pryv.async_api_wrapper import AsyncPryvAPI
+from covid19.common.agent.agents.user.agent import Covid19UserMixin
+from covid19.common.agent.agents.user.proactive_notification_behaviour import ProactiveNotificationSettingBehaviour
+from covid19.common.database.connection_manager import AbstractCovid19ConnectionManager
+
+logger = logging.getLogger(__name__)
+
+
+class UserSession(Covid19UserMixin, AbstractUserSession):
+    """The session which will manage a system User, inside the UserSessionHostAgent"""
+
+    def __init__(self, host_agent: 'UserSessionHostAgent', user_id: str, gateway_agents_jids: List[str],
+                 db_connection_manager: AbstractCovid19ConnectionManager):
+        super().__init__(host_agent, user_id, gateway_agents_jids)
+
+        self.db_connection_manager: AbstractCovid19ConnectionManager = db_connection_manager
+
+    async def setup(self):
+        await super().setup()
+
+        self.load_agent_database_fields()
+
+        self.add_behaviour(ProactiveNotificationSettingBehaviour(
+            notification_hours=[10, 17],
+            user=self.user,
+            client_notification_manager=ClientNotificationManager.get_instance(
+                self.db_connection_manager.get_unread_message_dao()
+            )
+        ))
+
+        log(self, f"UserSession started.", logger)
+
+
+class UserSessionHostAgent(AbstractUserSessionHostAgent):
+    """The Agent which will manage all system Users, through a session for each of them"""
+
+    def __init__(self, jid, password, gateway_agents_jids: List[str], doctor_jid: str,
+                 db_connection_manager: AbstractCovid19ConnectionManager):
+        super().__init__(jid, password, gateway_agents_jids)
+
+        self.doctor_jid: str = doctor_jid
+        self.db_connection_manager: AbstractCovid19ConnectionManager = db_connection_manager
+
+    async def setup(self):
+        await super().setup()
+
+        self.db_connection_manager.connect_to_db()
+
+        self.add_behaviour(TrySubscriptionToAgentBehaviour(period=2, to_subscribe_agent_jid=self.doctor_jid))
+
+        log(self, f"UserSessionHostAgent started.", logger)
+
+    async def _async_stop(self):
+        # Changes deferred while handling messages are saved, not to lose them
+        try:
+            await self.db_connection_manager.flush_deferred_writes()
+        except:
+            log_exception(self, logger)
+
+        await super()._async_stop()
+
+        # Once sessions are stopped, the Pryv connection pool they shared is not needed anymore
+        try:
+            await AsyncPryvAPI(self.db_connection_manager.pryv_server_domain).close()
+        except:
+            log_exception(self, logger)
+
+    def create_session(self, user_id: str) -> UserSession:
+        return UserSession(self, user_id, self.gateway_agents_jids, self.db_connection_manager)
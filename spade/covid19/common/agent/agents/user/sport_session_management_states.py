@@ -1,11 +1,10 @@
 import logging
 from abc import ABC
 from datetime import datetime
-from os import path
+from pathlib import PurePosixPath
 from typing import Callable, Awaitable, List, Optional, Mapping, Any
 
-import requests
-from aiogram.utils.exceptions import RetryAfter
+from aiogram.utils.exceptions import RetryAfter, BadRequest
 
 from common.agent.agents.interaction_texts import localize, localize_list, markup_text
 from common.agent.behaviour.abstract_user_agent_behaviours import AbstractMenuOptionsHandlingState
@@ -27,13 +26,10 @@ from covid19.common.agent.agents.user.abstract_behaviours import (
     AbstractCovid19ReceiveMessageState
 )
 from covid19.common.agent.agents.user.data_management_states import UserEvaluationQuestionsState
-from covid19.common.agent.agents.user.mappings_to_exercise_sets_utils import shift_question_or_difficulty
+from covid19.common.agent.agents.user.mappings_to_exercise_sets_utils import shift_question_or_difficulty, LevelIndex
 from covid19.common.database.user.factory import DoneExerciseFactory
 from covid19.common.database.user.field_enums import DifficultyField, FunnyField, ShiftField
 from covid19.common.database.user.model.abstract_exercise import AbstractExercise
-from covid19.common.database.user.model.abstract_question_to_exercise_set_mapping import (
-    AbstractQuestionToExerciseSetMapping
-)
 from covid19.common.database.user.model.abstract_sport_session import AbstractSportSession
 from covid19.common.database.user.model.abstract_user import AbstractUser
 
@@ -59,21 +55,16 @@ def get_exercise_gif_path(exercise: AbstractExercise, internal_address: bool = F
     else:
         protocol = "https"
 
-    return f"{protocol}://{web_address}:{web_port}{API_MOUNT_POINT}/exercise/{exercise.id}/gif"
-
-
-def check_existence(path_or_link: str) -> bool:
-    """Utility method to check if a path/link exists/is reachable"""
-    return path_or_link and (
-            path.exists(path_or_link) or (path_or_link.startswith("http") and
-                                          requests.head(path_or_link).status_code == 200)
-    )
+    # The GIF file name changes each time the GIF is changed, so that links to different GIFs are different
+    gif_version = f"?version={PurePosixPath(exercise.gif_path).stem}" if exercise.gif_path else ""
+    return f"{protocol}://{web_address}:{web_port}{API_MOUNT_POINT}/exercise/{exercise.id}/gif{gif_version}"
 
 
 def is_user_tracking_a_sport_session(user: AbstractUser):
     """Utility method to know if a user has an ongoing sport session tracking"""
 
-    return user.sport_sessions[-1].ended_at is None if user.sport_sessions else False
+    last_sport_sessions = user.last_sport_sessions(1)
+    return last_sport_sessions[-1].ended_at is None if last_sport_sessions else False
 
 
 def get_next_not_done_exercise(current_session: AbstractSportSession) -> Optional[AbstractExercise]:
@@ -117,7 +108,7 @@ class AbstractSessionManagementState(AbstractMenuOptionsHandlingState, AbstractC
         # NOTE: this gets called every time the user clicks something
 
         if self.current_session is None:
-            self.current_session = self.user.sport_sessions[-1]
+            self.current_session = self.user.last_sport_sessions(1)[-1]
 
     async def handle_quick_reply(self, chat_quick_reply: ChatQuickReply):
         await self._default_quick_reply_handler(self, chat_quick_reply)
@@ -227,8 +218,8 @@ class InSportSessionState(AbstractSessionManagementState):
                 custom_keyboard_obj=menu_keyboard_object
             )
 
-        if check_existence(get_exercise_gif_path(exercise, internal_address=True)):
-            # We have a gif to send with the suggestion
+        if exercise.gif_path:
+            # We have a gif to send with the suggestion, if it is not reachable the platform will refuse it
             try:
                 await current_state.messaging_platform.send_animation(
                     recipient_id,
@@ -244,11 +235,15 @@ class InSportSessionState(AbstractSessionManagementState):
                     localize(bot_cool_down_message_text_not_localized(exception.timeout), current_language)
                 )
                 await send_exercise_as_text()
+            except BadRequest as exception:
+                log(current_state.agent,
+                    f"Current exercise `{exercise.id}` has a GIF attached, but it's not available: "
+                    f"`{exercise.gif_path}` ({exception}). Defaulting to bare text.", logger)
+                await send_exercise_as_text()
         else:
             # We don't have a gif to send
             log(current_state.agent,
-                f"Current exercise `{exercise.id}` doesn't have a GIF attached, or it has"
-                f"but it's not available: `{exercise.gif_path}`. Defaulting to bare text.", logger)
+                f"Current exercise `{exercise.id}` doesn't have a GIF attached. Defaulting to bare text.", logger)
             await send_exercise_as_text()
 
 
@@ -327,7 +322,7 @@ class DifficultyRatingState(AbstractSessionManagementState):
                      [AbstractCovid19ReceiveMessageState, ChatQuickReply], Awaitable[None]
                  ],
                  on_back_to_menu: Callable[[AbstractCovid19ReceiveMessageState, str, bool], Awaitable[None]],
-                 get_question_to_exercise_set_mappings: Callable[[], List[AbstractQuestionToExerciseSetMapping]],
+                 get_level_index: Callable[[], LevelIndex],
                  ):
         super().__init__(HOW_MUCH_DIFFICULT_QUESTION_TEXT_NOT_LOCALIZED,
                          DifficultyRatingState.KEYBOARD_OPTIONS_NOT_LOCALIZED, default_quick_reply_handler,
@@ -335,7 +330,7 @@ class DifficultyRatingState(AbstractSessionManagementState):
                              *InSportSessionState.KEYBOARD_OPTIONS_NOT_LOCALIZED
                          ])
 
-        self._get_question_to_exercise_set_mappings = get_question_to_exercise_set_mappings
+        self._get_level_index = get_level_index
 
     async def on_legal_value(self, user: AbstractUser, chat_actual_message: ChatActualMessage):
         legal_value: str = chat_actual_message.message_text
@@ -349,7 +344,7 @@ class DifficultyRatingState(AbstractSessionManagementState):
             # Gracefully end sport session
             self.current_session.ended_at = last_exercise.ended_at
 
-            user_level_updated = self.update_user_level(user, self._get_question_to_exercise_set_mappings())
+            user_level_updated = self.update_user_level(user, self._get_level_index())
             await self._send_last_sport_session_summary(sender_id, user_level_updated)
 
             await FunnyRatingState.ask_for_fun_rating(self, sender_id, self.current_language)
@@ -361,7 +356,7 @@ class DifficultyRatingState(AbstractSessionManagementState):
             ]:
                 # The user found the exercise too difficult, abort current session and downgrade its level
                 AbortSessionState.abort_sport_session(self.current_session)
-                self.update_user_level(user, self._get_question_to_exercise_set_mappings())
+                self.update_user_level(user, self._get_level_index())
                 too_difficult_message_localized = (
                     f"{self.current_localize(TOO_DIFFICULT_TRY_WITH_EASIER_EXERCISES_MESSAGE_TEXT_NOT_LOCALIZED)}\n\n"
                     f"{markup_text(self.current_localize(LEVEL_TEXT_NOT_LOCALIZED), italic=True)}: "
@@ -400,7 +395,7 @@ class DifficultyRatingState(AbstractSessionManagementState):
     @staticmethod
     def update_user_level(
             user: AbstractUser,
-            question_to_exercise_set_mappings: List[AbstractQuestionToExerciseSetMapping]
+            level_index: LevelIndex
     ) -> bool:
         """
         Utility method to encapsulate the user level updating logic
@@ -408,7 +403,7 @@ class DifficultyRatingState(AbstractSessionManagementState):
         :returns: True if it actually updated user level, False otherwise
         """
 
-        last_session = user.sport_sessions[-1]
+        last_session = user.last_sport_sessions(1)[-1]
         done_exercises_difficulty_rating = [
             done_exercise.difficulty_rating for done_exercise in last_session.done_exercises_ordered
         ]
@@ -436,7 +431,7 @@ class DifficultyRatingState(AbstractSessionManagementState):
 
         if to_be_done_shift is not None:
             new_question, new_difficulty = shift_question_or_difficulty(
-                question_to_exercise_set_mappings, user.current_question, user.current_question_answer,
+                level_index, user.current_question, user.current_question_answer,
                 to_be_done_shift
             )
             logger.info(f" New user level composed by question `{new_question.id}` and difficulty `{new_difficulty}`")
@@ -449,7 +444,7 @@ class DifficultyRatingState(AbstractSessionManagementState):
     async def _send_last_sport_session_summary(self, recipient_id: str, user_level_updated: bool):
         """Utility method to send last sport session summary message to the user"""
 
-        last_sport_session = self.user.sport_sessions[-1]
+        last_sport_session = self.user.last_sport_sessions(1)[-1]
 
         last_start_time = last_sport_session.started_at
         difficulty_prettifier = DifficultyField.values_prettifier_not_localized()
@@ -6,12 +6,18 @@ TELEGRAM_GATEWAY_AGENT_NAME = "covid19_telegram_gateway_agent"
 CUSTOM_CHAT_GATEWAY_AGENT_NAME = "covid19_custom_chat_gateway_agent"
 """The Custom Chat gateway agent name"""
 
+USER_SESSION_HOST_AGENT_NAME = "covid19_user_session_host_agent"
+"""The name of the agent hosting user sessions, when users are not managed by an agent each"""
+
 TELEGRAM_GATEWAY_JID = f"{TELEGRAM_GATEWAY_AGENT_NAME}@{XMPP_SERVER_ADDRESS}"
 """Telegram gateway agent JID"""
 
 CUSTOM_CHAT_GATEWAY_JID = f"{CUSTOM_CHAT_GATEWAY_AGENT_NAME}@{XMPP_SERVER_ADDRESS}"
 """Custom chat gateway agent JID"""
 
+USER_SESSION_HOST_JID = f"{USER_SESSION_HOST_AGENT_NAME}@{XMPP_SERVER_ADDRESS}"
+"""User session host agent JID"""
+
 ALL_PLATFORMS_GATEWAY_AGENTS_JIDS = [
     CUSTOM_CHAT_GATEWAY_JID
 ]
@@ -0,0 +1,147 @@
+from __future__ import annotations  # Needed in python 3.7 to have the current class type as a return type of methods
+
+import logging
+import os
+import threading
+import time
+from typing import Mapping, Optional, MutableMapping, Callable, TypeVar, Any, List
+
+from common.database.version.collection_versions import CollectionVersions
+from common.utils.enums import ValuesMixin
+from covid19.common.database.connection_manager import AbstractCovid19ConnectionManager
+from covid19.common.database.user.model.abstract_evaluation_question import AbstractEvaluationQuestion
+from covid19.common.database.user.model.abstract_question_to_exercise_set_mapping import (
+    AbstractQuestionToExerciseSetMapping
+)
+from covid19.common.database.user.model.abstract_user_goal import AbstractUserGoal
+
+logger = logging.getLogger(__name__)
+
+# noinspection PyPep8Naming
+T = TypeVar('T')
+
+CATALOGUE_VERSION_CHECK_PERIOD_SECONDS = float(os.environ.get("CATALOGUE_VERSION_CHECK_PERIOD_SECONDS", "5"))
+"""The minimum time between two checks of the catalogue version, on the database"""
+
+
+class CatalogueCollection(ValuesMixin):
+    """Enumeration of the collections composing the exercise catalogue, managed by doctors"""
+
+    USER_GOALS = "user_goals"
+    """The collection of user goals"""
+
+    EXERCISES = "exercises"
+    """The collection of exercises"""
+
+    EXERCISE_SETS = "exercise_sets"
+    """The collection of exercise sets"""
+
+    EVALUATION_QUESTIONS = "evaluation_questions"
+    """The collection of evaluation questions"""
+
+    QUESTION_TO_EXERCISE_SET_MAPPINGS = "question_to_exercise_set_mappings"
+    """The collection of mappings from question answers to exercise sets"""
+
+
+CATALOGUE_COLLECTION_DEPENDENCIES: Mapping[CatalogueCollection, List[CatalogueCollection]] = {
+    CatalogueCollection.USER_GOALS: [],
+    CatalogueCollection.EXERCISES: [],
+    CatalogueCollection.EXERCISE_SETS: [CatalogueCollection.EXERCISES, CatalogueCollection.USER_GOALS],
+    CatalogueCollection.EVALUATION_QUESTIONS: [],
+    CatalogueCollection.QUESTION_TO_EXERCISE_SET_MAPPINGS: [
+        CatalogueCollection.EVALUATION_QUESTIONS, CatalogueCollection.EXERCISE_SETS
+    ],
+}
+"""The collections whose deletions change documents of each catalogue collection, through reverse delete rules"""
+
+
+def catalogue_collection_version(connection_manager: AbstractCovid19ConnectionManager,
+                                 collection: CatalogueCollection) -> int:
+    """
+    Gets a version of the catalogue collection that changes also when the collections it depends on change
+
+    It's the sum of the versions, which only grow
+    """
+
+    collection_versions = CollectionVersions.get_instance(connection_manager.get_collection_version_dao())
+    return sum(
+        collection_versions.version_of(a_collection.value)
+        for a_collection in [collection, *CATALOGUE_COLLECTION_DEPENDENCIES[collection]]
+    )
+
+
+class CatalogueCache:
+    """
+    A thread-safe singleton class holding the exercise catalogue, shared by all agents in the process
+
+    The catalogue is reloaded only when the version of one of its collections changes on the database
+    """
+
+    __instance: CatalogueCache = None
+
+    @staticmethod
+    def get_instance() -> CatalogueCache:
+        if CatalogueCache.__instance is None:
+            with threading.Lock():  # defensive programming for multiple thread calls to get_instance the first time
+                if CatalogueCache.__instance is None:
+                    CatalogueCache()  # actual creation
+
+        return CatalogueCache.__instance
+
+    def __init__(self):
+        if CatalogueCache.__instance is not None:
+            raise Exception("This is a singleton class, use get_instance method to get the instance")
+        else:
+            self._lock = threading.Lock()
+            self._loaded_versions: Optional[Mapping[str, int]] = None
+            self._last_version_check: Optional[float] = None
+
+            self.available_goals: Mapping[str, AbstractUserGoal] = {}
+            self.evaluation_questions: Mapping[str, AbstractEvaluationQuestion] = {}
+            self.question_to_exercise_set_mappings: Mapping[str, AbstractQuestionToExerciseSetMapping] = {}
+
+            self._derived_data: MutableMapping[str, Any] = {}
+
+            CatalogueCache.__instance = self
+
+    def refresh_if_changed(self, connection_manager: AbstractCovid19ConnectionManager):
+        """Reloads the catalogue if its version on the database changed since last load"""
+
+        with self._lock:
+            now = time.monotonic()
+            if (self._last_version_check is not None and
+                    now - self._last_version_check < CATALOGUE_VERSION_CHECK_PERIOD_SECONDS):
+                return
+
+            current_versions = connection_manager.get_collection_version_dao().get_versions(
+                CatalogueCollection.values()
+            )
+            self._last_version_check = now
+            if current_versions == self._loaded_versions:
+                return
+
+            logger.info(f" Catalogue version changed to {str(current_versions)}, reloading it...")
+            self.available_goals = connection_manager.get_user_goal_dao().find_by()
+            self.evaluation_questions = connection_manager.get_evaluation_question_dao().find_by()
+            self.question_to_exercise_set_mappings = (
+                connection_manager.get_question_to_exercise_set_mapping_dao().find_by()
+            )
+            self._derived_data = {}
+            self._loaded_versions = current_versions
+
+    def derived_data(self, name: str, build: Callable[[CatalogueCache], T]) -> T:
+        """Gets data computed from the catalogue, building it only once per catalogue version"""
+
+        with self._lock:
+            if name not in self._derived_data:
+                self._derived_data[name] = build(self)
+
+            return self._derived_data[name]
+
+    @staticmethod
+    def notify_changed(connection_manager: AbstractCovid19ConnectionManager, collection: CatalogueCollection):
+        """Bumps the version of provided catalogue collection, so that all catalogue caches get reloaded"""
+        CollectionVersions.get_instance(connection_manager.get_collection_version_dao()).bump(collection.value)
+
+        # The change is made visible in this process at the next refresh, without waiting for the check period
+        CatalogueCache.get_instance()._last_version_check = None
@@ -3,7 +3,10 @@ from abc import ABC, abstractmethod
 from common.custom_chat.message_dao import AbstractMessageDAO
 from common.database.cache.abstract_cache_dao import AbstractCacheDAO
 from common.database.connection_manager import AbstractConnectionManager
+from common.database.hibernation.abstract_hibernation_dao import AbstractAgentHibernationDAO
 from common.database.persuation.dao import AbstractStrategyDAO
+from common.database.user_id_mapping.abstract_user_id_mapping_dao import AbstractUserIDMappingDAO
+from common.database.version.abstract_version_dao import AbstractCollectionVersionDAO
 from covid19.common.database.user.daos import (
     AbstractExerciseDAO, AbstractExerciseSetDAO, AbstractUserDAO, AbstractUserGoalDAO, AbstractEvaluationQuestionDAO,
     AbstractQuestionToExerciseSetMappingDAO, AbstractUnreadMessageDAO
@@ -64,6 +67,21 @@ class AbstractCovid19ConnectionManager(AbstractConnectionManager, ABC):
         """Creates the Strategy DAO for the actual database"""
         pass
 
+    @abstractmethod
+    def get_collection_version_dao(self) -> AbstractCollectionVersionDAO:
+        """Retrieves the collection version data access object for the actual database"""
+        pass
+
+    @abstractmethod
+    def get_agent_hibernation_dao(self) -> AbstractAgentHibernationDAO:
+        """Retrieves the agent hibernation data access object for the actual database"""
+        pass
+
+    @abstractmethod
+    def get_user_id_mapping_dao(self) -> AbstractUserIDMappingDAO:
+        """Retrieves the user ID mapping data access object for the actual database"""
+        pass
+
     @property
     @abstractmethod
     def pryv_server_domain(self) -> str:
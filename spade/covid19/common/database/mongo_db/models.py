@@ -79,7 +79,10 @@ class User(BasicUser):
 
     meta = {
         "strict": False,
-        'ordering': ['-last_interaction']
+        'ordering': ['-last_interaction'],
+        'indexes': [
+            '-last_interaction',
+        ]  # platform ID indexes are created on connection, to check that existing users allow them to be unique
     }
 
 
@@ -88,3 +91,7 @@ class UnreadMessage(Document):
 
     recipient_id = StringField()
     message_json = StringField()
+
+    meta = {
+        'indexes': ['recipient_id']
+    }
@@ -1,5 +1,7 @@
 from typing import Optional, List
 
+from mongoengine import NotUniqueError
+
 from common.database.mongo_db.object_with_id_mixin import MongoDBObjectWithIDMixin
 from common.database.mongo_db.user.user_mixin import MongoDBUserMixin
 from covid19.common.database.enums import AgeField, SexField, WeekDayField
@@ -13,7 +15,7 @@ from covid19.common.database.user.field_enums import DifficultyField
 from covid19.common.database.user.model.abstract_chat_message import AbstractChatMessage
 from covid19.common.database.user.model.abstract_evaluation_question import AbstractEvaluationQuestion
 from covid19.common.database.user.model.abstract_sport_session import AbstractSportSession
-from covid19.common.database.user.model.abstract_user import AbstractUser
+from covid19.common.database.user.model.abstract_user import AbstractUser, PlatformIDAlreadyBoundError
 from covid19.common.database.user.model.abstract_user_goal import AbstractUserGoal
 
 
@@ -97,8 +99,13 @@ class MongoDBUser(AbstractUser, MongoDBUserMixin, MongoDBObjectWithIDMixin):
 
     @telegram_id.setter
     def telegram_id(self, new_value: str):
+        old_value = self._user_mongodb_obj.telegram_id
         self._user_mongodb_obj.telegram_id = new_value
-        self._user_mongodb_obj.save()
+        try:
+            self._user_mongodb_obj.save()
+        except NotUniqueError as error:
+            self._user_mongodb_obj.telegram_id = old_value  # not to save it again with other fields
+            raise PlatformIDAlreadyBoundError(f"`{new_value}` is already the telegram_id of another user") from error
 
     @property
     def custom_chat_id(self) -> Optional[str]:
@@ -106,8 +113,13 @@ class MongoDBUser(AbstractUser, MongoDBUserMixin, MongoDBObjectWithIDMixin):
 
     @custom_chat_id.setter
     def custom_chat_id(self, new_value: str):
+        old_value = self._user_mongodb_obj.custom_chat_id
         self._user_mongodb_obj.custom_chat_id = new_value
-        self._user_mongodb_obj.save()
+        try:
+            self._user_mongodb_obj.save()
+        except NotUniqueError as error:
+            self._user_mongodb_obj.custom_chat_id = old_value  # not to save it again with other fields
+            raise PlatformIDAlreadyBoundError(f"`{new_value}` is already the custom_chat_id of another user") from error
 
     @property
     def pryv_endpoint(self) -> Optional[str]:
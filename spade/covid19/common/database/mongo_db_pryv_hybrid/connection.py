@@ -1,8 +1,14 @@
 import os
+from typing import ContextManager
 
 from mongoengine import connect, disconnect
 
 from common.database.mongo_db.cache.cache_dao import MongoDBCacheDAO
+from common.database.mongo_db.hibernation.hibernation_dao import MongoDBAgentHibernationDAO
+from common.database.mongo_db.user_id_mapping.user_id_mapping_dao import MongoDBUserIDMappingDAO
+from common.database.mongo_db.unique_indexes import ensure_unique_sparse_index
+from common.database.mongo_db.version.version_dao import MongoDBCollectionVersionDAO
+from common.pryv.deferred_writes import PryvDeferredWriter
 from covid19.common.database.connection_manager import AbstractCovid19ConnectionManager
 from covid19.common.database.mongo_db.user.evaluation_question_dao import MongoDBEvaluationQuestionDAO
 from covid19.common.database.mongo_db.user.exercise_dao import MongoDBExerciseDAO
@@ -15,6 +21,8 @@ from covid19.common.database.mongo_db.user.unread_message_dao import MongoDBUnre
 from covid19.common.database.mongo_db.user.user_goal_dao import MongoDBUserGoalDAO
 from covid19.common.database.mongo_db_pryv_hybrid.user.message_dao import PryvChatMessageDAO
 from covid19.common.database.mongo_db_pryv_hybrid.user.user_dao import MongoDBAndPryvUserDAO
+from covid19.common.database.mongo_db_pryv_hybrid.models import User
+from covid19.common.database.user.daos import AbstractUserDAO
 from covid19.common.database.user.model.abstract_user import AbstractUser
 
 DATABASE_SERVER_IP = os.environ.get("DATABASE_SERVER_IP", "localhost")
@@ -43,11 +51,21 @@ class MongoDBAndPryvHybridConnectionManager(AbstractCovid19ConnectionManager):
         self._pryv_server_domain = pryv_server_domain
 
     def connect_to_db(self):
-        return connect(self.database_name, host=self.database_uri)
+        connection = connect(self.database_name, host=self.database_uri)
+        for platform_id_field in AbstractUserDAO.PLATFORM_ID_FIELDS.values():
+            ensure_unique_sparse_index(User, platform_id_field)
+
+        return connection
 
     def disconnect_from_db(self):
         return disconnect()
 
+    def deferred_writes(self) -> ContextManager:
+        return PryvDeferredWriter.get_instance().deferring()
+
+    async def flush_deferred_writes(self):
+        await PryvDeferredWriter.get_instance().flush()
+
     def get_user_dao(self) -> MongoDBAndPryvUserDAO:
         return MongoDBAndPryvUserDAO(
             self._pryv_server_domain,
@@ -84,6 +102,15 @@ class MongoDBAndPryvHybridConnectionManager(AbstractCovid19ConnectionManager):
     def get_cache_dao(self) -> MongoDBCacheDAO:
         return MongoDBCacheDAO()
 
+    def get_collection_version_dao(self) -> MongoDBCollectionVersionDAO:
+        return MongoDBCollectionVersionDAO()
+
+    def get_agent_hibernation_dao(self) -> MongoDBAgentHibernationDAO:
+        return MongoDBAgentHibernationDAO()
+
+    def get_user_id_mapping_dao(self) -> MongoDBUserIDMappingDAO:
+        return MongoDBUserIDMappingDAO()
+
     @property
     def pryv_server_domain(self) -> str:
         return self._pryv_server_domain
@@ -17,7 +17,10 @@ class User(BasicUser):
 
     meta = {
         "strict": False,
-        'ordering': ['-last_interaction']
+        'ordering': ['-last_interaction'],
+        'indexes': [
+            '-last_interaction',
+        ]  # platform ID indexes are created on connection, to check that existing users allow them to be unique
     }
 
 
@@ -5,6 +5,7 @@ from typing import List, Optional
 from bson import json_util
 
 from common.pryv.api_wrapper import PryvAPI
+from common.pryv.deferred_writes import PryvDeferredWriter
 from common.utils.dictionaries import remove_keys_with_none_values
 from covid19.common.database.mongo_db_pryv_hybrid.user.model.done_exercise import PryvDoneExercise
 from covid19.common.database.user.daos import AbstractExerciseSetDAO, AbstractExerciseDAO
@@ -40,7 +41,7 @@ class PryvSportSession(AbstractSportSession):
     def _save_changes_to_event_in_pryv(self):
         """Utility function to save changes to that event in Pryv"""
 
-        PryvAPI.save_changes_to_event(
+        PryvDeferredWriter.get_instance().save_changes_to_event(
             self._pryv_api, self._user_api_endpoint_with_token, self._sport_session_pryv_event_id,
             self._sport_session_json_obj
         )
@@ -1,12 +1,15 @@
 import json
 import logging
+import os
 from typing import Optional, List, MutableMapping
 
 from bson import json_util
+from mongoengine import NotUniqueError
 
 from common.chat.language_enum import Language
 from common.database.mongo_db.object_with_id_mixin import MongoDBObjectWithIDMixin
 from common.database.mongo_db.user.user_mixin import MongoDBUserMixin
+from common.utils.caching import TTLCache
 from common.utils.dictionaries import remove_keys_with_none_values
 from covid19.common.database.enums import AgeField, SexField, WeekDayField
 from covid19.common.database.mongo_db.user.model.evaluation_question import MongoDBEvaluationQuestion
@@ -21,17 +24,28 @@ from covid19.common.database.user.field_enums import DifficultyField
 from covid19.common.database.user.model.abstract_chat_message import AbstractChatMessage
 from covid19.common.database.user.model.abstract_evaluation_question import AbstractEvaluationQuestion
 from covid19.common.database.user.model.abstract_sport_session import AbstractSportSession
-from covid19.common.database.user.model.abstract_user import AbstractUser
+from covid19.common.database.user.model.abstract_user import AbstractUser, PlatformIDAlreadyBoundError
 from covid19.common.database.user.model.abstract_user_goal import AbstractUserGoal
 from common.pryv.api_wrapper import PryvAPI
+from common.pryv.deferred_writes import PryvDeferredWriter
 from common.pryv.model import PryvEvent
+from common.pryv.stream_event_log import PryvStreamEventLog
 
 logger = logging.getLogger(__name__)
 
+PROFILE_CACHE_TTL_SECONDS = float(os.environ.get("PROFILE_CACHE_TTL_SECONDS", "300"))
+"""The time after which cached Pryv profile values are considered outdated and fetched again"""
+
 
 class MongoDBAndPryvUser(AbstractUser, MongoDBUserMixin, MongoDBObjectWithIDMixin):
     """Actual implementation of AbstractUser for MongoDB and Pryv hybrid"""
 
+    PROFILE_STREAM_IDS = [
+        stored_data.value[0] for stored_data in PryvStoredData
+        if stored_data not in [PryvStoredData.SPORT_SESSIONS, PryvStoredData.CHAT_MESSAGES]
+    ]
+    """The Pryv streams holding single-valued profile fields, of which only the last event is relevant"""
+
     def __init__(
             self,
             _mongo_db_obj: User,
@@ -51,21 +65,84 @@ class MongoDBAndPryvUser(AbstractUser, MongoDBUserMixin, MongoDBObjectWithIDMixi
         self._exercise_set_dao = _exercise_set_dao
 
         self._chat_message_id_to_pryv_event_id: MutableMapping[str, str] = {}
+        self._profile_cache: TTLCache[str, Optional[str]] = TTLCache(
+            max_size=len(self.PROFILE_STREAM_IDS), ttl_seconds=PROFILE_CACHE_TTL_SECONDS
+        )
+        self._stream_event_logs: MutableMapping[str, PryvStreamEventLog] = {}
+
+    @property
+    def profile_cache_hits(self) -> int:
+        """The number of profile reads served by the cache"""
+        return self._profile_cache.hits
+
+    @property
+    def profile_cache_misses(self) -> int:
+        """The number of profile reads that needed a Pryv query"""
+        return self._profile_cache.misses
+
+    def prefetch_profile(self):
+        """Loads the last value of all profile streams, with one Pryv call, if some of them is not cached"""
+        user_endpoint_with_token = self._user_mongodb_obj.pryv_endpoint
+        if user_endpoint_with_token and not all(
+                self._profile_cache.contains(stream_id) for stream_id in self.PROFILE_STREAM_IDS
+        ):
+            last_events = self._pryv_api.get_last_events_of(user_endpoint_with_token, self.PROFILE_STREAM_IDS)
+            self._profile_cache.put_all({
+                stream_id: last_event.content if last_event else None
+                for stream_id, last_event in last_events.items()
+            })
+
+    def invalidate_cached_data(self):
+        logger.debug(
+            f" Invalidating profile cache of user `{self.id}` "
+            f"(hits: {self.profile_cache_hits}, misses: {self.profile_cache_misses})"
+        )
+        self._profile_cache.invalidate()
+        self._stream_event_logs = {}
+
+    def _stream_event_log_of(self, stream_id: str) -> Optional[PryvStreamEventLog]:
+        """Utility method to get the local event log of a Pryv stream, if the user has a Pryv endpoint"""
+        user_endpoint_with_token = self._user_mongodb_obj.pryv_endpoint
+        if not user_endpoint_with_token:
+            return None
+
+        if stream_id not in self._stream_event_logs:
+            self._stream_event_logs[stream_id] = PryvStreamEventLog(
+                self._pryv_api, user_endpoint_with_token, stream_id
+            )
+        return self._stream_event_logs[stream_id]
 
     def _access_pryv_stream_events_of(self, stream_id: str) -> List[PryvEvent]:
         """Utility method to access all the events in a Pryv stream"""
-        user_endpoint_with_token = self._user_mongodb_obj.pryv_endpoint
-        if user_endpoint_with_token:
-            return self._pryv_api.get_events(user_endpoint_with_token, streams=[stream_id], sort_ascending=True)
-        else:
-            return []
+        stream_event_log = self._stream_event_log_of(stream_id)
+        return stream_event_log.events() if stream_event_log else []
+
+    def _access_pryv_stream_last_events_of(self, stream_id: str, count: int) -> List[PryvEvent]:
+        """Utility method to access the last events in a Pryv stream"""
+        stream_event_log = self._stream_event_log_of(stream_id)
+        return stream_event_log.last(count) if stream_event_log else []
 
     def _access_pryv_last_value_of(self, stream_id: str) -> Optional[str]:
-        """Utility method to access the last value of a Pryv stream"""
+        """Utility method to access the last value of a Pryv stream, cached only for profile streams"""
         user_endpoint_with_token = self._user_mongodb_obj.pryv_endpoint
         if user_endpoint_with_token:
+            is_profile_stream = stream_id in self.PROFILE_STREAM_IDS
+            if is_profile_stream:
+                found, cached_value = self._profile_cache.get(stream_id)
+                if found:
+                    return cached_value
+
+                self.prefetch_profile()
+                found, cached_value = self._profile_cache.peek(stream_id)
+                if found:
+                    return cached_value
+
             stream_events = self._pryv_api.get_events(user_endpoint_with_token, streams=[stream_id], limit=1)
-            return stream_events[0].content if stream_events else None
+            last_value = stream_events[0].content if stream_events else None
+            if is_profile_stream:
+                # The cache is sized for profile streams only, others would evict their values
+                self._profile_cache.put(stream_id, last_value)
+            return last_value
         else:
             return None
 
@@ -74,9 +151,14 @@ class MongoDBAndPryvUser(AbstractUser, MongoDBUserMixin, MongoDBObjectWithIDMixi
         """Utility method to set a new event in a Pryv stream"""
         user_endpoint_with_token = self._user_mongodb_obj.pryv_endpoint
         if user_endpoint_with_token:
-            return self._pryv_api.create_event(
+            created_event = self._pryv_api.create_event(
                 user_endpoint_with_token, [stream_id], new_value, content_type=content_type
             )
+            if created_event and stream_id in self.PROFILE_STREAM_IDS:
+                self._profile_cache.put(stream_id, created_event.content)
+            elif created_event and stream_id in self._stream_event_logs:
+                self._stream_event_logs[stream_id].put(created_event)
+            return created_event
         else:
             logger.warning(f"Not setting value {new_value} for {stream_id},"
                            f" because the user has not a Pryv endpoint set.")
@@ -170,8 +252,13 @@ class MongoDBAndPryvUser(AbstractUser, MongoDBUserMixin, MongoDBObjectWithIDMixi
 
     @telegram_id.setter
     def telegram_id(self, new_value: str):
+        old_value = self._user_mongodb_obj.telegram_id
         self._user_mongodb_obj.telegram_id = new_value
-        self._user_mongodb_obj.save()
+        try:
+            self._user_mongodb_obj.save()
+        except NotUniqueError as error:
+            self._user_mongodb_obj.telegram_id = old_value  # not to save it again with other fields
+            raise PlatformIDAlreadyBoundError(f"`{new_value}` is already the telegram_id of another user") from error
 
     @property
     def custom_chat_id(self) -> Optional[str]:
@@ -179,8 +266,13 @@ class MongoDBAndPryvUser(AbstractUser, MongoDBUserMixin, MongoDBObjectWithIDMixi
 
     @custom_chat_id.setter
     def custom_chat_id(self, new_value: str):
+        old_value = self._user_mongodb_obj.custom_chat_id
         self._user_mongodb_obj.custom_chat_id = new_value
-        self._user_mongodb_obj.save()
+        try:
+            self._user_mongodb_obj.save()
+        except NotUniqueError as error:
+            self._user_mongodb_obj.custom_chat_id = old_value  # not to save it again with other fields
+            raise PlatformIDAlreadyBoundError(f"`{new_value}` is already the custom_chat_id of another user") from error
 
     @property
     def pryv_endpoint(self) -> Optional[str]:
@@ -190,6 +282,8 @@ class MongoDBAndPryvUser(AbstractUser, MongoDBUserMixin, MongoDBObjectWithIDMixi
     def pryv_endpoint(self, new_value: str):
         self._user_mongodb_obj.pryv_endpoint = new_value
         self._user_mongodb_obj.save()
+        self._profile_cache.invalidate()
+        self._stream_event_logs = {}
 
     @property
     def registration_completed(self) -> bool:
@@ -200,17 +294,33 @@ class MongoDBAndPryvUser(AbstractUser, MongoDBUserMixin, MongoDBObjectWithIDMixi
         self._user_mongodb_obj.registration_completed = new_value
         self._user_mongodb_obj.save()
 
-    @property
-    def sport_sessions(self) -> List[PryvSportSession]:
-        sport_session_events = self._access_pryv_stream_events_of(PryvStoredData.SPORT_SESSIONS.value[0])
+    def _sport_sessions_from(self, sport_session_events: List[PryvEvent]) -> List[PryvSportSession]:
+        """Utility method to create sport sessions from the Pryv events, considering not yet saved changes"""
+        deferred_writer = PryvDeferredWriter.get_instance()
         return [
             PryvSportSession(
-                self.id, json_util.loads(sport_session_event.content), sport_session_event.id, self._pryv_api,
+                self.id,
+                (
+                        deferred_writer.pending_changes_of(sport_session_event.id) or
+                        json_util.loads(sport_session_event.content)
+                ),
+                sport_session_event.id, self._pryv_api,
                 self._user_mongodb_obj.pryv_endpoint, self._exercise_dao, self._exercise_set_dao
             )
             for sport_session_event in sport_session_events
         ] if sport_session_events else []
 
+    @property
+    def sport_sessions(self) -> List[PryvSportSession]:
+        return self._sport_sessions_from(
+            self._access_pryv_stream_events_of(PryvStoredData.SPORT_SESSIONS.value[0])
+        )
+
+    def last_sport_sessions(self, count: int) -> List[PryvSportSession]:
+        return self._sport_sessions_from(
+            self._access_pryv_stream_last_events_of(PryvStoredData.SPORT_SESSIONS.value[0], count)
+        )
+
     def append_sport_session(self, new_value: AbstractSportSession):
         sport_session_json = dict(new_value.to_json())
 
@@ -247,18 +357,27 @@ class MongoDBAndPryvUser(AbstractUser, MongoDBUserMixin, MongoDBObjectWithIDMixi
 
     def replace_chat_message(self, message_id: str, new_value: AbstractChatMessage):
         pryv_event_id = self._chat_message_id_to_pryv_event_id[message_id]
-        PryvAPI.save_changes_to_event(
+        updated_event = PryvAPI.save_changes_to_event(
             self._pryv_api, self._user_mongodb_obj.pryv_endpoint, pryv_event_id,
             new_value.payload
         )
 
+        chat_messages_log = self._stream_event_logs.get(PryvStoredData.CHAT_MESSAGES.value[0], None)
+        if updated_event and chat_messages_log:
+            chat_messages_log.put(updated_event)
+
     def delete_chat_message(self, message_id: str):
         pryv_event_id = self._chat_message_id_to_pryv_event_id[message_id]
         self._pryv_api.delete_event(self._user_mongodb_obj.pryv_endpoint, pryv_event_id)
 
+        chat_messages_log = self._stream_event_logs.get(PryvStoredData.CHAT_MESSAGES.value[0], None)
+        if chat_messages_log:
+            chat_messages_log.remove(pryv_event_id)
+
     def to_json_string(self) -> str:
         mongo_db_json = json.loads(self._user_mongodb_obj.to_json())
 
+        self.prefetch_profile()
         first_name = self.first_name
         last_name = self.last_name
         language = self.language
@@ -1,5 +1,7 @@
-from abc import ABC
+from abc import ABC, abstractmethod
+from typing import List, Optional
 
+from common.chat.platform.types import ChatPlatform
 from common.database.abstract_dao import AbstractDAO
 from covid19.common.database.user.model.abstract_evaluation_question import AbstractEvaluationQuestion
 from covid19.common.database.user.model.abstract_exercise import AbstractExercise
@@ -39,9 +41,28 @@ class AbstractQuestionToExerciseSetMappingDAO(AbstractDAO[AbstractQuestionToExer
 
 class AbstractUserDAO(AbstractDAO[AbstractUser], ABC):
     """A base class to implement Data Access Object for User"""
-    pass
+
+    PLATFORM_ID_FIELDS = {
+        ChatPlatform.TELEGRAM: 'telegram_id',
+        ChatPlatform.CUSTOM_CHAT: 'custom_chat_id',
+    }
+    """The user fields holding the ID of the user on each messaging platform"""
+
+    def find_one_by_platform_id(
+            self, chat_platform: ChatPlatform, platform_id: str, projection: Optional[List[str]] = None
+    ) -> Optional[AbstractUser]:
+        """Finds the user with provided messaging platform ID, if any"""
+        platform_id_field = self.PLATFORM_ID_FIELDS.get(chat_platform, None)
+        if platform_id_field is None:
+            return None
+
+        return self.find_one_by(projection, **{platform_id_field: platform_id})
 
 
 class AbstractUnreadMessageDAO(AbstractDAO[AbstractUnreadMessage], ABC):
     """A base class to implement Data Access Object for UnreadMessage"""
-    pass
+
+    @abstractmethod
+    def pop_all_for(self, recipient_id: str) -> List[AbstractUnreadMessage]:
+        """Retrieves and deletes all the messages of the recipient, in bulk"""
+        pass
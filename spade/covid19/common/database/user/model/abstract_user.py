@@ -12,6 +12,11 @@ from covid19.common.database.user.model.abstract_sport_session import AbstractSp
 from covid19.common.database.user.model.abstract_user_goal import AbstractUserGoal
 
 
+class PlatformIDAlreadyBoundError(Exception):
+    """Raised binding a user to a messaging platform ID, which is already bound to another user"""
+    pass
+
+
 class AbstractUser(AbstractBasicUser, AbstractObjectWithID, AbstractJsonConvertible, ABC):
     """An abstract model class representing a user profile"""
 
@@ -141,6 +146,10 @@ class AbstractUser(AbstractBasicUser, AbstractObjectWithID, AbstractJsonConverti
         """The user sport_sessions"""
         pass
 
+    def last_sport_sessions(self, count: int) -> List[AbstractSportSession]:
+        """The user last `count` sport_sessions, ordered as in sport_sessions"""
+        return self.sport_sessions[-count:] if count > 0 else []
+
     @abstractmethod
     def append_sport_session(self, new_value: AbstractSportSession):
         """Adds the newly provided sport session to the user ones"""
@@ -166,3 +175,7 @@ class AbstractUser(AbstractBasicUser, AbstractObjectWithID, AbstractJsonConverti
     def delete_chat_message(self, obj_id: str):
         """Deletes the message with provided id"""
         pass
+
+    def prefetch_profile(self):
+        """Loads all profile fields at once, so that next reads are served without further queries"""
+        pass
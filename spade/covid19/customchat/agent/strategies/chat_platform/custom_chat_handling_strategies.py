@@ -12,7 +12,7 @@ from covid19.common.agent.strategies.chat_platform.abstract_covid19_handling_str
     AbstractCovid19HandlingStrategies
 )
 from covid19.common.database.enums import Usefulness
-from covid19.common.database.user.model.abstract_user import AbstractUser
+from covid19.common.database.user.model.abstract_user import AbstractUser, PlatformIDAlreadyBoundError
 
 logger = logging.getLogger(__name__)
 
@@ -26,8 +26,12 @@ class CustomChatCovid19HandlingStrategies(AbstractCovid19HandlingStrategies, Cus
     def bind_messaging_platform_id_to_user_id(self, user: AbstractUser, chat_message: ChatMessage):
         if not user.custom_chat_id:
             # Bind user ID to custom chat ID, if not already
-            user.custom_chat_id = chat_message.sender_id
-            logger.info(f" Bound user ID `{user.id}` to CustomChat ID `{chat_message.sender_id}`")
+            try:
+                user.custom_chat_id = chat_message.sender_id
+                logger.info(f" Bound user ID `{user.id}` to CustomChat ID `{chat_message.sender_id}`")
+            except PlatformIDAlreadyBoundError:
+                logger.error(f" Not bound user ID `{user.id}` to CustomChat ID `{chat_message.sender_id}`, "
+                             f"already bound to another user")
 
     def extract_platform_id(self, user: AbstractUser) -> Optional[str]:
         return user.custom_chat_id
@@ -12,7 +12,7 @@ from covid19.common.agent.strategies.chat_platform.abstract_covid19_handling_str
     AbstractCovid19HandlingStrategies
 )
 from covid19.common.database.enums import Usefulness
-from covid19.common.database.user.model.abstract_user import AbstractUser
+from covid19.common.database.user.model.abstract_user import AbstractUser, PlatformIDAlreadyBoundError
 
 logger = logging.getLogger(__name__)
 
@@ -23,8 +23,12 @@ class TelegramCovid19HandlingStrategies(AbstractCovid19HandlingStrategies, Teleg
     def bind_messaging_platform_id_to_user_id(self, user: AbstractUser, chat_message: ChatMessage):
         if not user.telegram_id:
             # Bind user ID to telegram ID, if not already
-            user.telegram_id = chat_message.sender_id
-            logger.info(f" Bound user ID `{user.id}` to Telegram ID `{chat_message.sender_id}`")
+            try:
+                user.telegram_id = chat_message.sender_id
+                logger.info(f" Bound user ID `{user.id}` to Telegram ID `{chat_message.sender_id}`")
+            except PlatformIDAlreadyBoundError:
+                logger.error(f" Not bound user ID `{user.id}` to Telegram ID `{chat_message.sender_id}`, "
+                             f"already bound to another user")
 
     def extract_platform_id(self, user: AbstractUser) -> Optional[str]:
         return user.telegram_id
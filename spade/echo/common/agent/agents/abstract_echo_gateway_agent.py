@@ -12,7 +12,6 @@ from common.agent.agents.abstract_gateway_agent import (
 from common.agent.agents.abstract_user_agent import MESSAGING_PLATFORM_API_TOKEN_METADATA_FIELD
 from common.agent.agents.custom_metadata_fields import MasMessageMetadataFields, MasMessagePerformatives
 from common.agent.agents.interaction_texts import localize
-from common.agent.behaviour.behaviours import WaitForMessageFSMBehaviour
 from common.agent.my_logging import log
 from common.agent.presence_utils import find_contact_by_partial_name
 from common.agent.utils import compose_user_agent_jid
@@ -24,7 +23,6 @@ from echo.common.agent.agents.interaction_texts import (
 from echo.common.agent.agents.user.agent import UserAgent
 from echo.common.bootstrap_agent_names import ALL_PLATFORMS_GATEWAY_AGENTS_JIDS, TELEGRAM_GATEWAY_JID
 from echo.common.database.connection_manager import AbstractEchoConnectionManager
-from echo.common.database.user.factory import UserFactory
 
 logger = logging.getLogger(__name__)
 
@@ -53,15 +51,8 @@ class AbstractEchoGatewayAgent(AbstractGatewayAgent):
             doctor_jid = find_contact_by_partial_name(CHECK_REGISTRATION_CONTACT_PARTIAL_NAME, self.presence)
             await forward_message_to_user_agent(self, cached_user, mas_message, chat_message, doctor_jid)
 
-        def create_response_handling_behaviour(self) -> WaitForMessageFSMBehaviour:
-            class HandleUserRegistrationResponse(WaitForMessageFSMBehaviour):
-                pass  # Only to change the class name shown in logging
-
-            return HandleUserRegistrationResponse(
-                lambda: self.agent.create_handle_user_registration_response_state(
-                    self.agent.messaging_platform_api_token
-                )
-            )
+        def create_response_handling_state(self) -> AbstractUserDataResponseHandlingState:
+            return self.agent.create_handle_user_registration_response_state(self.agent.messaging_platform_api_token)
 
     class AbstractHandleUserRegistrationResponseState(AbstractUserDataResponseHandlingState, ABC):
         """A FSM behaviour state to handle user registration status, coming back from DoctorAgent"""
@@ -80,9 +71,6 @@ class AbstractEchoGatewayAgent(AbstractGatewayAgent):
                 # Default handling behaviour
                 await super().on_chat_message_received(mas_message, chat_message)
 
-        def extract_user_id(self, other_agent_message: Message) -> str:
-            return UserFactory.from_json(other_agent_message.body).id
-
         async def handle_user_data_response(self, cached_user: CachedUser, mas_message: Message,
                                             chat_message: ChatMessage):
             await forward_message_to_user_agent(self, cached_user, mas_message, chat_message, mas_message.sender)
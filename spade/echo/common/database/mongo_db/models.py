@@ -24,3 +24,7 @@ class UnreadMessage(Document):
 
     recipient_id = StringField()
     message_json = StringField()
+
+    meta = {
+        'indexes': ['recipient_id']
+    }
@@ -1,4 +1,5 @@
 import logging
+from typing import List
 
 from common.database.mongo_db.dao_mixin import MongoDBDAOMixin
 from echo.common.database.mongo_db.models import UnreadMessage
@@ -26,3 +27,11 @@ class MongoDBUnreadMessageDAO(AbstractUnreadMessageDAO, MongoDBDAOMixin[MongoDBU
         to_insert_question_to_exercise_set_mapping = UnreadMessage.from_json(unread_message.to_json_string())
         to_insert_question_to_exercise_set_mapping.save()
         return MongoDBUnreadMessage(to_insert_question_to_exercise_set_mapping)
+
+    def pop_all_for(self, recipient_id: str) -> List[AbstractUnreadMessage]:
+        unread_messages = list(UnreadMessage.objects(recipient_id=recipient_id))
+        if unread_messages:
+            # Deleting by id, leaves untouched messages arrived in the meantime
+            UnreadMessage.objects(id__in=[unread_message.id for unread_message in unread_messages]).delete()
+
+        return [MongoDBUnreadMessage(unread_message) for unread_message in unread_messages]
@@ -1,4 +1,5 @@
-from abc import ABC
+from abc import ABC, abstractmethod
+from typing import List
 
 from common.database.abstract_dao import AbstractDAO
 from echo.common.database.user.model.abstract_unread_message import AbstractUnreadMessage
@@ -12,4 +13,8 @@ class AbstractUserDAO(AbstractDAO[AbstractUser], ABC):
 
 class AbstractUnreadMessageDAO(AbstractDAO[AbstractUnreadMessage], ABC):
     """A base class to implement Data Access Object for UnreadMessage"""
-    pass
+
+    @abstractmethod
+    def pop_all_for(self, recipient_id: str) -> List[AbstractUnreadMessage]:
+        """Retrieves and deletes all the messages of the recipient, in bulk"""
+        pass
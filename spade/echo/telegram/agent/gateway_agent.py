@@ -1,6 +1,9 @@
 import logging
 
 from common.agent.my_logging import log, log_agent_contacts
+from common.telegram.agent.send_metrics_behaviour import (
+    LogTelegramSendMetricsBehaviour, TELEGRAM_SEND_METRICS_LOG_SECONDS
+)
 from common.telegram.mixins import TelegramMixin
 from echo.common.agent.agents.abstract_echo_gateway_agent import AbstractEchoGatewayAgent
 from echo.common.database.connection_manager import AbstractEchoConnectionManager
@@ -20,6 +23,9 @@ class TelegramGatewayAgent(AbstractEchoGatewayAgent):
         log(self, "TelegramGatewayAgent started.", logger)
         log_agent_contacts(self, logger)
 
+        if TELEGRAM_SEND_METRICS_LOG_SECONDS > 0:
+            self.add_behaviour(LogTelegramSendMetricsBehaviour())
+
     class CheckUserRegistrationState(
         TelegramMixin,
         AbstractEchoGatewayAgent.AbstractCheckUserRegistrationState
@@ -5,6 +5,7 @@ from aiogram import executor
 
 from common.telegram.agent.integration import TELEGRAM_SENDER_NAME
 from common.telegram.bot import BotHandlersWrapper
+from common.telegram.webhook import TELEGRAM_INGESTION_MODE, run_telegram_webhook
 from common.utils.evironment import get_env_variable_or_error
 from common.utils.my_logging import log_exception
 from common.working_contexts import WorkingContext
@@ -48,15 +49,19 @@ if __name__ == '__main__':
         future.result()  # wait for the agent to be online before pulling messages from Telegram
 
         try:
-            while True:  # This loop restarts the Telegram Bot if an exception occurs during polling
-                try:
-                    executor.start_polling(bot_handlers.telegram_dispatcher, skip_updates=True)
-                except KeyboardInterrupt:
-                    logger.info(" KeyboardInterrupt: Stopping Telegram Bot...")
-                    break
-                except:
-                    log_exception()
-                    logger.info(" Restarting Telegram Bot after exception...")
+            if TELEGRAM_INGESTION_MODE == "webhook":
+                logger.info(" Receiving Telegram updates through the webhook...")
+                run_telegram_webhook(bot_handlers.telegram_dispatcher)
+            else:
+                while True:  # This loop restarts the Telegram Bot if an exception occurs during polling
+                    try:
+                        executor.start_polling(bot_handlers.telegram_dispatcher, skip_updates=True)
+                    except KeyboardInterrupt:
+                        logger.info(" KeyboardInterrupt: Stopping Telegram Bot...")
+                        break
+                    except:
+                        log_exception()
+                        logger.info(" Restarting Telegram Bot after exception...")
         finally:
             telegram_gateway_agent.stop()
             logger.warning(" Telegram bot quit.")
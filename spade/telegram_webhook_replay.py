@@ -0,0 +1,19 @@
+import asyncio
+import glob
+import logging
+import os
+import sys
+
+from common.telegram.webhook import post_recorded_updates
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_FIXTURES_DIRECTORY = os.path.join(os.path.dirname(__file__), "common", "telegram", "webhook_fixtures")
+"""The directory with the recorded Telegram updates, replayed if no file is provided"""
+
+if __name__ == '__main__':
+    # Posts recorded updates to the webhook of a locally running telegram_bot_main.py, as Telegram would do
+    fixture_paths = sys.argv[1:] or sorted(glob.glob(os.path.join(WEBHOOK_FIXTURES_DIRECTORY, "*.json")))
+
+    logger.info(f" Replaying {len(fixture_paths)} recorded Telegram updates...")
+    asyncio.get_event_loop().run_until_complete(post_recorded_updates(fixture_paths))